@@ -0,0 +1,375 @@
+from typing import Any, Callable, Iterable, Self
+
+from Treap.treap import Treap, TraversalOrder, TreapNode
+
+
+class Aggregate:
+    """
+    Describes a monoid aggregate that an AggregateTreap keeps for every subtree.
+
+    :param identity: The aggregate of no values, e.g. 0 for a sum
+    :param combine: Combines two aggregates, e.g. operator.add for a sum. Has to be associative
+    :param extract: Takes a key and returns the value it contributes. Defaults to the key itself
+    :param apply: Only needed for AggregateTreap.range_apply. Takes an update function fn,
+            the aggregate of count values and count, and returns the aggregate of those values
+            after fn is applied to each of them, e.g. lambda fn, total, count: total + count * fn(0)
+            for a sum under fn = lambda v: v + c
+    :param compose: Combines two pending updates, first then second, into one.
+            Defaults to calling one after the other
+    """
+
+    def __init__(self, identity, combine: Callable[[Any, Any], Any],
+                 extract: Callable[[Any], Any] = lambda key: key,
+                 apply: Callable[[Callable, Any, int], Any] | None = None,
+                 compose: Callable[[Callable, Callable], Callable] | None = None):
+        self.identity = identity
+        self.combine = combine
+        self.extract = extract
+        self.apply = apply
+        self.compose = compose if compose is not None else (lambda first, second: lambda v: second(first(v)))
+
+
+class AggregateTreapNode(TreapNode):
+    __slots__ = ("value", "aggregate", "pending")
+
+    def __init__(self, key, value):
+        super().__init__(key)
+        self.value = value
+        # Combination of the values in the subtree rooted at this node
+        self.aggregate = value
+        # Update that has been applied to this node but not yet to its children
+        self.pending = None
+
+
+class _AggregateEngine(Treap):
+    """
+    The Treap holding the nodes of an AggregateTreap. It recomputes the aggregates along with
+    the sizes, and pushes the pending update of every node it walks through to its children
+    before reading or relinking them, including through the split and merge of Treap
+    """
+
+    def __init__(self, aggregate: Aggregate, root: AggregateTreapNode | None = None):
+        super().__init__(root)
+        self.spec = aggregate
+
+    def _derive(self, root: AggregateTreapNode | None) -> Self:
+        return _AggregateEngine(self.spec, root)
+
+    def _aggregate_of(self, node: AggregateTreapNode | None):
+        return node.aggregate if node is not None else self.spec.identity
+
+    def _update(self, node: AggregateTreapNode):
+        node.size = 1 + self._node_size(node.left) + self._node_size(node.right)
+        combine = self.spec.combine
+        node.aggregate = combine(combine(self._aggregate_of(node.left), node.value), self._aggregate_of(node.right))
+
+    def _apply(self, node: AggregateTreapNode | None, fn: Callable):
+        """Applies fn to every value in the subtree rooted at node, deferring the children"""
+        if node is None:
+            return
+        node.value = fn(node.value)
+        node.aggregate = self.spec.apply(fn, node.aggregate, node.size)
+        node.pending = fn if node.pending is None else self.spec.compose(node.pending, fn)
+
+    def _visit(self, node: AggregateTreapNode) -> AggregateTreapNode:
+        """Passes the pending update of node on to its children"""
+        if node.pending is not None:
+            self._apply(node.left, node.pending)
+            self._apply(node.right, node.pending)
+            node.pending = None
+        return node
+
+    def _insert(self, root, key):
+        """Version of Treap._insert that pushes pending updates and recomputes aggregates on its path"""
+        new_node = AggregateTreapNode(key, self.spec.extract(key))
+        priority = new_node.priority
+
+        path: list[AggregateTreapNode] = []
+        node = root
+        while node is not None and node.priority >= priority:
+            self._visit(node)
+            if key < node.key:
+                child = node.left
+            elif key > node.key:
+                child = node.right
+            else:
+                raise self.DuplicateKeyException('No duplicates allowed', key, node.key)
+            path.append(node)
+            node = child
+
+        duplicate = node
+        while duplicate is not None:
+            if key < duplicate.key:
+                duplicate = duplicate.left
+            elif key > duplicate.key:
+                duplicate = duplicate.right
+            else:
+                raise self.DuplicateKeyException('No duplicates allowed', key, duplicate.key)
+
+        new_node.left, new_node.right = self._split(node, key)
+        self._update(new_node)
+
+        if not path:
+            return new_node
+        parent = path[-1]
+        if key < parent.key:
+            parent.left = new_node
+        else:
+            parent.right = new_node
+        for node in reversed(path):
+            self._update(node)
+        return root
+
+    def _delete(self, root, key):
+        """Version of Treap._delete that pushes pending updates and recomputes aggregates on its path"""
+        path: list[AggregateTreapNode] = []
+        node = root
+        while node is not None:
+            self._visit(node)
+            if key < node.key:
+                path.append(node)
+                node = node.left
+            elif key > node.key:
+                path.append(node)
+                node = node.right
+            else:
+                break
+
+        if node is None:
+            return root
+
+        replacement = self._merge(node.left, node.right)
+        if not path:
+            return replacement
+
+        parent = path[-1]
+        if parent.left is node:
+            parent.left = replacement
+        else:
+            parent.right = replacement
+        for ancestor in reversed(path):
+            self._update(ancestor)
+        return root
+
+
+class AggregateTreap:
+    """
+    A treap that also keeps an Aggregate of the values of every subtree, which lets
+    aggregate(lo, hi) and range_apply(lo, hi, fn) run in O(log n).
+
+    Updates made by range_apply are applied lazily: the root of the range takes the update
+    and records it as pending, and the update is only pushed down to the children of a node
+    when the node is visited again. The nodes are held by a Treap whose every method that
+    walks down the tree pushes pending updates first. The queries of Treap are forwarded to it.
+    The set operations and fingers of Treap, which relink nodes without pushing their updates,
+    and snapshots, which only keep the keys, are not offered.
+    """
+    DuplicateKeyException = Treap.DuplicateKeyException
+    ConcurrentModificationException = Treap.ConcurrentModificationException
+
+    def __init__(self, aggregate: Aggregate, root: AggregateTreapNode | None = None):
+        """
+        Creates a new AggregateTreap maintaining aggregate.
+
+        The root parameter is used by the split and merge methods to create a new
+        AggregateTreap from a given root node. It is not to be filled in by client code
+        """
+        self._treap = _AggregateEngine(aggregate, root)
+
+    @property
+    def spec(self) -> Aggregate:
+        return self._treap.spec
+
+    @property
+    def root(self) -> AggregateTreapNode | None:
+        return self._treap.root
+
+    def aggregate(self, lo=None, hi=None):
+        """
+        Returns the combination of the values of the keys k such that lo <= k < hi, in O(log n).
+        A bound of None leaves that side open.
+        The nodes are not relinked, so iterators and cursors over the treap stay valid:
+        the result is combined from the O(log n) subtrees that the range covers, found on the
+        paths to lo and hi, whose pending updates are pushed on the way
+        """
+        treap = self._treap
+        combine = self.spec.combine
+        aggregate_of = treap._aggregate_of
+
+        # The highest node in the range is where the paths to lo and hi part
+        node = treap.root
+        while node is not None:
+            treap._visit(node)
+            if lo is not None and node.key < lo:
+                node = node.right
+            elif hi is not None and not node.key < hi:
+                node = node.left
+            else:
+                break
+        if node is None:
+            return self.spec.identity
+
+        # Below it, every node in the range on the path to lo brings its right subtree along,
+        # and every node in the range on the path to hi brings its left subtree
+        lower = self.spec.identity
+        child = node.left
+        while child is not None:
+            treap._visit(child)
+            if lo is not None and child.key < lo:
+                child = child.right
+            else:
+                lower = combine(combine(child.value, aggregate_of(child.right)), lower)
+                child = child.left
+
+        upper = self.spec.identity
+        child = node.right
+        while child is not None:
+            treap._visit(child)
+            if hi is not None and not child.key < hi:
+                child = child.left
+            else:
+                upper = combine(upper, combine(aggregate_of(child.left), child.value))
+                child = child.right
+
+        return combine(combine(lower, node.value), upper)
+
+    def range_apply(self, lo, hi, fn: Callable):
+        """
+        Replaces the value v of every key k such that lo <= k < hi with fn(v), in O(log n).
+        A bound of None leaves that side open
+        :raise: ValueError if the Aggregate of this treap has no apply function
+        """
+        if self.spec.apply is None:
+            raise ValueError("range_apply needs an Aggregate with an apply function")
+        treap = self._treap
+        lower, middle, upper = self._cut(lo, hi)
+        treap._apply(middle, fn)
+        treap.root = treap._merge(treap._merge(lower, middle), upper)
+        treap._version += 1
+
+    def value(self, key):
+        """
+        Returns the current value of key, with all updates applied
+        :raise: KeyError if key is not in the treap
+        """
+        node = self.root
+        while node is not None:
+            self._treap._visit(node)
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                return node.value
+        raise KeyError(key)
+
+    def _cut(self, lo, hi):
+        """Splits the treap into the keys less than lo, the keys in [lo, hi) and the rest"""
+        treap = self._treap
+        lower, middle = treap._split(treap.root, lo, inclusive=False) if lo is not None else (None, treap.root)
+        if hi is None:
+            return lower, middle, None
+        middle, upper = treap._split(middle, hi, inclusive=False)
+        return lower, middle, upper
+
+    def insert(self, key):
+        """
+        Adds key, whose value is given by the extract function of the Aggregate
+        :raise: DuplicateKeyException if key is already present
+        """
+        self._treap.insert(key)
+
+    def delete(self, key):
+        self._treap.delete(key)
+
+    def delete_range(self, lo, hi) -> int:
+        return self._treap.delete_range(lo, hi)
+
+    def split(self, key) -> tuple[Self, Self]:
+        left, right = self._treap._split(self.root, key)
+        return AggregateTreap(self.spec, left), AggregateTreap(self.spec, right)
+
+    @classmethod
+    def merge(cls, left_treap: Self, right_treap: Self) -> Self:
+        """
+        Takes in two AggregateTreaps with the same Aggregate and merges them into one
+        :return: A new AggregateTreap containing all the elements of left_treap and right_treap
+        """
+        return AggregateTreap(left_treap.spec, left_treap._treap._merge(left_treap.root, right_treap.root))
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable, aggregate: Aggregate) -> Self:
+        """Builds an AggregateTreap maintaining aggregate in O(n) from keys given in ascending order"""
+        extract = aggregate.extract
+        root = Treap._build_sorted(keys, lambda key: AggregateTreapNode(key, extract(key)))
+
+        # The build only computes the sizes, so the aggregates are filled in bottom-up
+        treap = AggregateTreap(aggregate, root)
+        nodes = [root] if root is not None else []
+        for node in nodes:
+            nodes.extend(child for child in (node.left, node.right) if child is not None)
+        for node in reversed(nodes):
+            treap._treap._update(node)
+        return treap
+
+    @classmethod
+    def from_iterable(cls, keys: Iterable, aggregate: Aggregate) -> Self:
+        """Builds an AggregateTreap maintaining aggregate from keys in any order"""
+        return cls.from_sorted(sorted(keys), aggregate)
+
+    def __len__(self):
+        return len(self._treap)
+
+    def size(self):
+        return len(self._treap)
+
+    def is_empty(self):
+        return self._treap.is_empty()
+
+    def __iter__(self):
+        return iter(self._treap)
+
+    def search(self, key):
+        return self._treap.search(key)
+
+    def min(self):
+        return self._treap.min()
+
+    def max(self):
+        return self._treap.max()
+
+    def floor(self, key):
+        return self._treap.floor(key)
+
+    def ceiling(self, key):
+        return self._treap.ceiling(key)
+
+    def predecessor(self, key):
+        return self._treap.predecessor(key)
+
+    def successor(self, key):
+        return self._treap.successor(key)
+
+    def iter_range(self, lo=None, hi=None, reverse: bool = False):
+        return self._treap.iter_range(lo, hi, reverse)
+
+    def kth(self, index: int):
+        return self._treap.kth(index)
+
+    def rank(self, key) -> int:
+        return self._treap.rank(key)
+
+    def count_range(self, lo, hi) -> int:
+        return self._treap.count_range(lo, hi)
+
+    def median(self):
+        return self._treap.median()
+
+    def cursor_at(self, key=None) -> Treap.Cursor:
+        return self._treap.cursor_at(key)
+
+    def traverse(self, order: TraversalOrder = TraversalOrder.INORDER, chunk_size: int | None = None):
+        return self._treap.traverse(order, chunk_size)
+
+    def preorder(self):
+        return self._treap.preorder()
@@ -0,0 +1,375 @@
+import random
+from array import array
+from typing import Self
+
+from Treap.treap import Treap
+
+# Index of the empty subtree. Slot 0 of every array is reserved for it,
+# which is why its size is always 0
+NIL = 0
+
+
+class _NodePool:
+    """
+    Struct-of-arrays storage for treap nodes.
+    A node is an int index into parallel arrays holding its key, priority,
+    children and subtree size, so no Python object is allocated per node.
+    Deleted slots are chained into a free list through the left array and reused.
+    """
+
+    def __init__(self, key_typecode: str | None):
+        # Keys that are not numeric fall back to a list of references
+        self.keys = array(key_typecode, [0]) if key_typecode is not None else [None]
+        self.priorities = array("d", [0.0])
+        self.left = array("i", [NIL])
+        self.right = array("i", [NIL])
+        self.size = array("i", [0])
+        self._free = NIL
+
+    def allocate(self, key, priority: float) -> int:
+        """
+        Returns the index of a new leaf node holding key
+        :raise: TypeError or OverflowError if the key array cannot hold key, leaving the pool unchanged
+        """
+        index = self._free
+        if index != NIL:
+            # The key is stored first, so that a key that does not fit leaves the free list intact
+            self.keys[index] = key
+            self._free = self.left[index]
+            self.priorities[index] = priority
+            self.left[index] = NIL
+            self.right[index] = NIL
+            self.size[index] = 1
+        else:
+            index = len(self.priorities)
+            self.keys.append(key)
+            self.priorities.append(priority)
+            self.left.append(NIL)
+            self.right.append(NIL)
+            self.size.append(1)
+        return index
+
+    def release(self, index: int):
+        """Puts the slot at index on the free list"""
+        if isinstance(self.keys, list):
+            # Drop the reference so that the key can be garbage collected
+            self.keys[index] = None
+        self.left[index] = self._free
+        self.right[index] = NIL
+        self.size[index] = 0
+        self._free = index
+
+    def copy_from(self, other: Self, root: int) -> int:
+        """
+        Copies the subtree at root in another pool into this one, keeping its shape and priorities
+        :return: The index of the copied root in this pool
+        """
+        if root == NIL:
+            return NIL
+
+        new_root = self.allocate(other.keys[root], other.priorities[root])
+        stack = [(root, new_root)]
+        while stack:
+            source, target = stack.pop()
+            self.size[target] = other.size[source]
+            child = other.left[source]
+            if child != NIL:
+                copy = self.allocate(other.keys[child], other.priorities[child])
+                self.left[target] = copy
+                stack.append((child, copy))
+            child = other.right[source]
+            if child != NIL:
+                copy = self.allocate(other.keys[child], other.priorities[child])
+                self.right[target] = copy
+                stack.append((child, copy))
+        return new_root
+
+
+class ArrayTreap:
+    """
+    A treap with the same operations as Treap, whose nodes are stored in a
+    _NodePool instead of TreapNode objects.
+    Numeric keys are stored unboxed in an array of the given typecode ('q' for
+    ints by default, 'd' for floats), and None allows keys of any comparable type.
+
+    Since nodes are not objects, search, min and max return the key itself
+    (or None) rather than a node.
+    """
+    DuplicateKeyException = Treap.DuplicateKeyException
+
+    def __init__(self, key_typecode: str | None = "q", pool: _NodePool | None = None, root: int = NIL):
+        """
+        Creates a new ArrayTreap.
+
+        The pool and root parameters are used by the split and merge methods
+        to create a new ArrayTreap sharing the nodes of an existing one.
+        They are not to be filled in by client code
+        """
+        self._pool = pool if pool is not None else _NodePool(key_typecode)
+        self.root = root
+        self._size = self._pool.size[root]
+
+    def __len__(self):
+        return self._size
+
+    def size(self):
+        return self._size
+
+    def is_empty(self):
+        return self._size == 0
+
+    def insert(self, key):
+        pool = self._pool
+        keys, priorities, left, right, size = pool.keys, pool.priorities, pool.left, pool.right, pool.size
+        priority = random.random()
+
+        parent = NIL
+        node = self.root
+        while node != NIL and priorities[node] >= priority:
+            node_key = keys[node]
+            if key < node_key:
+                child = left[node]
+            elif key > node_key:
+                child = right[node]
+            else:
+                self._undo_insert_sizes(node, key)
+                raise self.DuplicateKeyException('No duplicates allowed', key, node_key)
+            size[node] += 1
+            parent = node
+            node = child
+
+        duplicate = node
+        while duplicate != NIL:
+            node_key = keys[duplicate]
+            if key < node_key:
+                duplicate = left[duplicate]
+            elif key > node_key:
+                duplicate = right[duplicate]
+            else:
+                self._undo_insert_sizes(node, key)
+                raise self.DuplicateKeyException('No duplicates allowed', key, node_key)
+
+        try:
+            new_node = pool.allocate(key, priority)
+        except (TypeError, OverflowError):
+            # The key does not fit the key array, e.g. a float or a huge int with typecode 'q'
+            self._undo_insert_sizes(node, key)
+            raise
+        lower, upper = self._split(node, key)
+        left[new_node] = lower
+        right[new_node] = upper
+        size[new_node] = 1 + size[lower] + size[upper]
+
+        if parent == NIL:
+            self.root = new_node
+        elif key < keys[parent]:
+            left[parent] = new_node
+        else:
+            right[parent] = new_node
+        self._size += 1
+
+    def _undo_insert_sizes(self, stop: int, key):
+        """Reverts the size increments made by insert on the path from the root to stop"""
+        pool = self._pool
+        node = self.root
+        while node != stop:
+            pool.size[node] -= 1
+            node = pool.left[node] if key < pool.keys[node] else pool.right[node]
+
+    def delete(self, key):
+        pool = self._pool
+        keys, left, right, size = pool.keys, pool.left, pool.right, pool.size
+
+        path: list[int] = []
+        node = self.root
+        while node != NIL:
+            node_key = keys[node]
+            if key < node_key:
+                path.append(node)
+                node = left[node]
+            elif key > node_key:
+                path.append(node)
+                node = right[node]
+            else:
+                break
+
+        if node == NIL:
+            return
+
+        replacement = self._merge(pool, left[node], right[node])
+        if not path:
+            self.root = replacement
+        else:
+            parent = path[-1]
+            if left[parent] == node:
+                left[parent] = replacement
+            else:
+                right[parent] = replacement
+            for ancestor in path:
+                size[ancestor] -= 1
+
+        pool.release(node)
+        self._size -= 1
+
+    def search(self, key):
+        """:return: The key stored in the treap that is equal to key, or None if there is none"""
+        pool = self._pool
+        keys, left, right = pool.keys, pool.left, pool.right
+        node = self.root
+        while node != NIL:
+            node_key = keys[node]
+            if key < node_key:
+                node = left[node]
+            elif key > node_key:
+                node = right[node]
+            else:
+                return node_key
+        return None
+
+    def __contains__(self, key):
+        return self.search(key) is not None
+
+    def min(self):
+        left = self._pool.left
+        node = self.root
+        if node == NIL:
+            return None
+        while left[node] != NIL:
+            node = left[node]
+        return self._pool.keys[node]
+
+    def max(self):
+        right = self._pool.right
+        node = self.root
+        if node == NIL:
+            return None
+        while right[node] != NIL:
+            node = right[node]
+        return self._pool.keys[node]
+
+    def split(self, key) -> tuple[Self, Self]:
+        """
+        Splits the treap into the keys less than or equal to key and the keys greater than key.
+        Both treaps share this treap's node pool
+        """
+        lower, upper = self._split(self.root, key)
+        return ArrayTreap(pool=self._pool, root=lower), ArrayTreap(pool=self._pool, root=upper)
+
+    def _split(self, root: int, key) -> tuple[int, int]:
+        """Top-down split, as in Treap._split"""
+        pool = self._pool
+        keys, left, right, size = pool.keys, pool.left, pool.right, pool.size
+
+        lower_root = upper_root = NIL
+        lower_tail = upper_tail = NIL
+        path: list[int] = []
+        node = root
+        while node != NIL:
+            path.append(node)
+            if key < keys[node]:
+                if upper_tail == NIL:
+                    upper_root = node
+                else:
+                    left[upper_tail] = node
+                upper_tail = node
+                node = left[node]
+            else:
+                if lower_tail == NIL:
+                    lower_root = node
+                else:
+                    right[lower_tail] = node
+                lower_tail = node
+                node = right[node]
+
+        if lower_tail != NIL:
+            right[lower_tail] = NIL
+        if upper_tail != NIL:
+            left[upper_tail] = NIL
+
+        for node in reversed(path):
+            size[node] = 1 + size[left[node]] + size[right[node]]
+
+        return lower_root, upper_root
+
+    @classmethod
+    def merge(cls, left_treap: Self, right_treap: Self) -> Self:
+        """
+        Takes in two ArrayTreaps and merges them into one.
+        If they do not share a node pool, the right treap's nodes are copied into the left's pool
+        :return: A new ArrayTreap containing all the elements of left_treap and right_treap
+        """
+        pool = left_treap._pool
+        right_root = right_treap.root
+        if right_treap._pool is not pool:
+            right_root = pool.copy_from(right_treap._pool, right_root)
+        return ArrayTreap(pool=pool, root=cls._merge(pool, left_treap.root, right_root))
+
+    @staticmethod
+    def _merge(pool: _NodePool, left_root: int, right_root: int) -> int:
+        """Top-down merge, as in Treap._merge"""
+        priorities, left, right, size = pool.priorities, pool.left, pool.right, pool.size
+
+        root = NIL
+        parent = NIL
+        parent_from_left = False
+        path: list[int] = []
+
+        while left_root != NIL and right_root != NIL:
+            if priorities[left_root] > priorities[right_root]:
+                node = left_root
+                left_root = right[left_root]
+                from_left = True
+            else:
+                node = right_root
+                right_root = left[right_root]
+                from_left = False
+
+            if parent == NIL:
+                root = node
+            elif parent_from_left:
+                right[parent] = node
+            else:
+                left[parent] = node
+            path.append(node)
+            parent = node
+            parent_from_left = from_left
+
+        remaining = left_root if left_root != NIL else right_root
+        if parent == NIL:
+            return remaining
+        if parent_from_left:
+            right[parent] = remaining
+        else:
+            left[parent] = remaining
+
+        for node in reversed(path):
+            size[node] = 1 + size[left[node]] + size[right[node]]
+
+        return root
+
+    def preorder(self):
+        """:returns: A generator for a preorder traversal through the treap's keys"""
+        pool = self._pool
+        keys, left, right = pool.keys, pool.left, pool.right
+        stack = [self.root] if self.root != NIL else []
+        while stack:
+            node = stack.pop()
+            yield keys[node]
+            if right[node] != NIL:
+                stack.append(right[node])
+            if left[node] != NIL:
+                stack.append(left[node])
+
+    def __iter__(self):
+        """:returns: A generator for an inorder traversal through the treap's keys"""
+        pool = self._pool
+        keys, left, right = pool.keys, pool.left, pool.right
+        stack: list[int] = []
+        node = self.root
+        while stack or node != NIL:
+            while node != NIL:
+                stack.append(node)
+                node = left[node]
+            node = stack.pop()
+            yield keys[node]
+            node = right[node]
@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the data structures in this package.
+Run a benchmark module directly, e.g. `python -m Treap.benchmarks.engine`.
+`python -m Treap.benchmarks.suite` runs the reproducible suite and compares it with a baseline
+"""
@@ -0,0 +1,52 @@
+"""
+Read/write throughput of a ConcurrentTreap shared between 1 to 16 threads.
+On builds with the GIL, threads take turns running Python code, so this mostly measures
+lock overhead; on free-threaded builds it also shows how far reads scale.
+
+Usage: python -m Treap.benchmarks.concurrency [operations_per_thread] [read_fraction]
+"""
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Treap.concurrent_treap import ConcurrentTreap
+from Treap.treap import Treap
+
+KEY_SPACE = 1_000_000
+
+
+def worker(treap: ConcurrentTreap, operations: int, read_fraction: float, seed: int):
+    rng = random.Random(seed)
+    for _ in range(operations):
+        key = rng.randrange(KEY_SPACE)
+        if rng.random() < read_fraction:
+            treap.search(key)
+        elif rng.random() < 0.5:
+            try:
+                treap.insert(key)
+            except Treap.DuplicateKeyException:
+                pass
+        else:
+            treap.delete(key)
+
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    read_fraction = float(sys.argv[2]) if len(sys.argv) > 2 else 0.9
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil_enabled else 'disabled'}, "
+          f"{read_fraction:.0%} reads")
+
+    for threads in (1, 2, 4, 8, 16):
+        treap = ConcurrentTreap(Treap.from_sorted(range(0, KEY_SPACE, 10)))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            for seed in range(threads):
+                executor.submit(worker, treap, operations, read_fraction, seed)
+        elapsed = time.perf_counter() - start
+        print(f"{threads:2} thread(s): {threads * operations / elapsed:12,.0f} ops/sec")
+
+
+if __name__ == "__main__":
+    main()
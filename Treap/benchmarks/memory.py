@@ -0,0 +1,43 @@
+"""
+Compares the memory used by a Treap of TreapNode objects with an ArrayTreap
+holding the same integer keys, as measured by tracemalloc.
+
+Usage: python -m Treap.benchmarks.memory [number_of_keys]
+"""
+import random
+import sys
+import tracemalloc
+
+from Treap.array_treap import ArrayTreap
+from Treap.treap import Treap
+
+
+def measure(build, keys: list[int]) -> tuple[int, int]:
+    """:return: The current and peak traced memory in bytes while keeping the result of build(keys) alive"""
+    tracemalloc.start()
+    structure = build(keys)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del structure
+    return current, peak
+
+
+def build_array_treap(keys: list[int]) -> ArrayTreap:
+    treap = ArrayTreap()
+    for key in keys:
+        treap.insert(key)
+    return treap
+
+
+def main():
+    number_of_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    # Large keys so that the TreapNode layout cannot share cached small ints
+    keys = random.Random(0).sample(range(2 ** 40), number_of_keys)
+
+    for name, build in [("Treap", Treap.from_iterable), ("ArrayTreap", build_array_treap)]:
+        current, peak = measure(build, keys)
+        print(f"{name:>10}: {current / number_of_keys:6.1f} bytes/key retained, peak {peak / 2 ** 20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Scaling benchmark for Treap.parallel_from_iterable and Treap.parallel_union.
+
+Usage: python -m Treap.benchmarks.parallel [number_of_keys] [max_workers]
+"""
+import random
+import sys
+import time
+
+from Treap.treap import Treap
+
+
+def main():
+    number_of_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    rng = random.Random(0)
+    keys = rng.sample(range(number_of_keys * 4), number_of_keys)
+    other_keys = rng.sample(range(number_of_keys * 4), number_of_keys)
+
+    workers = 1
+    while workers <= max_workers:
+        start = time.perf_counter()
+        Treap.parallel_from_iterable(keys, workers)
+        build = time.perf_counter() - start
+
+        treap = Treap.from_iterable(keys)
+        other = Treap.from_iterable(other_keys)
+        start = time.perf_counter()
+        treap.parallel_union(other, workers)
+        union = time.perf_counter() - start
+
+        print(f"{workers} worker(s): build {build:7.2f}s, union {union:7.2f}s")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
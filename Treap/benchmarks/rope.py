@@ -0,0 +1,52 @@
+"""
+Compares positional edits on an ImplicitTreap with the same edits on a list.
+
+Usage: python -m Treap.benchmarks.rope [buffer_length] [number_of_edits]
+"""
+import random
+import sys
+import time
+
+from Treap.implicit_treap import ImplicitTreap
+
+
+def run_edits(buffer, edits: list[tuple[str, int, int]]) -> float:
+    """:return: The time taken to apply edits to buffer, in seconds"""
+    start = time.perf_counter()
+    for operation, i, j in edits:
+        if operation == "insert":
+            buffer.insert(i, "x") if isinstance(buffer, list) else buffer.insert_at(i, "x")
+        elif operation == "pop":
+            buffer.pop(i) if isinstance(buffer, list) else buffer.pop_at(i)
+        elif operation == "reverse":
+            if isinstance(buffer, list):
+                buffer[i:j] = buffer[i:j][::-1]
+            else:
+                buffer.reverse(i, j)
+        else:
+            buffer[i]
+    return time.perf_counter() - start
+
+
+def main():
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    number_of_edits = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    rng = random.Random(0)
+
+    edits = []
+    for _ in range(number_of_edits):
+        i = rng.randrange(length // 2)
+        edits.append((rng.choice(["insert", "pop", "reverse", "index"]), i, i + length // 4))
+
+    timings = {}
+    for name, buffer in [("list", ["a"] * length), ("ImplicitTreap", ImplicitTreap(["a"] * length))]:
+        timings[name] = run_edits(buffer, edits)
+        print(f"{name:>13}: {number_of_edits / timings[name]:12,.0f} edits/sec on a {length:,} element buffer")
+
+    start = time.perf_counter()
+    ImplicitTreap(["a"] * length).concat(ImplicitTreap(["b"] * length))
+    print(f"ImplicitTreap build and concat of two {length:,} element buffers: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
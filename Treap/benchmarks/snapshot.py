@@ -0,0 +1,50 @@
+"""
+Compares loading a Treap from a binary snapshot, with and without mmap, against unpickling it.
+
+Usage: python -m Treap.benchmarks.snapshot [number_of_keys]
+"""
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+
+from Treap.treap import Treap
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    number_of_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    keys = random.Random(0).sample(range(2 ** 40), number_of_keys)
+    treap = Treap.from_iterable(keys)
+    probe = keys[len(keys) // 2]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "treap.snapshot")
+        _, elapsed = timed(lambda: treap.save(path))
+        print(f"save: {elapsed:.3f} s, {os.path.getsize(path) / 2 ** 20:.1f} MiB")
+
+        for mmap in (True, False):
+            loaded, elapsed = timed(lambda: Treap.load(path, mmap=mmap))
+            _, search = timed(lambda: loaded.search(probe))
+            _, materialize = timed(lambda: loaded.root)
+            print(f"load (mmap={mmap}): {elapsed * 1000:.3f} ms, first search {search * 1000:.3f} ms, "
+                  f"building the nodes {materialize:.3f} s")
+            del loaded
+
+        try:
+            data, elapsed = timed(lambda: pickle.dumps(treap))
+            _, elapsed = timed(lambda: pickle.loads(data))
+            print(f"unpickle: {elapsed:.3f} s")
+        except RecursionError:
+            print("unpickle: the treap is too deep to be pickled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Reproducible benchmark suite for Treap, Stack and StudentGroupMaker, with a sorted list
+searched by bisect and a dict as points of comparison.
+
+For every benchmark and size, a structure of that size is built, then a fixed-seed sequence of
+operations is run on it, each of them timed on its own. The throughput, the median and 99th
+percentile latencies, and the peak memory traced while building the structure and running the
+operations (in a separate run, as tracemalloc slows everything down) are reported.
+
+Results can be written as JSON and compared against a baseline from an earlier run, in which
+case the exit status is 1 if the median latency of any benchmark has become slower by more than
+the tolerance. The stored baseline.json was recorded with the default options.
+
+Usage: python -m Treap.benchmarks.suite [--sizes 1000,10000,100000] [--operations 10000]
+        [--only treap.] [--seed 0] [--output results.json] [--baseline Treap/benchmarks/baseline.json]
+        [--tolerance 0.25]
+"""
+import argparse
+import bisect
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Iterable
+
+from Treap.stack import Stack
+from Treap.student_group_maker import GroupMode, StudentGroupMaker
+from Treap.treap import Treap
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_OPERATIONS = 10_000
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# A benchmark takes the size of the structure, the number of operations and a seeded random
+# generator, builds the structure and returns an operation, the argument of each call to it, and
+# optionally a function that is called with the same argument after each call, without being timed,
+# to undo its effects
+Operation = Callable[[object], object]
+Benchmark = Callable[[int, int, random.Random], tuple[Operation, Iterable, Operation | None]]
+
+
+def _keys(size: int, operations: int, rng: random.Random) -> tuple[list[int], list[int]]:
+    """
+    :return: size distinct keys in random order, and operations keys that are not among them
+    """
+    keys = rng.sample(range(0, 2 * (size + operations), 2), size + operations)
+    return keys[:size], [key + 1 for key in keys[size:]]
+
+
+def treap_insert(size, operations, rng):
+    present, absent = _keys(size, operations, rng)
+    treap = Treap.from_iterable(present)
+    return treap.insert, absent, None
+
+
+def treap_search(size, operations, rng):
+    present, _ = _keys(size, 0, rng)
+    treap = Treap.from_iterable(present)
+    return treap.search, [rng.choice(present) for _ in range(operations)], None
+
+
+def treap_delete(size, operations, rng):
+    present, _ = _keys(size, 0, rng)
+    treap = Treap.from_iterable(present)
+    return treap.delete, present[:operations], None
+
+
+def treap_split(size, operations, rng):
+    present, _ = _keys(size, 0, rng)
+    treaps = [Treap.from_iterable(present)]
+
+    def split(key):
+        treaps[:] = treaps[0].split(key)
+
+    def merge(_):
+        treaps[:] = [Treap.merge(*treaps)]
+
+    return split, [rng.choice(present) for _ in range(operations)], merge
+
+
+def treap_merge(size, operations, rng):
+    present, _ = _keys(size, 0, rng)
+    treaps = [Treap.from_iterable(present)]
+
+    def split(key):
+        treaps[:] = treaps[0].split(key)
+
+    def merge(_):
+        treaps[:] = [Treap.merge(*treaps)]
+
+    # Each merge is set up by the split after the previous one
+    split(rng.choice(present))
+    return merge, [rng.choice(present) for _ in range(operations)], split
+
+
+def treap_iterate(size, operations, rng):
+    present, _ = _keys(size, 0, rng)
+    treap = Treap.from_iterable(present)
+    iterators = [iter(treap)]
+
+    def step(_):
+        try:
+            next(iterators[0])
+        except StopIteration:
+            iterators[0] = iter(treap)
+
+    return step, range(operations), None
+
+
+def treap_preorder(size, operations, rng):
+    present, _ = _keys(size, 0, rng)
+    treap = Treap.from_iterable(present)
+    iterators = [treap.preorder()]
+
+    def step(_):
+        try:
+            next(iterators[0])
+        except StopIteration:
+            iterators[0] = treap.preorder()
+
+    return step, range(operations), None
+
+
+def sorted_list_insert(size, operations, rng):
+    present, absent = _keys(size, operations, rng)
+    values = sorted(present)
+    return lambda key: bisect.insort(values, key), absent, None
+
+
+def sorted_list_search(size, operations, rng):
+    present, _ = _keys(size, 0, rng)
+    values = sorted(present)
+
+    def search(key):
+        index = bisect.bisect_left(values, key)
+        return index < len(values) and values[index] == key
+
+    return search, [rng.choice(present) for _ in range(operations)], None
+
+
+def sorted_list_delete(size, operations, rng):
+    present, _ = _keys(size, 0, rng)
+    values = sorted(present)
+
+    def delete(key):
+        index = bisect.bisect_left(values, key)
+        if index < len(values) and values[index] == key:
+            del values[index]
+
+    return delete, present[:operations], None
+
+
+def dict_insert(size, operations, rng):
+    present, absent = _keys(size, operations, rng)
+    values = dict.fromkeys(present)
+    return values.setdefault, absent, None
+
+
+def dict_search(size, operations, rng):
+    present, _ = _keys(size, 0, rng)
+    values = dict.fromkeys(present)
+    return values.get, [rng.choice(present) for _ in range(operations)], None
+
+
+def dict_delete(size, operations, rng):
+    present, _ = _keys(size, 0, rng)
+    values = dict.fromkeys(present)
+    return values.pop, present[:operations], None
+
+
+def stack_push(size, operations, rng):
+    stack = Stack()
+    for element in range(size):
+        stack.push(element)
+    return stack.push, range(operations), None
+
+
+def stack_pop(size, operations, rng):
+    stack = Stack()
+    for element in range(size + operations):
+        stack.push(element)
+    return lambda _: stack.pop(), range(operations), None
+
+
+def group_maker_make_groups(size, operations, rng):
+    """Groups size students 5 at a time in random mode, writing the output to a temporary directory"""
+    # Removed once the operation, which keeps a reference to it, is garbage collected
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, "students.csv")
+    with open(path, "w") as file:
+        file.write("NAME,REG NO\n")
+        for number in rng.sample(range(10 * size), size):
+            file.write(f"Student {number},REG/{number:08d}\n")
+    group_maker = StudentGroupMaker(path)
+
+    def make_groups(_):
+        group_maker.OUTPUT_FILE = os.path.join(directory.name, StudentGroupMaker.OUTPUT_FILE)
+        group_maker.make_groups(5, GroupMode.RANDOM)
+
+    # Each call goes through all the students, so only a few are made
+    return make_groups, range(max(1, min(operations, 5))), None
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    "treap.insert": treap_insert,
+    "treap.search": treap_search,
+    "treap.delete": treap_delete,
+    "treap.split": treap_split,
+    "treap.merge": treap_merge,
+    "treap.iterate": treap_iterate,
+    "treap.preorder": treap_preorder,
+    "sorted_list.insert": sorted_list_insert,
+    "sorted_list.search": sorted_list_search,
+    "sorted_list.delete": sorted_list_delete,
+    "dict.insert": dict_insert,
+    "dict.search": dict_search,
+    "dict.delete": dict_delete,
+    "stack.push": stack_push,
+    "stack.pop": stack_pop,
+    "group_maker.make_groups": group_maker_make_groups,
+}
+
+
+def _percentile(sorted_values: list[int], fraction: float) -> int:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run(name: str, size: int, operations: int, seed: int) -> dict:
+    """Runs one benchmark at one size, and returns its results"""
+    benchmark = BENCHMARKS[name]
+    # Treap priorities and make_groups draw from the random module, so it is seeded as well
+    random.seed(seed)
+    operation, arguments, undo = benchmark(size, operations, random.Random(seed))
+    clock = time.perf_counter_ns
+    latencies = []
+    # As in timeit, so that collections triggered by earlier allocations do not land on random operations
+    gc.disable()
+    try:
+        for argument in arguments:
+            start = clock()
+            operation(argument)
+            latencies.append(clock() - start)
+            if undo is not None:
+                undo(argument)
+    finally:
+        gc.enable()
+    del operation, arguments, undo
+
+    tracemalloc.start()
+    random.seed(seed)
+    operation, arguments, undo = benchmark(size, operations, random.Random(seed))
+    for argument in arguments:
+        operation(argument)
+        if undo is not None:
+            undo(argument)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        "benchmark": name,
+        "size": size,
+        "operations": len(latencies),
+        "ops_per_sec": len(latencies) / (total / 1e9) if total else float("inf"),
+        "p50_ns": _percentile(latencies, 0.5),
+        "p99_ns": _percentile(latencies, 0.99),
+        "peak_bytes": peak,
+    }
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """
+    Compares the median latencies, which unlike the throughput are not thrown off
+    by a few operations being interrupted
+    :return: A description of every benchmark whose speed has dropped below (1 - tolerance)
+            times the baseline
+    """
+    previous = {(result["benchmark"], result["size"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result["benchmark"], result["size"]))
+        if old is None:
+            continue
+        ratio = old["p50_ns"] / result["p50_ns"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{result['benchmark']} at {result['size']}: "
+                               f"p50 {result['p50_ns']:,} ns, {ratio:.0%} of the baseline speed")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated structure sizes, up to 10000000")
+    parser.add_argument("--operations", type=int, default=DEFAULT_OPERATIONS,
+                        help="number of timed operations per benchmark and size")
+    parser.add_argument("--only", default="", help="only run the benchmarks whose name starts with this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    parser.add_argument("--baseline", help=f"JSON results to compare against, e.g. {BASELINE}")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="fraction of the baseline speed, going by the median (p50) latency, "
+                             "that can be lost before failing")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = []
+    for name in BENCHMARKS:
+        if not name.startswith(args.only):
+            continue
+        for size in sizes:
+            result = run(name, size, args.operations, args.seed)
+            results.append(result)
+            print(f"{name:>24} {size:>9}: {result['ops_per_sec']:>12,.0f} ops/sec, "
+                  f"p50 {result['p50_ns']:>9,} ns, p99 {result['p99_ns']:>9,} ns, "
+                  f"peak {result['peak_bytes'] / 2 ** 20:8.1f} MiB")
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "operations": args.operations,
+            "results": results,
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterable
+
+from Treap.treap import Treap
+
+
+class ReadWriteLock:
+    """
+    A lock that can be held by many readers at once, or by a single writer.
+    Waiting writers are preferred over new readers, so that a steady stream
+    of readers cannot starve them
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def reading(self):
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class ConcurrentTreap:
+    """
+    A Treap that can be shared between threads.
+    Reads run concurrently with each other, while every write has the treap to itself.
+    Writes can be batched with apply_batch, which takes the write lock once for all of them.
+
+    Iterating takes the read lock for each step only, so writers are not held up by slow
+    consumers. If the treap is written to in the meantime, the iterator raises a
+    Treap.ConcurrentModificationException instead of returning wrong results.
+    """
+    DuplicateKeyException = Treap.DuplicateKeyException
+    ConcurrentModificationException = Treap.ConcurrentModificationException
+
+    def __init__(self, treap: Treap | None = None):
+        """Wraps treap, or a new empty Treap. The treap should not be used directly afterwards"""
+        self._treap = treap if treap is not None else Treap()
+        self._lock = ReadWriteLock()
+
+    def __len__(self):
+        with self._lock.reading():
+            return len(self._treap)
+
+    def is_empty(self):
+        return len(self) == 0
+
+    def search(self, key):
+        with self._lock.reading():
+            return self._treap.search(key)
+
+    def __contains__(self, key):
+        return self.search(key) is not None
+
+    def min(self):
+        with self._lock.reading():
+            return self._treap.min()
+
+    def max(self):
+        with self._lock.reading():
+            return self._treap.max()
+
+    def kth(self, index: int):
+        with self._lock.reading():
+            return self._treap.kth(index)
+
+    def rank(self, key) -> int:
+        with self._lock.reading():
+            return self._treap.rank(key)
+
+    def floor(self, key):
+        with self._lock.reading():
+            return self._treap.floor(key)
+
+    def ceiling(self, key):
+        with self._lock.reading():
+            return self._treap.ceiling(key)
+
+    def insert(self, key):
+        with self._lock.writing():
+            self._treap.insert(key)
+
+    def delete(self, key):
+        with self._lock.writing():
+            self._treap.delete(key)
+
+    def delete_range(self, lo, hi) -> int:
+        with self._lock.writing():
+            return self._treap.delete_range(lo, hi)
+
+    def apply_batch(self, operations: Iterable[tuple[str, object]]) -> list:
+        """
+        Applies a batch of ("insert", key) and ("delete", key) operations in order,
+        holding the write lock once for the whole batch.
+        A duplicate insert does not stop the batch; the exception is returned in its place
+        :return: A list with, for each operation, None or the DuplicateKeyException it raised
+        :raise: ValueError if an operation is neither "insert" nor "delete", before any is applied
+        """
+        operations = list(operations)
+        for operation, _ in operations:
+            if operation not in ("insert", "delete"):
+                raise ValueError(f"Unknown operation {operation!r}")
+
+        results = []
+        with self._lock.writing():
+            for operation, key in operations:
+                if operation == "insert":
+                    try:
+                        self._treap.insert(key)
+                        results.append(None)
+                    except Treap.DuplicateKeyException as e:
+                        results.append(e)
+                else:
+                    self._treap.delete(key)
+                    results.append(None)
+        return results
+
+    def __iter__(self):
+        with self._lock.reading():
+            iterator = iter(self._treap)
+        while True:
+            with self._lock.reading():
+                try:
+                    key = next(iterator)
+                except StopIteration:
+                    return
+            yield key
+
+    def to_list(self) -> list:
+        """Returns the keys in ascending order, read under a single hold of the read lock"""
+        with self._lock.reading():
+            return list(self._treap)
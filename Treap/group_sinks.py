@@ -0,0 +1,87 @@
+"""
+Destinations for the groups made by StudentGroupMaker.make_groups.
+
+A sink receives rows of (name, registration number, group) in batches of up to BATCH_SIZE rows,
+in the order they are made, so nothing but the current batch has to be held while writing.
+CsvSink and JsonLinesSink write to any text file object, such as an open file or an io.StringIO,
+and ColumnarSink hands every batch over as columns, e.g. to a Parquet or Arrow writer.
+"""
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Iterator, TextIO
+
+# Number of rows handed to a sink at a time
+BATCH_SIZE = 8192
+# Size of the buffer of the files opened from a path
+BUFFER_SIZE = 1 << 20
+HEADER = ("NAME", "REG NO", "GROUP")
+
+Row = tuple[str, str, int]
+
+
+class GroupSink(ABC):
+    @abstractmethod
+    def write_rows(self, rows: list[Row]):
+        """Writes a batch of rows, in the order they are given"""
+
+
+class CsvSink(GroupSink):
+    """Writes the rows as csv, after a header row, quoting the names that need it"""
+
+    def __init__(self, file: TextIO):
+        self._file = file
+        self._writer = csv.writer(file, lineterminator="\n")
+        self._writer.writerow(HEADER)
+
+    def write_rows(self, rows: list[Row]):
+        # Formatting the rows directly is several times faster than the csv module, and gives the same
+        # text unless a field needs quoting, which the number of commas and newlines gives away
+        text = "".join(f"{name},{reg_no},{group}\n" for name, reg_no, group in rows)
+        if text.count(",") == 2 * len(rows) and text.count("\n") == len(rows) and not ('"' in text or "\r" in text):
+            self._file.write(text)
+        else:
+            self._writer.writerows(rows)
+
+
+class JsonLinesSink(GroupSink):
+    """Writes every row as a JSON object with name, reg_no and group, one per line"""
+
+    def __init__(self, file: TextIO):
+        self._file = file
+
+    def write_rows(self, rows: list[Row]):
+        self._file.write("".join(json.dumps({"name": name, "reg_no": reg_no, "group": group}) + "\n"
+                                 for name, reg_no, group in rows))
+
+
+class ColumnarSink(GroupSink):
+    """
+    Calls write_columns with every batch as a dict of the name, reg_no and group columns.
+    For instance, ColumnarSink(lambda columns: writer.write_table(pyarrow.table(columns)))
+    writes one row group per batch with a pyarrow.parquet.ParquetWriter
+    """
+
+    def __init__(self, write_columns: Callable[[dict[str, list]], None]):
+        self._write_columns = write_columns
+
+    def write_rows(self, rows: list[Row]):
+        names, reg_nos, groups = zip(*rows)
+        self._write_columns({"name": list(names), "reg_no": list(reg_nos), "group": list(groups)})
+
+
+@contextmanager
+def open_sink(output: str | os.PathLike | TextIO | GroupSink) -> Iterator[GroupSink]:
+    """
+    Yields output if it is a sink, a CsvSink writing to output if it is a file object,
+    or a CsvSink writing to the file at path output otherwise, which is closed afterwards
+    """
+    if isinstance(output, GroupSink):
+        yield output
+    elif hasattr(output, "write"):
+        yield CsvSink(output)
+    else:
+        with open(output, "w", newline="", buffering=BUFFER_SIZE) as file:
+            yield CsvSink(file)
@@ -0,0 +1,200 @@
+from typing import Iterable, Self
+
+from Treap.treap import Treap, TreapNode
+
+
+class ImplicitTreapNode(TreapNode):
+    """
+    A TreapNode whose key is an element of a sequence.
+    Elements are ordered by their position, which is never stored but given by subtree sizes
+    """
+    __slots__ = ("reversed",)
+
+    def __init__(self, value):
+        super().__init__(value)
+        # Whether the subtree rooted at this node still has to be reversed.
+        # Reversal is applied lazily, one level at a time, by _SequenceTreap._visit
+        self.reversed = False
+
+
+class _SequenceTreap(Treap):
+    """
+    Splits and merges the nodes of ImplicitTreaps with the algorithms of Treap,
+    pushing pending reversals down to the children of every node they walk through
+    """
+
+    @staticmethod
+    def _visit(node: ImplicitTreapNode) -> ImplicitTreapNode:
+        """Applies the pending reversal of node to its children, deferring the rest to them"""
+        if node.reversed:
+            node.left, node.right = node.right, node.left
+            if node.left is not None:
+                node.left.reversed = not node.left.reversed
+            if node.right is not None:
+                node.right.reversed = not node.right.reversed
+            node.reversed = False
+        return node
+
+
+class ImplicitTreap:
+    """
+    A sequence stored in an implicit-key treap.
+    Inserting, removing and indexing at any position, as well as concatenating and
+    reversing ranges, take O(log n) expected time, where a list would take O(n).
+
+    Splitting and merging are done by Treap._split_at and Treap._merge, which split by
+    position, and push the pending reversal of every node they walk through to its children.
+    """
+    # Only the split and merge of this treap are used, on the roots of ImplicitTreaps
+    _engine = _SequenceTreap()
+
+    def __init__(self, values: Iterable = ()):
+        """Creates a new ImplicitTreap holding values, in O(n)"""
+        self.root = self._build(values)
+
+    def __len__(self):
+        return Treap._node_size(self.root)
+
+    def is_empty(self):
+        return self.root is None
+
+    @staticmethod
+    def _build(values: Iterable) -> ImplicitTreapNode | None:
+        """Builds a treap from values in order as a Cartesian tree, as in Treap._build_sorted"""
+        spine: list[ImplicitTreapNode] = []
+        for value in values:
+            node = ImplicitTreapNode(value)
+            last_popped = None
+            while spine and spine[-1].priority < node.priority:
+                last_popped = spine.pop()
+                Treap._update(last_popped)
+            node.left = last_popped
+            if spine:
+                spine[-1].right = node
+            spine.append(node)
+
+        while len(spine) > 1:
+            Treap._update(spine.pop())
+        if not spine:
+            return None
+        Treap._update(spine[0])
+        return spine[0]
+
+    def _split(self, root: ImplicitTreapNode | None, index: int):
+        """
+        Splits the treap rooted at root into its first index elements and the rest
+        :return: A tuple with the roots of the two treaps
+        """
+        return self._engine._split_at(root, index)
+
+    def _merge(self, left_root: ImplicitTreapNode | None, right_root: ImplicitTreapNode | None):
+        """
+        Concatenates the sequences rooted at left_root and right_root
+        :return: The root of the merged treap
+        """
+        return self._engine._merge(left_root, right_root)
+
+    def _normalize_index(self, index: int) -> int:
+        """Turns a negative index into a positive one, as lists do
+        :raise: IndexError if index is out of range
+        """
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("ImplicitTreap index out of range")
+        return index
+
+    def insert_at(self, index: int, value):
+        """Inserts value before position index. Like list.insert, index is clamped to the sequence"""
+        length = len(self)
+        if index < 0:
+            index = max(0, index + length)
+        index = min(index, length)
+
+        left, right = self._split(self.root, index)
+        self.root = self._merge(self._merge(left, ImplicitTreapNode(value)), right)
+
+    def append(self, value):
+        self.insert_at(len(self), value)
+
+    def pop_at(self, index: int = -1):
+        """
+        Removes and returns the element at position index, the last one by default
+        :raise: IndexError if the sequence is empty or index is out of range
+        """
+        index = self._normalize_index(index)
+        left, rest = self._split(self.root, index)
+        node, right = self._split(rest, 1)
+        self.root = self._merge(left, right)
+        return node.key
+
+    def __getitem__(self, index: int | slice):
+        """
+        Returns the element at position index in O(log n).
+        A slice returns a new ImplicitTreap holding a copy of its elements, in O(log n + k)
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return ImplicitTreap(self[i] for i in range(start, stop, step))
+            if start >= stop:
+                return ImplicitTreap()
+            left, rest = self._split(self.root, start)
+            middle, right = self._split(rest, stop - start)
+            copy = ImplicitTreap(self._iterate(middle))
+            self.root = self._merge(self._merge(left, middle), right)
+            return copy
+
+        index = self._normalize_index(index)
+        node = self.root
+        while True:
+            self._engine._visit(node)
+            left_size = Treap._node_size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index > left_size:
+                index -= left_size + 1
+                node = node.right
+            else:
+                return node.key
+
+    def concat(self, other: Self):
+        """
+        Appends the elements of other to this sequence in O(log n).
+        Like Treap.merge, this reuses the nodes of other, which is left empty
+        """
+        if other is self:
+            raise ValueError("Cannot concatenate an ImplicitTreap with itself")
+        self.root = self._merge(self.root, other.root)
+        other.root = None
+
+    def reverse(self, i: int = 0, j: int | None = None):
+        """Reverses the elements in positions [i, j) in O(log n), the whole sequence by default"""
+        start, stop, _ = slice(i, j).indices(len(self))
+        if start >= stop:
+            return
+        left, rest = self._split(self.root, start)
+        middle, right = self._split(rest, stop - start)
+        middle.reversed = not middle.reversed
+        self.root = self._merge(self._merge(left, middle), right)
+
+    @classmethod
+    def _iterate(cls, root: ImplicitTreapNode | None):
+        """Yields the elements of the treap rooted at root in order"""
+        stack: list[ImplicitTreapNode] = []
+        node = root
+        while stack or node is not None:
+            while node is not None:
+                cls._engine._visit(node)
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key
+            node = node.right
+
+    def __iter__(self):
+        return self._iterate(self.root)
+
+    def __repr__(self):
+        return f"ImplicitTreap({list(self)!r})"
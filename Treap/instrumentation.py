@@ -0,0 +1,211 @@
+import time
+from collections import Counter
+from typing import Callable, Self
+
+from Treap.treap import TraversalOrder, Treap, TreapNode
+
+# Called after every operation with its name, its duration in nanoseconds,
+# and the number of key comparisons and node visits it took
+Hook = Callable[[str, int, int, int], None]
+
+# The Instrumentation of the operation in progress, if any, which the nodes report to
+_recording: "Instrumentation | None" = None
+
+
+class Instrumentation:
+    """
+    Counters shared by an InstrumentedTreap and the treaps split from or merged into it
+    """
+
+    def __init__(self):
+        self.hooks: list[Hook] = []
+        self.reset()
+
+    def reset(self):
+        # Accumulated by the operation in progress
+        self.comparisons = 0
+        self.visits = 0
+        # Last node visited, so that looking at the same node several times in a row is one visit
+        self._last: TreapNode | None = None
+        # Number of nodes walked by the split or merge in progress
+        self._walked = 0
+        # Number of calls, comparisons and node visits of every operation
+        self.totals: dict[str, list[int]] = {}
+        # For every operation, how many of its calls visited a given number of nodes
+        self.visit_histograms: dict[str, Counter] = {}
+        # How many splits and merges, including those done within other operations, went a given depth
+        self.split_depths = Counter()
+        self.merge_depths = Counter()
+
+    def visit(self, node: TreapNode):
+        if node is not self._last:
+            self.visits += 1
+            self._last = node
+
+    def start(self):
+        self.comparisons = self.visits = 0
+        self._last = None
+
+    def record(self, operation: str, elapsed: int):
+        comparisons, visits = self.comparisons, self.visits
+        self.comparisons = self.visits = 0
+        self._last = None
+        totals = self.totals.setdefault(operation, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += comparisons
+        totals[2] += visits
+        self.visit_histograms.setdefault(operation, Counter())[visits] += 1
+        for hook in self.hooks:
+            hook(operation, elapsed, comparisons, visits)
+
+    def snapshot(self) -> dict:
+        return {
+            "operations": {
+                operation: {
+                    "calls": calls,
+                    "comparisons": comparisons,
+                    "node_visits": visits,
+                    "visits_per_call": visits / calls,
+                    "visit_histogram": dict(sorted(self.visit_histograms[operation].items())),
+                }
+                for operation, (calls, comparisons, visits) in self.totals.items()
+            },
+            "split_depths": dict(sorted(self.split_depths.items())),
+            "merge_depths": dict(sorted(self.merge_depths.items())),
+        }
+
+
+class InstrumentedTreapNode(TreapNode):
+    """
+    A TreapNode that counts the reads of its key during an instrumented operation.
+    Within those operations, Treap only reads the key of a node to compare it with another key,
+    so every read is counted as a comparison, and as a visit of the node unless it was the
+    last node visited
+    """
+    # The key is still kept in the slot of TreapNode, which the property hides
+    __slots__ = ()
+    _key = TreapNode.key
+
+    @property
+    def key(self):
+        if _recording is not None:
+            _recording.comparisons += 1
+            _recording.visit(self)
+        return self._key
+
+    @key.setter
+    def key(self, key):
+        self._key = key
+
+
+class InstrumentedTreap(Treap):
+    """
+    A Treap that counts the key comparisons and node visits of insert, delete, search,
+    split, merge and delete_range, and the depth of every split and merge they do.
+    stats() returns a snapshot of the counts, and hooks added with add_hook are called
+    after every operation, e.g. to feed a profiler or a metrics exporter.
+
+    The operations are those of Treap. Its nodes are InstrumentedTreapNodes, which count
+    the comparisons with their keys, and its _visit hook counts the nodes walked by every split
+    and merge, so a plain Treap pays nothing for the instrumentation.
+    Given the root of a Treap, InstrumentedTreap turns its nodes into InstrumentedTreapNodes
+    in O(n) and instruments it. The Treap should not be used directly afterwards.
+    """
+    _node_class = InstrumentedTreapNode
+
+    def __init__(self, root: TreapNode | None = None, instrumentation: Instrumentation | None = None):
+        super().__init__(self._instrument(root))
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+
+    @staticmethod
+    def _instrument(root: TreapNode | None) -> TreapNode | None:
+        """Turns the TreapNodes of the treap rooted at root into InstrumentedTreapNodes, in place"""
+        if root is None or isinstance(root, InstrumentedTreapNode):
+            return root
+        for node in Treap._traverse_nodes(root, TraversalOrder.PREORDER):
+            # Both classes have the same slots, so the key stays where it is
+            node.__class__ = InstrumentedTreapNode
+        return root
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the counts since the treap was created or reset_stats was called:
+        for every operation, its number of calls, comparisons and node visits, along with a
+        histogram of the node visits per call, and histograms of the depths of splits and merges
+        """
+        return self.instrumentation.snapshot()
+
+    def reset_stats(self):
+        self.instrumentation.reset()
+
+    def add_hook(self, hook: Hook):
+        """Registers hook(operation, elapsed_ns, comparisons, node_visits), called after every operation"""
+        self.instrumentation.hooks.append(hook)
+
+    def remove_hook(self, hook: Hook):
+        self.instrumentation.hooks.remove(hook)
+
+    def _timed(self, operation: str, function: Callable, *args):
+        """Runs function(*args) as operation, recording its counts even if it raises"""
+        global _recording
+        instrumentation = self.instrumentation
+        previous, _recording = _recording, instrumentation
+        instrumentation.start()
+        start = time.perf_counter_ns() if instrumentation.hooks else 0
+        try:
+            return function(*args)
+        finally:
+            elapsed = time.perf_counter_ns() - start if instrumentation.hooks else 0
+            _recording = previous
+            instrumentation.record(operation, elapsed)
+
+    def _visit(self, node: TreapNode) -> TreapNode:
+        """Counts the nodes walked by splits and merges"""
+        instrumentation = self.instrumentation
+        instrumentation._walked += 1
+        if _recording is instrumentation:
+            instrumentation.visit(node)
+        return node
+
+    def _split_by(self, root, goes_right):
+        instrumentation = self.instrumentation
+        walked = instrumentation._walked
+        result = super()._split_by(root, goes_right)
+        instrumentation.split_depths[instrumentation._walked - walked] += 1
+        return result
+
+    def _merge(self, left_root, right_root):
+        instrumentation = self.instrumentation
+        walked = instrumentation._walked
+        result = super()._merge(left_root, right_root)
+        instrumentation.merge_depths[instrumentation._walked - walked] += 1
+        return result
+
+    def insert(self, key):
+        self._timed("insert", super().insert, key)
+
+    def delete(self, key):
+        self._timed("delete", super().delete, key)
+
+    def search(self, key):
+        return self._timed("search", super().search, key)
+
+    def delete_range(self, lo, hi) -> int:
+        return self._timed("delete_range", super().delete_range, lo, hi)
+
+    def split(self, key) -> tuple[Self, Self]:
+        return self._timed("split", super().split, key)
+
+    @classmethod
+    def merge(cls, left_treap: Self, right_treap: Self) -> Self:
+        """Merges two InstrumentedTreaps, recording the merge in the instrumentation of left_treap"""
+        return left_treap._timed("merge", super().merge, left_treap, right_treap)
+
+    def _derive(self, root) -> Self:
+        """The treaps split from or merged into this one share its instrumentation"""
+        return type(self)(root, self.instrumentation)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> Self:
+        """Loads a treap saved with save, building all of its nodes"""
+        return InstrumentedTreap(Treap.load(path, mmap).root)
@@ -32,12 +32,13 @@ def main():
         print("1. Random")
         print("2. Ascending")
         print("3. Descending")
+        print("4. Shuffled")
 
         group_mode_input = int(input("Enter group mode: "))
-        if 1 <= group_mode_input <= 3:
+        if 1 <= group_mode_input <= 4:
             group_mode = GroupMode(group_mode_input)
         else:
-            print("Invalid choice. Please choose 1, 2 or 3 for group mode")
+            print("Invalid choice. Please choose 1, 2, 3 or 4 for group mode")
             exit(5)
 
     except ValueError:
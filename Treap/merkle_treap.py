@@ -0,0 +1,169 @@
+from hashlib import blake2b
+from typing import Self
+
+from Treap.treap import Treap, TreapNode
+
+DIGEST_SIZE = 16
+# Digest standing in for a missing child
+EMPTY_DIGEST = bytes(DIGEST_SIZE)
+
+
+def key_digest(key) -> bytes:
+    """
+    Hashes a key from its repr, which is the same in every process, unlike hash().
+    Keys whose repr does not identify their value need a class with a suitable __repr__
+    """
+    return blake2b(repr(key).encode(), digest_size=DIGEST_SIZE).digest()
+
+
+class MerkleTreapNode(TreapNode):
+    __slots__ = ("key_digest", "digest")
+
+    def __init__(self, key):
+        super().__init__(key)
+        self.key_digest = key_digest(key)
+        # The priority is taken from the hash of the key, so that the same keys always
+        # make the same treap. 128 bits make a tie between two priorities negligible
+        self.priority = int.from_bytes(self.key_digest)
+        # Hash of the keys in the subtree rooted at this node, along with its shape
+        self.digest = self.key_digest
+
+
+class MerkleTreap(Treap):
+    """
+    A Treap whose priorities are derived from a hash of the keys instead of drawn at random.
+    The shape of a treap is fully determined by its keys and their priorities, so any two
+    MerkleTreaps holding the same keys have the same shape, however they were built.
+
+    Every node also keeps a digest of its subtree, computed from its key and the digests of
+    its children, as in a Merkle tree. Two treaps are therefore equal exactly when their root
+    digests are, which == checks in O(1), and diff(other) skips every subtree the two have in common.
+
+    The set operations take two MerkleTreaps, and raise a TypeError given any other treap.
+    A Finger rehashes the path it remembers after every insertion. Priorities follow from the
+    keys, so snapshots only need the keys to rebuild the same treap, and the parallel operations
+    sort the keys in worker processes and hash them while building the result.
+    """
+    _node_class = MerkleTreapNode
+
+    class Finger(Treap.Finger):
+        def insert(self, key):
+            """Same as Treap.Finger.insert, followed by recomputing the digests on the path to key"""
+            super().insert(key)
+            # The path runs from the root down to the new node
+            for node, _, _ in reversed(self._path):
+                self._treap._update(node)
+
+    @classmethod
+    def _update(cls, node: MerkleTreapNode):
+        left, right = node.left, node.right
+        node.size = 1 + cls._node_size(left) + cls._node_size(right)
+        hasher = blake2b(digest_size=DIGEST_SIZE)
+        hasher.update(left.digest if left is not None else EMPTY_DIGEST)
+        hasher.update(node.key_digest)
+        hasher.update(right.digest if right is not None else EMPTY_DIGEST)
+        node.digest = hasher.digest()
+
+    def digest(self) -> bytes:
+        """Returns the digest of the whole treap, which is the same for any treap with the same keys"""
+        return self.root.digest if self.root is not None else EMPTY_DIGEST
+
+    def __eq__(self, other):
+        if not isinstance(other, MerkleTreap):
+            return NotImplemented
+        return self.digest() == other.digest()
+
+    # Treaps are mutable, so they cannot be hashed even though they can be compared
+    __hash__ = None
+
+    def diff(self, other: Self) -> tuple[list, list]:
+        """
+        Compares this treap with other, skipping the subtrees they have in common.
+        Takes O(d log² n) time for d differing keys, neither treap being modified
+        :return: A tuple with the keys only in this treap and the keys only in other, in ascending order
+        """
+        only_self, only_other = [], []
+        self._diff(self.root, other.root, only_self, only_other)
+        return only_self, only_other
+
+    @classmethod
+    def _diff(cls, root, other, only_root: list, only_other: list):
+        if root is None and other is None:
+            return
+        if root is None:
+            only_other.extend(Treap._TreapIterator(other))
+            return
+        if other is None:
+            only_root.extend(Treap._TreapIterator(root))
+            return
+        if root.digest == other.digest:
+            return
+        if root.priority < other.priority:
+            root, other, only_root, only_other = other, root, only_other, only_root
+
+        if root.key == other.key:
+            cls._diff(root.left, other.left, only_root, only_other)
+            cls._diff(root.right, other.right, only_root, only_other)
+            return
+
+        # Both halves of the split are canonical, so they share their untouched subtrees
+        # with root.left and root.right whenever these hold the same keys
+        lesser, equal, greater = _copying_treap._split_exact(other, root.key)
+        cls._diff(root.left, lesser, only_root, only_other)
+        if equal is None:
+            only_root.append(root.key)
+        cls._diff(root.right, greater, only_root, only_other)
+
+    def _rehash_path(self, root, key):
+        """Recomputes the nodes on the search path for key, whose children may have changed"""
+        path: list[MerkleTreapNode] = []
+        node = root
+        while node is not None:
+            path.append(node)
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                break
+        for node in reversed(path):
+            self._update(node)
+
+    def _insert_node(self, root, new_node: MerkleTreapNode):
+        """Version of Treap._insert_node that also recomputes the digests above the new node"""
+        root = super()._insert_node(root, new_node)
+        self._rehash_path(root, new_node.key)
+        return root
+
+    def _delete(self, root, key):
+        """Version of Treap._delete that also recomputes the digests above the deleted node"""
+        root = super()._delete(root, key)
+        self._rehash_path(root, key)
+        return root
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> Self:
+        """
+        Loads a MerkleTreap saved with save.
+        The priorities are derived from the keys again, so the keys are read from the
+        snapshot in order and built into the same treap in O(n)
+        :raise: SnapshotFormatException if the file is not a snapshot
+        """
+        return cls.from_sorted(Treap.load(path, mmap))
+
+
+class _CopyingMerkleTreap(MerkleTreap):
+    """A MerkleTreap whose splits copy the O(log n) nodes they walk, leaving the treap they split untouched"""
+
+    @staticmethod
+    def _visit(node: MerkleTreapNode) -> MerkleTreapNode:
+        """Returns a shallow copy of node, sharing its children, for _split_by to relink"""
+        clone = object.__new__(MerkleTreapNode)
+        clone.key, clone.priority, clone.size = node.key, node.priority, node.size
+        clone.left, clone.right = node.left, node.right
+        clone.key_digest, clone.digest = node.key_digest, node.digest
+        return clone
+
+
+# Splits the treaps compared by MerkleTreap.diff
+_copying_treap = _CopyingMerkleTreap()
@@ -0,0 +1,270 @@
+from itertools import groupby, repeat
+from typing import Iterable, Self
+
+from Treap.treap import Treap, TreapNode
+
+
+class MultisetTreapNode(TreapNode):
+    __slots__ = ("count",)
+
+    def __init__(self, key, count: int = 1):
+        super().__init__(key)
+        # Number of occurrences of key
+        self.count = count
+        # The size of a subtree is the number of occurrences of the keys in it
+        self.size = count
+
+
+class _CountingTreap(Treap):
+    """
+    The Treap holding the nodes of a MultisetTreap, whose subtree sizes count occurrences.
+    Inserting a key that is present increments its count, and kth and rank weight every node
+    by its count, so the order statistics of Treap treat it as the list of all occurrences
+    """
+
+    @classmethod
+    def _update(cls, node: MultisetTreapNode):
+        node.size = node.count + cls._node_size(node.left) + cls._node_size(node.right)
+
+    def _path_to(self, root, key) -> tuple[list[MultisetTreapNode], MultisetTreapNode | None]:
+        """:return: The nodes above the node with key, and that node, or None if key is not present"""
+        path: list[MultisetTreapNode] = []
+        node = root
+        while node is not None:
+            if key < node.key:
+                path.append(node)
+                node = node.left
+            elif key > node.key:
+                path.append(node)
+                node = node.right
+            else:
+                return path, node
+        return path, None
+
+    def _insert(self, root, key):
+        path, node = self._path_to(root, key)
+        if node is None:
+            return self._insert_node(root, MultisetTreapNode(key))
+        node.count += 1
+        node.size += 1
+        for ancestor in path:
+            ancestor.size += 1
+        return root
+
+    def kth(self, index: int):
+        """Returns the key at position index (0-based) in the sorted list of all occurrences"""
+        if not 0 <= index < len(self):
+            raise IndexError("Treap index out of range")
+
+        node = self.root
+        while True:
+            left_size = self._node_size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index >= left_size + node.count:
+                index -= left_size + node.count
+                node = node.right
+            else:
+                return node.key
+
+    def rank(self, key) -> int:
+        """Returns the number of occurrences of keys that are strictly less than key"""
+        rank = 0
+        node = self.root
+        while node is not None:
+            if node.key < key:
+                rank += self._node_size(node.left) + node.count
+                node = node.right
+            else:
+                node = node.left
+        return rank
+
+
+class MultisetTreap:
+    """
+    A treap that holds every key any number of times.
+    Each distinct key has a single node with a count of its occurrences, so inserting a
+    key that is already present increments its count instead of allocating a node,
+    and memory grows with the number of distinct keys only.
+
+    Subtree sizes count occurrences, so len, kth, rank, count_range and median
+    treat the multiset as the sorted list of all its occurrences.
+    Iterating and iter_range yield each key as many times as it occurs, and items()
+    yields every distinct key with its count.
+
+    delete removes all the occurrences of a key. The nodes are held by a Treap, which
+    answers the queries, but the operations of Treap that see every key once, such as its
+    traversals, cursors and set operations, are not offered.
+    """
+    DuplicateKeyException = Treap.DuplicateKeyException
+    ConcurrentModificationException = Treap.ConcurrentModificationException
+
+    def __init__(self, root: MultisetTreapNode | None = None):
+        """
+        Creates a new MultisetTreap.
+
+        The root parameter is used by the split and merge methods to create a new
+        MultisetTreap from a given root node. It is not to be filled in by client code
+        """
+        self._treap = _CountingTreap(root)
+
+    @property
+    def root(self) -> MultisetTreapNode | None:
+        return self._treap.root
+
+    def __len__(self):
+        return len(self._treap)
+
+    def size(self):
+        return len(self._treap)
+
+    def is_empty(self):
+        return self._treap.is_empty()
+
+    def insert(self, key):
+        """Adds an occurrence of key"""
+        self._treap.insert(key)
+
+    def count(self, key) -> int:
+        """Returns the number of occurrences of key, in O(log n)"""
+        node = self._treap.search(key)
+        return node.count if node is not None else 0
+
+    def __contains__(self, key):
+        return self._treap.search(key) is not None
+
+    def remove_one(self, key) -> int:
+        """
+        Removes one occurrence of key, if any
+        :return: The number of occurrences of key left
+        """
+        treap = self._treap
+        path, node = treap._path_to(treap.root, key)
+        if node is None:
+            return 0
+        if node.count == 1:
+            self.remove_all(key)
+            return 0
+        node.count -= 1
+        node.size -= 1
+        for ancestor in path:
+            ancestor.size -= 1
+        # The key is still present, so the cached min and max are unchanged
+        treap._size -= 1
+        treap._version += 1
+        return node.count
+
+    def remove_all(self, key) -> int:
+        """
+        Removes all the occurrences of key
+        :return: The number of occurrences removed
+        """
+        treap = self._treap
+        path, node = treap._path_to(treap.root, key)
+        if node is None:
+            return 0
+
+        replacement = treap._merge(node.left, node.right)
+        if not path:
+            treap.root = replacement
+        elif path[-1].left is node:
+            path[-1].left = replacement
+        else:
+            path[-1].right = replacement
+        for ancestor in path:
+            ancestor.size -= node.count
+        treap._deleted(key)
+        return node.count
+
+    def delete(self, key):
+        """Same as remove_all"""
+        self.remove_all(key)
+
+    def delete_range(self, lo, hi) -> int:
+        """
+        Deletes every occurrence of the keys k such that lo <= k < hi, in O(log n)
+        :return: The number of occurrences deleted
+        """
+        return self._treap.delete_range(lo, hi)
+
+    def search(self, key) -> MultisetTreapNode | None:
+        """Returns the node of key, whose count is its number of occurrences, or None"""
+        return self._treap.search(key)
+
+    def min(self) -> MultisetTreapNode | None:
+        return self._treap.min()
+
+    def max(self) -> MultisetTreapNode | None:
+        return self._treap.max()
+
+    def floor(self, key):
+        return self._treap.floor(key)
+
+    def ceiling(self, key):
+        return self._treap.ceiling(key)
+
+    def predecessor(self, key):
+        return self._treap.predecessor(key)
+
+    def successor(self, key):
+        return self._treap.successor(key)
+
+    def kth(self, index: int):
+        """Returns the key at position index (0-based) in the sorted list of all occurrences"""
+        return self._treap.kth(index)
+
+    def rank(self, key) -> int:
+        """Returns the number of occurrences of keys that are strictly less than key"""
+        return self._treap.rank(key)
+
+    def count_range(self, lo, hi) -> int:
+        """Returns the number of occurrences of the keys k such that lo <= k < hi"""
+        return self._treap.count_range(lo, hi)
+
+    def median(self):
+        """Returns the lower median of all the occurrences, or None if the multiset is empty"""
+        return self._treap.median()
+
+    def items(self):
+        """Yields every distinct key with its number of occurrences, in ascending order"""
+        return ((node.key, node.count) for node in self._treap._iter_range_nodes(None, None, False))
+
+    def iter_range(self, lo=None, hi=None, reverse: bool = False):
+        """Lazily yields every occurrence of the keys k such that lo <= k < hi, as Treap.iter_range does"""
+        for node in self._treap._iter_range_nodes(lo, hi, reverse):
+            yield from repeat(node.key, node.count)
+
+    def __iter__(self):
+        treap = self._treap
+        version = treap._version
+        for node in treap._iter_range_nodes(None, None, False):
+            for _ in range(node.count):
+                if version != treap._version:
+                    raise self.ConcurrentModificationException("Treap modified during iteration")
+                yield node.key
+
+    def split(self, key) -> tuple[Self, Self]:
+        left, right = self._treap._split(self.root, key)
+        return MultisetTreap(left), MultisetTreap(right)
+
+    @classmethod
+    def merge(cls, left_treap: Self, right_treap: Self) -> Self:
+        return MultisetTreap(left_treap._treap._merge(left_treap.root, right_treap.root))
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable) -> Self:
+        """Builds a MultisetTreap in O(n) from keys given in ascending order, repeated keys included"""
+        counts = []
+
+        def distinct_keys():
+            for key, occurrences in groupby(keys):
+                counts.append(sum(1 for _ in occurrences))
+                yield key
+
+        # Each node is made right after its key has been counted
+        return MultisetTreap(_CountingTreap._build_sorted(distinct_keys(),
+                                                          lambda key: MultisetTreapNode(key, counts[-1])))
+
+    @classmethod
+    def from_iterable(cls, keys: Iterable) -> Self:
+        return cls.from_sorted(sorted(keys))
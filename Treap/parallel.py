@@ -0,0 +1,193 @@
+"""
+Process-parallel construction and union of treaps.
+
+The work is split by key range. Splitters are chosen from a sample of the keys (or by rank,
+for existing treaps), worker processes sort the keys of each range and build the shape of
+its treap, and the pieces come back as CompactTreaps. The parent turns each piece into
+TreapNodes and joins it to the result with Treap._merge, in key order, which is valid
+because the ranges do not overlap.
+
+Treaps with their own kind of node, such as MerkleTreaps, choose their own priorities, so the
+workers only sort the keys of every range, and the parent builds the nodes from them in O(n).
+"""
+import os
+import random
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Iterable, NamedTuple
+
+from Treap.treap import Treap, TreapNode
+
+# Below this many keys, starting processes and pickling the keys costs more than it saves
+PARALLEL_THRESHOLD = 100_000
+_SAMPLES_PER_WORKER = 32
+
+
+class CompactTreap(NamedTuple):
+    """
+    A treap laid out in flat arrays, which is cheap to pickle between processes.
+    Node i holds keys[i], which are in ascending order, and -1 stands for a missing child
+    """
+    keys: list
+    priorities: array
+    left: array
+    right: array
+    sizes: array
+    root: int
+
+
+def parallel_from_iterable(keys: Iterable, workers: int | None = None, cls: type[Treap] = Treap) -> Treap:
+    """
+    Builds a treap of class cls from keys in any order using a pool of worker processes.
+    Falls back to cls.from_iterable for a single worker or few keys
+    :raise: DuplicateKeyException if a key is repeated
+    """
+    keys = list(keys)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(keys) < PARALLEL_THRESHOLD:
+        return cls.from_iterable(keys)
+
+    sample = sorted(random.sample(keys, min(len(keys), workers * _SAMPLES_PER_WORKER)))
+    splitters = [sample[i * len(sample) // workers] for i in range(1, workers)]
+
+    step = -(-len(keys) // workers)
+    slices = [keys[i:i + step] for i in range(0, len(keys), step)]
+    with ProcessPoolExecutor(workers) as executor:
+        runs = list(executor.map(_sort_and_cut, slices, [splitters] * len(slices)))
+        ranges = [[run[i] for run in runs] for i in range(len(splitters) + 1)]
+        if cls._node_class is not TreapNode:
+            return cls.from_sorted(chain.from_iterable(executor.map(_merge_runs, ranges)))
+        # Pieces are materialised in key order while the later ranges are still being built
+        root = None
+        join = Treap()._merge
+        for piece in executor.map(_build_range, ranges):
+            root = join(root, materialize(piece))
+
+    return cls(root)
+
+
+def parallel_union(treap: Treap, other: Treap, workers: int | None = None) -> Treap:
+    """
+    Returns a Treap with the keys that are in either treap, building each key range
+    in a worker process. Falls back to Treap.union for a single worker or small treaps.
+    Of two equal keys, the one from treap is kept, unlike in Treap.union.
+    Like Treap.union, both treaps are left empty
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or min(len(treap), len(other)) < PARALLEL_THRESHOLD:
+        return treap.union(other)
+
+    # The ranks give evenly sized ranges without sampling
+    splitters = [treap.kth(i * len(treap) // workers) for i in range(1, workers)]
+    # The operands are only read here, and emptied once the result is complete,
+    # so they are left as they were if a worker fails
+    ranges = zip(_cut(list(treap), splitters), _cut(list(other), splitters))
+    with ProcessPoolExecutor(workers) as executor:
+        if treap._node_class is not TreapNode:
+            keys = chain.from_iterable(executor.map(_union_keys, *zip(*ranges)))
+            root = type(treap)._build_sorted(keys, treap._node_class)
+        else:
+            root = None
+            join = Treap()._merge
+            for piece in executor.map(_union_range, *zip(*ranges)):
+                root = join(root, materialize(piece))
+
+    for operand in (treap, other):
+        operand.root = None
+        operand._modified()
+    return treap._derive(root)
+
+
+def materialize(piece: CompactTreap) -> TreapNode | None:
+    """:return: The root of TreapNodes with the same keys, priorities and shape as piece"""
+    nodes = [TreapNode(key) for key in piece.keys]
+    for node, priority, left, right, size in zip(nodes, piece.priorities, piece.left, piece.right, piece.sizes):
+        node.priority = priority
+        node.size = size
+        if left >= 0:
+            node.left = nodes[left]
+        if right >= 0:
+            node.right = nodes[right]
+    return nodes[piece.root] if nodes else None
+
+
+def compact_from_sorted(keys: list) -> CompactTreap:
+    """
+    Lays out a treap for keys in ascending order using the same
+    stack-based Cartesian tree build as Treap._build_sorted
+    :raise: DuplicateKeyException if a key is repeated
+    """
+    length = len(keys)
+    # A fresh generator, since forked workers would otherwise share the parent's random state
+    generator = random.Random()
+    priorities = array("d", [generator.random() for _ in range(length)])
+    left = array("i", [-1]) * length
+    right = array("i", [-1]) * length
+    sizes = array("i", [1]) * length
+
+    def finish(index: int):
+        sizes[index] = 1 + (sizes[left[index]] if left[index] >= 0 else 0) \
+                         + (sizes[right[index]] if right[index] >= 0 else 0)
+
+    spine: list[int] = []
+    for i in range(length):
+        if i > 0 and not keys[i - 1] < keys[i]:
+            raise Treap.DuplicateKeyException('No duplicates allowed', keys[i], keys[i - 1])
+
+        last_popped = -1
+        while spine and priorities[spine[-1]] < priorities[i]:
+            last_popped = spine.pop()
+            finish(last_popped)
+        left[i] = last_popped
+        if spine:
+            right[spine[-1]] = i
+        spine.append(i)
+
+    # The bottom of the right spine has the highest priority, which makes it the root
+    root = spine[0] if spine else -1
+    while spine:
+        finish(spine.pop())
+
+    return CompactTreap(keys, priorities, left, right, sizes, root)
+
+
+def _sort_and_cut(keys: list, splitters: list) -> list[list]:
+    """Worker: sorts keys and cuts them into one run per key range"""
+    keys.sort()
+    return _cut(keys, splitters)
+
+
+def _cut(keys: list, splitters: list) -> list[list]:
+    """Cuts the ascending keys at each of the ascending splitters, returning the keys of every range"""
+    bounds = [0] + [bisect_right(keys, splitter) for splitter in splitters] + [len(keys)]
+    return [keys[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+
+def _merge_runs(runs: list[list]) -> list:
+    """Worker: merges the sorted runs of one key range"""
+    # Sorting the concatenated runs lets the sort merge them, as it detects runs
+    return sorted(chain.from_iterable(runs))
+
+
+def _build_range(runs: list[list]) -> CompactTreap:
+    """Worker: merges the sorted runs of one key range into a compact treap"""
+    return compact_from_sorted(_merge_runs(runs))
+
+
+def _union_range(keys: list, other_keys: list) -> CompactTreap:
+    """Worker: builds a compact treap from the union of two sorted lists of keys"""
+    return compact_from_sorted(_union_keys(keys, other_keys))
+
+
+def _union_keys(keys: list, other_keys: list) -> list:
+    """Worker: merges two sorted lists of keys, keeping one of every two equal keys"""
+    merged = sorted(chain(keys, other_keys))
+    # The sort is stable, so of two equal keys the one from keys is kept. Treap.union keeps the one
+    # whose node has the higher priority instead, which can come from either treap
+    unique = []
+    for key in merged:
+        if not unique or unique[-1] < key:
+            unique.append(key)
+    return unique
@@ -0,0 +1,227 @@
+from typing import Iterable, Self
+
+from Treap.treap import Treap, TraversalOrder, TreapNode
+
+
+class _PathCopyingTreap(Treap):
+    """
+    A Treap whose insertions, deletions, splits and merges copy the nodes they would change,
+    returning the root of a new treap and leaving the one they were given untouched
+    """
+
+    @staticmethod
+    def _visit(node: TreapNode) -> TreapNode:
+        """Returns a shallow copy of node, sharing its children, for _split_by and _merge to relink"""
+        clone = object.__new__(TreapNode)
+        clone.key, clone.priority, clone.size = node.key, node.priority, node.size
+        clone.left, clone.right = node.left, node.right
+        return clone
+
+    def _insert(self, root, key):
+        """Path-copying version of Treap._insert"""
+        new_node = TreapNode(key)
+        priority = new_node.priority
+
+        new_root = None
+        parent = None
+        node = root
+        while node is not None and node.priority >= priority:
+            if key < node.key:
+                child = node.left
+            elif key > node.key:
+                child = node.right
+            else:
+                # Nothing has been attached to a version yet, so the copies can simply be dropped
+                raise self.DuplicateKeyException('No duplicates allowed', key, node.key)
+            copy = self._visit(node)
+            copy.size += 1
+            if parent is None:
+                new_root = copy
+            elif key < parent.key:
+                parent.left = copy
+            else:
+                parent.right = copy
+            parent = copy
+            node = child
+
+        duplicate = node
+        while duplicate is not None:
+            if key < duplicate.key:
+                duplicate = duplicate.left
+            elif key > duplicate.key:
+                duplicate = duplicate.right
+            else:
+                raise self.DuplicateKeyException('No duplicates allowed', key, duplicate.key)
+
+        new_node.left, new_node.right = self._split(node, key)
+        self._update(new_node)
+
+        if parent is None:
+            return new_node
+        if key < parent.key:
+            parent.left = new_node
+        else:
+            parent.right = new_node
+        return new_root
+
+    def _delete(self, root, key):
+        """Path-copying version of Treap._delete"""
+        path: list[TreapNode] = []
+        node = root
+        while node is not None:
+            if key < node.key:
+                path.append(node)
+                node = node.left
+            elif key > node.key:
+                path.append(node)
+                node = node.right
+            else:
+                break
+
+        if node is None:
+            return root
+
+        child = self._merge(node.left, node.right)
+        for ancestor in reversed(path):
+            copy = self._visit(ancestor)
+            copy.size -= 1
+            if key < copy.key:
+                copy.left = child
+            else:
+                copy.right = child
+            child = copy
+        return child
+
+
+class PersistentTreap:
+    """
+    An immutable treap.
+    insert, delete, delete_range, split and merge leave this version untouched and
+    return new versions instead. Only the O(log n) nodes on the paths that an update
+    walks are copied, and the rest are shared between versions.
+
+    Since nodes are never modified once they are part of a version, any version can be
+    read and iterated while newer ones are being created, and taking a snapshot is O(1).
+    Every version is held by a Treap whose splits and merges copy nodes through Treap._visit,
+    and which answers the queries, since it is never modified.
+    """
+    DuplicateKeyException = Treap.DuplicateKeyException
+
+    def __init__(self, root: TreapNode | None = None):
+        """
+        Creates a new PersistentTreap.
+
+        The root parameter is used by the methods making new versions.
+        It is not to be filled in by client code
+        """
+        self._treap = _PathCopyingTreap(root)
+
+    @property
+    def root(self) -> TreapNode | None:
+        return self._treap.root
+
+    def snapshot(self) -> Self:
+        """Returns a version that will not change, which is this one, in O(1)"""
+        return self
+
+    def insert(self, key) -> Self:
+        """
+        Returns a new version with key added
+        :raise: DuplicateKeyException if key is already present
+        """
+        return PersistentTreap(self._treap._insert(self.root, key))
+
+    def delete(self, key) -> Self:
+        """Returns a new version without key. If key is not present, this version is returned"""
+        root = self._treap._delete(self.root, key)
+        return self if root is self.root else PersistentTreap(root)
+
+    def delete_range(self, lo, hi) -> Self:
+        """Returns a new version without the keys k such that lo <= k < hi"""
+        if not lo < hi:
+            return self
+        lower, rest = self._treap._split(self.root, lo, inclusive=False)
+        _, upper = self._treap._split(rest, hi, inclusive=False)
+        return PersistentTreap(self._treap._merge(lower, upper))
+
+    def split(self, key) -> tuple[Self, Self]:
+        """Returns a version with the keys less than or equal to key and a version with the others"""
+        left, right = self._treap._split(self.root, key)
+        return PersistentTreap(left), PersistentTreap(right)
+
+    @classmethod
+    def merge(cls, left_treap: Self, right_treap: Self) -> Self:
+        """
+        Takes in two versions and merges them into a new one, leaving both unchanged.
+        Every key of left_treap has to be less than every key of right_treap
+        """
+        return PersistentTreap(left_treap._treap._merge(left_treap.root, right_treap.root))
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable) -> Self:
+        return PersistentTreap(Treap._build_sorted(keys))
+
+    @classmethod
+    def from_iterable(cls, keys: Iterable) -> Self:
+        return PersistentTreap(Treap._build_sorted(sorted(keys)))
+
+    def __len__(self):
+        return len(self._treap)
+
+    def size(self):
+        return len(self._treap)
+
+    def is_empty(self):
+        return self._treap.is_empty()
+
+    def __iter__(self):
+        return iter(self._treap)
+
+    def search(self, key):
+        return self._treap.search(key)
+
+    def min(self):
+        return self._treap.min()
+
+    def max(self):
+        return self._treap.max()
+
+    def floor(self, key):
+        return self._treap.floor(key)
+
+    def ceiling(self, key):
+        return self._treap.ceiling(key)
+
+    def predecessor(self, key):
+        return self._treap.predecessor(key)
+
+    def successor(self, key):
+        return self._treap.successor(key)
+
+    def iter_range(self, lo=None, hi=None, reverse: bool = False):
+        return self._treap.iter_range(lo, hi, reverse)
+
+    def kth(self, index: int):
+        return self._treap.kth(index)
+
+    def rank(self, key) -> int:
+        return self._treap.rank(key)
+
+    def count_range(self, lo, hi) -> int:
+        return self._treap.count_range(lo, hi)
+
+    def median(self):
+        return self._treap.median()
+
+    def cursor_at(self, key=None) -> Treap.Cursor:
+        return self._treap.cursor_at(key)
+
+    def traverse(self, order: TraversalOrder = TraversalOrder.INORDER, chunk_size: int | None = None):
+        return self._treap.traverse(order, chunk_size)
+
+    def preorder(self):
+        return self._treap.preorder()
+
+    def save(self, path):
+        """Writes this version to a binary snapshot, which Treap.load reads back as a Treap"""
+        self._treap.save(path)
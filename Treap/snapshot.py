@@ -0,0 +1,272 @@
+"""
+Binary snapshots of a Treap, which can be loaded by memory-mapping the file.
+
+A snapshot holds the keys in ascending order along with their priorities. Since the shape of
+a treap is determined by its keys and their priorities, this is enough to rebuild the exact
+same treap in O(n) with Treap._build_sorted, and child indices or subtree sizes need not be stored.
+Keeping the keys sorted also lets a MappedTreap answer searches with a binary search on the
+file itself, and iterate over it sequentially, without building any node.
+
+Layout, all little-endian:
+    header      magic, format version, key kind and number of keys (see _HEADER)
+    priorities  8-byte floats, one per key
+    keys        8-byte ints or floats, one per key, for int and float keys, or
+                n + 1 8-byte offsets followed by the encoded keys, for str and bytes keys
+"""
+import bisect
+import itertools
+import mmap as mmap_module
+import os
+import struct
+import sys
+from array import array
+from typing import Iterable
+
+from Treap.treap import Treap, TreapNode
+
+MAGIC = b"TREAPSNP"
+FORMAT_VERSION = 1
+# Magic, format version, key kind, padding and number of keys
+_HEADER = struct.Struct("<8sHHIq")
+
+KIND_INT = 1
+KIND_FLOAT = 2
+KIND_STR = 3
+KIND_BYTES = 4
+_KINDS = {int: KIND_INT, float: KIND_FLOAT, str: KIND_STR, bytes: KIND_BYTES}
+
+
+class SnapshotFormatException(Exception):
+    pass
+
+
+def _nodes_inorder(root: TreapNode | None) -> Iterable[TreapNode]:
+    stack: list[TreapNode] = []
+    node = root
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        yield node
+        node = node.right
+
+
+def _little_endian(values: array) -> array:
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def save(treap: Treap, path: str | os.PathLike):
+    """
+    Writes treap to path as a snapshot
+    :raise: TypeError if the keys are not all ints, all floats, all strs or all bytes
+    """
+    priorities = array("d")
+    keys = []
+    for node in _nodes_inorder(treap.root):
+        priorities.append(node.priority)
+        keys.append(node.key)
+
+    key_type = type(keys[0]) if keys else int
+    kind = _KINDS.get(key_type)
+    if kind is None or any(type(key) is not key_type for key in keys):
+        raise TypeError("Snapshots only support keys that are all ints, all floats, all strs or all bytes")
+
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, kind, 0, len(keys)))
+        file.write(_little_endian(priorities).tobytes())
+        if kind == KIND_INT:
+            file.write(_little_endian(array("q", keys)).tobytes())
+        elif kind == KIND_FLOAT:
+            file.write(_little_endian(array("d", keys)).tobytes())
+        else:
+            encoded = [key.encode() for key in keys] if kind == KIND_STR else keys
+            offsets = array("q", [0])
+            for data in encoded:
+                offsets.append(offsets[-1] + len(data))
+            file.write(_little_endian(offsets).tobytes())
+            for data in encoded:
+                file.write(data)
+
+
+class _EncodedKeys:
+    """Read-only sequence of the str or bytes keys of a snapshot, decoded on access"""
+
+    def __init__(self, offsets: memoryview, data: memoryview, decode: bool):
+        self._offsets = offsets
+        self._data = data
+        self._decode = decode
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int):
+        key = bytes(self._data[self._offsets[index]:self._offsets[index + 1]])
+        return key.decode() if self._decode else key
+
+    def tolist(self) -> list:
+        return [self[index] for index in range(len(self))]
+
+    def release(self):
+        self._offsets.release()
+        self._data.release()
+
+
+def load(path: str | os.PathLike, mmap: bool = True) -> "MappedTreap":
+    """
+    Loads the snapshot at path.
+    With mmap, the file is memory-mapped and only the pages that are read are loaded,
+    so loading takes the same time whatever the size of the snapshot.
+    Otherwise, the whole file is read into memory first
+    :raise: SnapshotFormatException if the file is not a snapshot of a supported version
+    """
+    with open(path, "rb") as file:
+        if mmap:
+            buffer = mmap_module.mmap(file.fileno(), 0, access=mmap_module.ACCESS_READ) \
+                if os.fstat(file.fileno()).st_size else b""
+        else:
+            buffer = file.read()
+
+    if len(buffer) < _HEADER.size:
+        raise SnapshotFormatException("File is too short to be a snapshot", path)
+    magic, version, kind, _, count = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise SnapshotFormatException("File is not a snapshot", path)
+    if version != FORMAT_VERSION:
+        raise SnapshotFormatException("Unsupported snapshot format version", version)
+    if kind not in _KINDS.values():
+        raise SnapshotFormatException("Unknown key kind", kind)
+
+    view = memoryview(buffer)
+    start = _HEADER.size
+    priorities = _cast(view[start:start + 8 * count], "d")
+    start += 8 * count
+    if kind in (KIND_INT, KIND_FLOAT):
+        keys = _cast(view[start:start + 8 * count], "q" if kind == KIND_INT else "d")
+    else:
+        offsets = _cast(view[start:start + 8 * (count + 1)], "q")
+        keys = _EncodedKeys(offsets, view[start + 8 * (count + 1):], kind == KIND_STR)
+    return MappedTreap(buffer, view, keys, priorities)
+
+
+def _cast(view: memoryview, typecode: str) -> memoryview:
+    if sys.byteorder == "big":
+        values = array(typecode, view)
+        values.byteswap()
+        return memoryview(values)
+    return view.cast(typecode)
+
+
+class MappedTreap(Treap):
+    """
+    A Treap loaded from a snapshot, which answers len, search, min, max, kth, rank and
+    iteration straight from the snapshot, without building any node.
+    The nodes are only built the first time they are needed, by any other method or by a
+    modification, after which the snapshot is let go of and this is a regular Treap.
+
+    Nodes returned by search, min and max before then are copies that are not part of the
+    treap, and modifying them has no effect on it.
+    """
+
+    def __init__(self, buffer, view: memoryview, keys, priorities: memoryview):
+        self._buffer = buffer
+        self._view = view
+        self._keys = keys
+        self._priorities = priorities
+        # Treap.__init__ goes through the root setter, so the treap is only marked as mapped afterwards
+        self._mapped = False
+        super().__init__()
+        self._mapped = True
+        self._size = len(keys)
+
+    @property
+    def root(self) -> TreapNode | None:
+        if self._mapped:
+            self._materialize()
+        return self._root
+
+    @root.setter
+    def root(self, root: TreapNode | None):
+        if self._mapped:
+            self._mapped = False
+            self._release()
+        self._root = root
+
+    def _derive(self, root: TreapNode | None) -> Treap:
+        """The treaps split from or merged into a MappedTreap are regular Treaps"""
+        return Treap(root)
+
+    def _materialize(self):
+        """Builds the nodes of the treap from the snapshot, then closes the snapshot"""
+        priorities = iter(self._priorities.tolist())
+
+        def make_node(key) -> TreapNode:
+            node = TreapNode(key)
+            node.priority = next(priorities)
+            return node
+
+        keys = self._keys.tolist()
+        self._root = self._build_sorted(keys, make_node)
+        self._mapped = False
+        self._release()
+
+    def _release(self):
+        self._keys.release()
+        self._priorities.release()
+        self._view.release()
+        if isinstance(self._buffer, mmap_module.mmap):
+            self._buffer.close()
+        self._buffer = self._view = self._keys = self._priorities = None
+
+    def _detached_node(self, index: int) -> TreapNode:
+        node = TreapNode(self._keys[index])
+        node.priority = self._priorities[index]
+        return node
+
+    def search(self, key):
+        if not self._mapped:
+            return super().search(key)
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            return self._detached_node(index)
+        return None
+
+    def min(self):
+        if not self._mapped:
+            return super().min()
+        return self._detached_node(0) if self._size else None
+
+    def max(self):
+        if not self._mapped:
+            return super().max()
+        return self._detached_node(self._size - 1) if self._size else None
+
+    def kth(self, index: int):
+        if not self._mapped:
+            return super().kth(index)
+        if not 0 <= index < self._size:
+            raise IndexError("Treap index out of range")
+        return self._keys[index]
+
+    def rank(self, key) -> int:
+        if not self._mapped:
+            return super().rank(key)
+        return bisect.bisect_left(self._keys, key)
+
+    def __iter__(self):
+        if not self._mapped:
+            return super().__iter__()
+        return self._iterate_mapped()
+
+    def _iterate_mapped(self):
+        version = self._version
+        for index in range(self._size):
+            if version != self._version:
+                raise self.ConcurrentModificationException("Treap modified during iteration")
+            if not self._mapped:
+                # The nodes have been built by a read in the meantime, so carry on over them
+                yield from itertools.islice(self._TreapIterator(self._root, self), index, None)
+                return
+            yield self._keys[index]
@@ -1,15 +1,30 @@
+import csv
+import io
+import json
+import mmap
 import os
 import random
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum, auto
-from typing import Union
+from itertools import chain, islice, repeat
+from operator import attrgetter, itemgetter
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, TextIO, Union
 
-from Treap.treap import Treap, TreapNode
+from Treap.group_sinks import BATCH_SIZE, BUFFER_SIZE, GroupSink, open_sink
+from Treap.treap import TraversalOrder, Treap, TreapNode
+
+# Below this many bytes, starting processes and pickling the students costs more than it saves
+PARALLEL_THRESHOLD = 1 << 22
 
 
 class GroupMode(Enum):
     RANDOM = auto()
     ASCENDING = auto()
     DESCENDING = auto()
+    # Groups of a uniformly random shuffle of the students, which a seed makes reproducible
+    SHUFFLED = auto()
 
 
 class Student:
@@ -43,11 +58,92 @@ class Student:
         return f"Student({self.name}, {self.reg_no})"
 
 
+class RosterChange(NamedTuple):
+    """A student to add, with their name, or to remove, without"""
+    reg_no: str
+    name: str | None = None
+
+
+class _GroupIndex:
+    """
+    The members of every group, by registration number, kept so that group sizes differ by at most one.
+    The groups of the smallest size are in small, and the others, one member larger, in large,
+    so a student is added or removed with at most one other student moving between groups
+    """
+
+    def __init__(self, students: Iterable[Student], group_count: int):
+        self.members: dict[int, dict[str, Student]] = {group: {} for group in range(1, group_count + 1)}
+        # Students whose group has changed, to be saved
+        self.moved: list[Student] = []
+        unassigned = []
+        for student in students:
+            members = self.members.get(student.group)
+            if members is None:
+                unassigned.append(student)
+            else:
+                members[student.reg_no] = student
+
+        # Students may have been added or removed outside of the index, in which case the largest groups
+        # give their surplus to the smallest ones
+        smallest, larger_groups = divmod(sum(map(len, self.members.values())), group_count)
+        groups = sorted(self.members, key=lambda group: len(self.members[group]), reverse=True)
+        targets = {group: smallest + (rank < larger_groups) for rank, group in enumerate(groups)}
+        surplus = []
+        for group, target in targets.items():
+            members = self.members[group]
+            while len(members) > target:
+                surplus.append(members.popitem()[1])
+        for group, target in targets.items():
+            members = self.members[group]
+            while len(members) < target:
+                self._assign(surplus.pop(), group)
+
+        self.small = {group for group, target in targets.items() if target == smallest}
+        self.large = set(targets) - self.small
+        for student in unassigned:
+            self.add(student)
+
+    def _assign(self, student: Student, group: int):
+        student.group = group
+        self.members[group][student.reg_no] = student
+        self.moved.append(student)
+
+    def add(self, student: Student):
+        """Puts student in one of the smallest groups"""
+        if not self.small:
+            # Every group has grown to the same size
+            self.small, self.large = self.large, self.small
+        group = self.small.pop()
+        self.large.add(group)
+        self._assign(student, group)
+
+    def remove(self, student: Student):
+        """Takes student out of their group, which gets a member of a larger group if it was one of the smallest"""
+        group = student.group
+        del self.members[group][student.reg_no]
+        if group in self.large:
+            self.large.remove(group)
+            self.small.add(group)
+        elif self.large:
+            donor = self.large.pop()
+            self.small.add(donor)
+            self._assign(self.members[donor].popitem()[1], group)
+        else:
+            # Every group had the same size, so this one is now the only smallest
+            self.large, self.small = self.small, {group}
+            self.large.remove(group)
+
+
 class StudentGroupMaker(Treap):
     """
     A class that can make groups from a csv file containing a list of students and their registration numbers.
     """
     OUTPUT_FILE = "grouped.csv"
+    # Traversal orders that visit the students in the opposite order of one another
+    _REVERSED_ORDERS = {TraversalOrder.INORDER: TraversalOrder.REVERSE_INORDER,
+                        TraversalOrder.REVERSE_INORDER: TraversalOrder.INORDER,
+                        TraversalOrder.PREORDER: TraversalOrder.REVERSE_PREORDER,
+                        TraversalOrder.POSTORDER: TraversalOrder.REVERSE_POSTORDER}
 
     class InvalidFileException(Exception):
         pass
@@ -55,18 +151,37 @@ class StudentGroupMaker(Treap):
     class InvalidShapeException(Exception):
         pass
 
-    def __init__(self, file_name: Union[str | os.PathLike | bytes]):
+    def __init__(self, file_name: Union[str | os.PathLike | bytes], state_file: str | os.PathLike | None = None):
         """
         Creates a new student group maker from the file given.
         The file has to be a csv file (for now)
+        :param state_file: File in which the groups and the changes to the roster are saved, as JSON Lines:
+                the number of groups, then arrays of records of the groups of the students, a group of None
+                marking a removed student. If it exists, the groups saved in it are restored instead of
+                having to be made again
         """
         super().__init__()
         self.file_name = file_name
         if not self.file_name.endswith(".csv"):
             raise self.InvalidFileException("Expected a .csv file")
 
-        if self.file_has_desired_shape():
-            self.populate_from_file()
+        # Number of groups made, 0 until make_groups is called
+        self._group_count = 0
+        # Built from the groups of the students when they are first changed one at a time
+        self._group_index: _GroupIndex | None = None
+        self.state_file = state_file
+        # Number of records appended to the state file since it was last written in full,
+        # or of the records found overridden by later ones when it was loaded
+        self._state_records = 0
+        # Registration numbers of the students of the roster file that have been removed since
+        self._removed_reg_nos: set[str] = set()
+        # Registration numbers of the students present that are not in the roster file
+        self._added_reg_nos: set[str] = set()
+
+        # The shape of the file is checked while it is read
+        self.populate_from_file()
+        if state_file is not None and os.path.exists(state_file):
+            self._load_state()
 
     def file_has_desired_shape(self) -> bool:
         """
@@ -75,34 +190,140 @@ class StudentGroupMaker(Treap):
         May also include test to see whether all the items in the reg no column are
         registration numbers, but that seems overkill
         """
-        with open(self.file_name) as file:
-            i = 0
-            for line in file.readlines():
-                # Confirm that the groups column has been created
-                if len(line.split(",")) != 2:
-                    raise self.InvalidShapeException("The file should only have two columns, name and reg.no")
-                i += 1
+        with open(self.file_name, newline="") as file:
+            for row in csv.reader(file):
+                self._check_shape(row)
 
         return True
 
-    def populate_from_file(self):
-        """Adds student names and registration numbers from a file"""
-        with open(self.file_name) as file:
-            index = 0
-            for line in file:
-                # This condition will ensure that we skip the header
-                if index > 0:
-                    fields = line.replace("\n", "").split(",")
-                    if fields:
-                        [name, reg_no] = fields
-                        self.insert(Student(name, reg_no))
-
-                index += 1
-
-    def make_groups(self, students_per_group: int, mode: GroupMode = GroupMode.RANDOM):
+    @classmethod
+    def _check_shape(cls, row: list[str]):
+        # Blank lines are skipped by the callers, rather than counted as rows with no columns
+        if row and len(row) != 2:
+            raise cls.InvalidShapeException("The file should only have two columns, name and reg.no")
+
+    @classmethod
+    def _parse(cls, rows: Iterable[list[str]]) -> list[Student]:
+        """:return: A Student for every row that is not blank, after checking its shape"""
+        students = []
+        for row in rows:
+            if row:
+                cls._check_shape(row)
+                students.append(Student(*row))
+        return students
+
+    def populate_from_file(self, use_mmap: bool = False, workers: int | None = 1):
+        """
+        Adds student names and registration numbers from the file, in a single pass.
+        :param use_mmap: Whether to read the file through a memory map rather than buffered reads
+        :param workers: Number of processes parsing the file, each its own byte range of it,
+                or None for one per CPU. Files smaller than PARALLEL_THRESHOLD bytes are parsed
+                in this process. Rows are then expected not to span several lines
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and os.path.getsize(self.file_name) >= PARALLEL_THRESHOLD:
+            self._populate_in_parallel(workers)
+            return
+
+        if not use_mmap:
+            with open(self.file_name, newline="") as file:
+                self.populate_from(file)
+            return
+
+        with open(self.file_name, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self.populate_from(mapped)
+
+    def populate_from(self, source: Iterable[str] | BinaryIO | mmap.mmap):
+        """
+        Adds student names and registration numbers from a csv source with a header row, which can be
+        a text file or any other iterable of lines, a binary file or a memory map of a file (read as UTF-8).
+        The rows are parsed with the csv module, so quoted names may contain commas.
+
+        The source is read once, and its shape is checked as it goes. Only the students are kept, not the
+        lines they come from; they are then sorted and built into a treap in linear time, which becomes
+        this treap if it is empty or is joined to it with a union otherwise
+        :raise: InvalidShapeException if a row does not have exactly two columns
+        :raise: DuplicateKeyException if a registration number is repeated
         """
-        Creates a csv file (grouped.csv) in the current directory
-        populated with the groups that each student is placed.
+        if isinstance(source, mmap.mmap):
+            lines = (line.decode() for line in iter(source.readline, b""))
+        elif isinstance(source, (io.RawIOBase, io.BufferedIOBase)):
+            lines = (line.decode() for line in source)
+        else:
+            lines = source
+
+        rows = csv.reader(lines)
+        # This will ensure that we skip the header
+        header = next(rows, None)
+        if header is not None:
+            self._check_shape(header)
+
+        students = self._parse(rows)
+        # Students are ordered by their registration numbers, which compare much faster than students do.
+        # Timsort also merges runs of students that are already in order
+        students.sort(key=attrgetter("reg_no"))
+        self._add_sorted(students)
+
+    def _populate_in_parallel(self, workers: int):
+        """
+        Cuts the file into one byte range per worker, each starting at the beginning of a line,
+        has every worker parse and sort the rows of its range, then merges the sorted runs.
+        Rows pickle much faster than students, so the students are only made here
+        """
+        with open(self.file_name, "rb") as file:
+            header = file.readline()
+            self._check_shape(next(csv.reader([header.decode()]), []))
+            size = os.fstat(file.fileno()).st_size
+            bounds = [file.tell()]
+            for i in range(1, workers):
+                file.seek(max(bounds[-1], bounds[0] + i * (size - bounds[0]) // workers))
+                # The rest of the line belongs to the previous range
+                file.readline()
+                bounds.append(file.tell())
+            bounds.append(size)
+
+        with ProcessPoolExecutor(workers) as executor:
+            runs = list(executor.map(_parse_range, repeat(self.file_name), bounds, bounds[1:]))
+        # Sorting the concatenated runs lets the sort merge them, as it detects runs
+        rows = sorted(chain.from_iterable(runs), key=itemgetter(1))
+        del runs
+        self._add_sorted([Student(*row) for row in rows])
+
+    def _add_sorted(self, students: list[Student]):
+        """
+        Adds students given in ascending order
+        :raise: DuplicateKeyException if a registration number is repeated, among the students or in this treap
+        """
+        if not students:
+            return
+
+        # Duplicates are next to each other once sorted
+        for previous, student in zip(students, islice(students, 1, None)):
+            if not previous < student:
+                raise self.DuplicateKeyException('No duplicates allowed', student, previous)
+
+        # Students added this way are put in groups the next time they are changed one at a time
+        self._group_index = None
+        if self.is_empty():
+            self.root = self._build_sorted(students)
+        else:
+            for student in students:
+                # Students are the same key when they have the same registration number, whatever their names
+                existing = self.ceiling(student)
+                if existing is not None and not student < existing:
+                    raise self.DuplicateKeyException('No duplicates allowed', student, existing)
+            # Joining a treap built from the new students is cheaper than inserting them one by one
+            self.root = self._union(self.root, self._build_sorted(students))
+        self._modified()
+
+    def make_groups(self, students_per_group: int, mode: GroupMode = GroupMode.RANDOM,
+                    output: str | os.PathLike | TextIO | GroupSink | None = None, seed: int | None = None):
+        """
+        Writes the students along with the group that each of them is placed in, group by group,
+        as csv to the file grouped.csv in the current directory by default.
         Groups differ in length by at most 1 member
         :param mode: Determines the order in which the students will be arranged, which,
             by default, is random (but not really random).
@@ -110,66 +331,384 @@ class StudentGroupMaker(Treap):
         :param students_per_group: Denotes the number of students each group_number will have.
                 Will put all the students into one group_number if it is greater
                 than the number of students in the file
+        :param output: Path of the csv file to write, text file object to write csv to, or GroupSink.
+                The rows are streamed in batches as the students are traversed
+        :param seed: Seed of the shuffle in GroupMode.SHUFFLED, which is drawn from the system if None
         """
-        # This achieves randomization by performing a preorder traversal through the treap
-        # in which it stores the info. Since the items are inserted with random priority
-        # and the treap gets shifted many times as elements are inserted to it, there is a very
-        # small chance that the order in the output file will be the same as it was in the input file
         if students_per_group <= 0:
             raise ValueError("The value of students_per_group must be a positive integer")
 
-        student_counter = 0
-        # Equals to the number of complete groups + 1
-        # in the case of an oddly divisible students_per_group
-        group_number = 0
+        with open_sink(output if output is not None else self.OUTPUT_FILE) as sink:
+            group = _write_groups(sink, self._member_groups(students_per_group, mode, seed), assign=True)
+
+        self._group_count = group
+        self._group_index = None
+        if self.state_file is not None:
+            self._write_state()
 
-        iterator = random.choice([self.preorder(), self._postorder(self.root)])
+    def make_group_sets(self, students_per_group: int, seeds: Iterable[int],
+                        outputs: Iterable[str | os.PathLike | TextIO | GroupSink], workers: int | None = 1):
+        """
+        Writes an independent set of GroupMode.SHUFFLED groups for every seed, to the output paired with it,
+        as make_groups(students_per_group, GroupMode.SHUFFLED, output, seed) would, but without changing
+        the groups of the students.
+        :param workers: Number of processes making the sets, or None for one per CPU. Every process is
+                given the roster once, and the outputs then have to be paths
+        """
+        if students_per_group <= 0:
+            raise ValueError("The value of students_per_group must be a positive integer")
+        seeds, outputs = list(seeds), list(outputs)
+        if len(seeds) != len(outputs):
+            raise ValueError("There should be as many outputs as seeds")
+
+        workers = min(workers or os.cpu_count() or 1, len(seeds))
+        if workers <= 1:
+            for seed, output in zip(seeds, outputs):
+                with open_sink(output) as sink:
+                    _write_groups(sink, self._member_groups(students_per_group, GroupMode.SHUFFLED, seed))
+            return
+
+        # Ranks index the roster in the workers as they do the treap here
+        roster = [(student.name, student.reg_no) for student in self.traverse()]
+        with ProcessPoolExecutor(workers, initializer=_set_roster, initargs=(roster,)) as executor:
+            list(executor.map(_write_group_set, repeat(students_per_group), seeds, outputs))
+
+    def _students_at(self, ranks: list[int]) -> list[Student]:
+        """
+        Returns the students at the given distinct ranks, as kth would, in O(m log(n/m + 1)) for m ranks
+        rather than O(m log n): a single descent of the treap splits the sorted ranks between the subtrees
+        """
+        students: list[Student | None] = [None] * len(ranks)
+        order = sorted(range(len(ranks)), key=ranks.__getitem__)
+        sorted_ranks = [ranks[i] for i in order]
+        # Subtrees still to visit, with the rank of their least student and the slice of sorted_ranks in them
+        stack = [(self.root, 0, 0, len(order))] if order else []
+        while stack:
+            node, offset, lo, hi = stack.pop()
+            left = node.left
+            rank = offset + (left.size if left is not None else 0)
+            middle = bisect_left(sorted_ranks, rank, lo, hi)
+            if lo < middle:
+                stack.append((left, offset, lo, middle))
+            if middle < hi and sorted_ranks[middle] == rank:
+                students[order[middle]] = node.key
+                middle += 1
+            if middle < hi:
+                stack.append((node.right, rank + 1, middle, hi))
+        return students
+
+    def _member_groups(self, students_per_group: int, mode: GroupMode, seed: int | None) -> Iterator[list[Student]]:
+        """Lazily yields the members of every group in turn"""
+        if mode is GroupMode.SHUFFLED:
+            # The students are found by rank, so that they are never collected, a batch of groups at a time
+            rank_groups = _shuffled_rank_groups(len(self), students_per_group, random.Random(seed))
+            while rank_groups_batch := list(islice(rank_groups, max(1, BATCH_SIZE // students_per_group))):
+                students = iter(self._students_at([rank for ranks in rank_groups_batch for rank in ranks]))
+                for ranks in rank_groups_batch:
+                    yield list(islice(students, len(ranks)))
+            return
+
+        # This achieves randomization by performing a preorder or postorder traversal through the treap
+        # in which it stores the info. Since the items are inserted with random priority
+        # and the treap gets shifted many times as elements are inserted to it, there is a very
+        # small chance that the order in the output file will be the same as it was in the input file
         match mode:
             case GroupMode.RANDOM:
-                pass  # Already set to self.preorder()
+                order = random.choice([TraversalOrder.PREORDER, TraversalOrder.POSTORDER])
             case GroupMode.ASCENDING:
-                iterator = self.__iter__()
+                order = TraversalOrder.INORDER
             case GroupMode.DESCENDING:
-                iterator = self._inorder_reverse(self.root)
-
-        student_list: list[Student] = []
-        for student in iterator:
-            if student_counter % students_per_group == 0:
-                group_number += 1
-
-            student.group = group_number
-            student_list.append(student)
-            student_counter += 1
-
-        # Handle the adding the members of incomplete groups to random groups
-        students_remaining = student_counter % students_per_group
-
-        if 0 < students_remaining < students_per_group - 1:
-            new_group = random.randrange(1, group_number)
-            for i in range(students_remaining):
-                student_list[(student_counter - 1) - i].group = new_group
-                new_group += 1
-                if new_group >= group_number:
-                    new_group = 1
-
-            student_list = sorted(student_list, key=lambda s: s.group)
-
-        with open(self.OUTPUT_FILE, "w") as output_file:
-            output_file.write(f"NAME,REG NO,GROUP\n")
-            for student in student_list:
-                output_file.write(f"{student.name},{student.reg_no},{student.group}\n")
-
-    def _inorder_reverse(self, root: TreapNode):
-        if root is not None:
-            yield from self._inorder_reverse(root.right)
-            yield root.key
-            yield from self._inorder_reverse(root.left)
-
-    def _postorder(self, root: TreapNode):
-        if root is not None:
-            yield from self._inorder_reverse(root.left)
-            yield from self._inorder_reverse(root.right)
-            yield root.key
+                order = TraversalOrder.REVERSE_INORDER
+
+        full_groups, students_remaining = divmod(len(self), students_per_group)
+        students = self.traverse(order)
+        # Members of an incomplete group that is short of more than one member are added to the complete
+        # groups instead, one each, going round from a random group. They are the last students of the
+        # traversal, so they are found beforehand by traversing the treap in the opposite order,
+        # and each is written right after its new group
+        extra_members: dict[int, list[Student]] = {}
+        if full_groups > 0 and 0 < students_remaining < students_per_group - 1:
+            last = islice(self.traverse(self._REVERSED_ORDERS[order]), students_remaining)
+            first_group = random.randrange(full_groups)
+            # The last student goes to the first group, the one before it to the next group, and so on.
+            # Students added to the same group are written in the order of the traversal
+            for position, student in enumerate(last):
+                group = (first_group + position) % full_groups + 1
+                extra_members.setdefault(group, []).insert(0, student)
+            students = islice(students, full_groups * students_per_group)
+
+        group = 0
+        while members := list(islice(students, students_per_group)):
+            group += 1
+            members.extend(extra_members.get(group, ()))
+            yield members
+
+    def add_student(self, name: str, reg_no: str) -> Student:
+        """
+        Adds a student to the roster and to one of the smallest groups, in O(log n)
+        :raise: DuplicateKeyException if a student with reg_no is already present
+        """
+        records = []
+        try:
+            return self._add_student(name, reg_no, records)
+        finally:
+            self._append_state(records)
+
+    def remove_student(self, reg_no: str) -> Student | None:
+        """
+        Removes the student with reg_no from the roster and from their group, in O(log n).
+        If the group was one of the smallest, a member of a larger group is moved to it
+        :return: The student removed, or None if there was none with reg_no
+        """
+        records = []
+        try:
+            return self._remove_student(reg_no, records)
+        finally:
+            self._append_state(records)
+
+    def apply_changes(self, batch: Iterable[RosterChange]):
+        """
+        Adds and removes students in order, as add_student and remove_student do, in O(k log n) for k changes,
+        saving them to the state file at once. Changes applied before one that raises are kept
+        """
+        records = []
+        try:
+            for change in batch:
+                if change.name is None:
+                    self._remove_student(change.reg_no, records)
+                else:
+                    self._add_student(change.name, change.reg_no, records)
+        finally:
+            self._append_state(records)
+
+    def write_groups(self, output: str | os.PathLike | TextIO | GroupSink | None = None):
+        """
+        Writes the students and their current groups, group by group, as make_groups does, without regrouping them
+        :raise: ValueError if make_groups has not been called
+        """
+        index = self._groups()
+        if index is None:
+            raise ValueError("The groups have not been made yet")
+
+        with open_sink(output if output is not None else self.OUTPUT_FILE) as sink:
+            batch: list[tuple[str, str, int]] = []
+            for group, members in index.members.items():
+                batch.extend((student.name, student.reg_no, group) for student in members.values())
+                if len(batch) >= BATCH_SIZE:
+                    sink.write_rows(batch)
+                    batch = []
+            if batch:
+                sink.write_rows(batch)
+
+    def _groups(self) -> _GroupIndex | None:
+        """:return: The index of the groups, built from a traversal the first time, or None if there are no groups"""
+        if self._group_index is None and self._group_count > 0:
+            self._group_index = _GroupIndex(self.traverse(), self._group_count)
+        return self._group_index
+
+    def _add_student(self, name: str, reg_no: str, records: list[dict]) -> Student:
+        student = Student(name, reg_no)
+        # The index is built before the student is inserted, so that they are only added to it once
+        index = self._groups()
+        self.insert(student)
+        self._track_added(reg_no)
+        if index is not None:
+            index.add(student)
+            records.extend(map(self._state_record, index.moved))
+            index.moved.clear()
+        else:
+            records.append(self._state_record(student))
+        return student
+
+    def _remove_student(self, reg_no: str, records: list[dict]) -> Student | None:
+        # Students are ordered by their registration numbers only
+        student = self.ceiling(Student("", reg_no))
+        if student is None or student.reg_no != reg_no:
+            return None
+        index = self._groups()
+        self.delete(student)
+        self._track_removed(reg_no)
+        records.append({"reg_no": reg_no, "group": None})
+        if index is not None:
+            index.remove(student)
+            records.extend(map(self._state_record, index.moved))
+            index.moved.clear()
+        return student
+
+    def _track_added(self, reg_no: str):
+        """Records that the student with reg_no has been added, unless they are a student of the roster file back"""
+        if reg_no in self._removed_reg_nos:
+            self._removed_reg_nos.discard(reg_no)
+        else:
+            self._added_reg_nos.add(reg_no)
+
+    def _track_removed(self, reg_no: str):
+        """Records that the student with reg_no has been removed, unless they were not in the roster file"""
+        if reg_no in self._added_reg_nos:
+            self._added_reg_nos.discard(reg_no)
+        else:
+            self._removed_reg_nos.add(reg_no)
+
+    @staticmethod
+    def _state_record(student: Student) -> dict:
+        return {"reg_no": student.reg_no, "name": student.name, "group": student.group}
+
+    def _write_state(self):
+        """
+        Replaces the state file with the number of groups followed by a record of every student,
+        and of every student of the roster file that has been removed
+        """
+        temporary_file = f"{self.state_file}.tmp"
+        with open(temporary_file, "w", buffering=BUFFER_SIZE) as file:
+            file.write(json.dumps({"groups": self._group_count}) + "\n")
+            for students in self.traverse(chunk_size=BATCH_SIZE):
+                file.write(json.dumps(list(map(self._state_record, students))) + "\n")
+            if self._removed_reg_nos:
+                file.write(json.dumps([{"reg_no": reg_no, "group": None} for reg_no in self._removed_reg_nos]) + "\n")
+        os.replace(temporary_file, self.state_file)
+        self._state_records = 0
+
+    def _append_state(self, records: list[dict]):
+        """
+        Appends records to the state file as a line, where later records of a student override earlier ones.
+        Once there are more records appended than students, the file is written anew instead
+        """
+        if self.state_file is None or not records:
+            return
+        if not os.path.exists(self.state_file) or self._state_records + len(records) > len(self):
+            self._write_state()
+            return
+        with open(self.state_file, "a") as file:
+            file.write(json.dumps(records) + "\n")
+        self._state_records += len(records)
+
+    def _load_state(self):
+        """
+        Restores the groups saved in the state file, replaying the students added and removed since
+        the roster was read. Students of the roster missing from the file are added to the smallest groups
+        """
+        students = {student.reg_no: student for student in self.traverse()}
+        # Registration numbers with a record so far, and the number of records overridden by a later one
+        recorded: set[str] = set()
+        superseded = 0
+        with open(self.state_file) as file:
+            self._group_count = json.loads(next(file))["groups"]
+            # Records are replayed in order, so that the last one of every student prevails
+            for line in file:
+                for record in json.loads(line):
+                    reg_no = record["reg_no"]
+                    if reg_no in recorded:
+                        superseded += 1
+                    else:
+                        recorded.add(reg_no)
+                    student = students.get(reg_no)
+                    if record["group"] is None:
+                        if student is not None:
+                            self.delete(student)
+                            del students[reg_no]
+                            self._track_removed(reg_no)
+                    else:
+                        if student is None:
+                            student = students[reg_no] = Student(record["name"], reg_no)
+                            self.insert(student)
+                            self._track_added(reg_no)
+                        student.group = record["group"]
+
+        # Students of the roster without a record are still in group 0, which stands for no group, and are
+        # put in groups when the index is built. Only the records that have been overridden count towards
+        # rewriting the file, which is due once there are more of them than students
+        self._state_records = superseded
+        if self._state_records > len(self):
+            self._write_state()
+
+    def _derive(self, root: TreapNode | None) -> Treap:
+        """The treaps split from or merged into a StudentGroupMaker are plain Treaps of its students"""
+        return Treap(root)
 
     def number_of_students(self):
         return len(self)
+
+
+def _write_groups(sink: GroupSink, groups: Iterable[list[Student]], assign: bool = False) -> int:
+    """
+    Writes the members of every group, numbering the groups from 1, in batches of BATCH_SIZE rows
+    :param assign: Whether to set the group of every student as well
+    :return: The number of groups
+    """
+    batch: list[tuple[str, str, int]] = []
+    group = 0
+    for group, members in enumerate(groups, 1):
+        for student in members:
+            if assign:
+                student.group = group
+            batch.append((student.name, student.reg_no, group))
+        if len(batch) >= BATCH_SIZE:
+            sink.write_rows(batch)
+            batch = []
+    if batch:
+        sink.write_rows(batch)
+    return group
+
+
+def _shuffled_rank_groups(size: int, students_per_group: int, generator: random.Random) -> Iterator[list[int]]:
+    """
+    Lazily yields the ranks of the members of every group of a uniformly random permutation of range(size),
+    with the incomplete group handled as in make_groups.
+    The permutation is drawn a group at a time by a Fisher-Yates shuffle, which only needs the array of
+    ranks still to be drawn. Drawing the students added to complete groups first does not change the
+    distribution, and they are then known before their groups are written
+    """
+    ranks = array("q", range(size))
+    drawn = 0
+
+    def draw(count: int) -> list[int]:
+        nonlocal drawn
+        start, drawn = drawn, min(drawn + count, size)
+        for i in range(start, drawn):
+            j = i + generator.randrange(size - i)
+            ranks[i], ranks[j] = ranks[j], ranks[i]
+        return ranks[start:drawn].tolist()
+
+    full_groups, students_remaining = divmod(size, students_per_group)
+    extra_members: dict[int, list[int]] = {}
+    group_count = full_groups + (students_remaining > 0)
+    if full_groups > 0 and 0 < students_remaining < students_per_group - 1:
+        first_group = generator.randrange(full_groups)
+        for position, rank in enumerate(draw(students_remaining)):
+            extra_members.setdefault((first_group + position) % full_groups + 1, []).append(rank)
+        group_count = full_groups
+
+    for group in range(1, group_count + 1):
+        yield draw(students_per_group) + extra_members.get(group, [])
+
+
+# The roster of a worker making group sets, as (name, reg no) pairs in ascending order
+_roster: list[tuple[str, str]] = []
+
+
+def _set_roster(roster: list[tuple[str, str]]):
+    """Worker initializer: keeps the roster for every group set the worker makes"""
+    global _roster
+    _roster = roster
+
+
+def _write_group_set(students_per_group: int, seed: int, output: str | os.PathLike):
+    """Worker: writes the shuffled groups for seed, as StudentGroupMaker.make_groups does"""
+    groups = ([Student(*_roster[rank]) for rank in ranks]
+              for ranks in _shuffled_rank_groups(len(_roster), students_per_group, random.Random(seed)))
+    with open_sink(output) as sink:
+        _write_groups(sink, groups)
+
+
+def _parse_range(file_name, start: int, end: int) -> list[list[str]]:
+    """Worker: parses the rows between two line boundaries of a csv file, and sorts them by registration number"""
+    with open(file_name, "rb") as file:
+        file.seek(start)
+        text = file.read(end - start).decode()
+    rows = []
+    for row in csv.reader(io.StringIO(text, newline="")):
+        if row:
+            StudentGroupMaker._check_shape(row)
+            rows.append(row)
+    rows.sort(key=itemgetter(1))
+    return rows
@@ -0,0 +1,83 @@
+import operator
+import random
+import unittest
+
+from Treap.aggregate_treap import Aggregate, AggregateTreap
+
+
+def total_of_squares() -> Aggregate:
+    # Keys are squared to give their values, and updates add a constant to values
+    return Aggregate(0, operator.add, extract=lambda key: key * key,
+                     apply=lambda fn, total, count: total + count * fn(0))
+
+
+class TestAggregateTreapMethods(unittest.TestCase):
+    def setUp(self) -> None:
+        self.my_treap = AggregateTreap(total_of_squares())
+        for key in [4, 1, 6, 2, 7, 3, 5]:
+            self.my_treap.insert(key)
+
+    def test_aggregate(self):
+        self.assertEqual(self.my_treap.aggregate(), 140)
+        self.assertEqual(self.my_treap.aggregate(2, 5), 4 + 9 + 16)
+        self.assertEqual(self.my_treap.aggregate(hi=3), 1 + 4)
+        self.assertEqual(self.my_treap.aggregate(10, 20), 0)
+        self.assertEqual(list(self.my_treap), [1, 2, 3, 4, 5, 6, 7])
+
+    def test_aggregate_keeps_iterators(self):
+        self.my_treap.range_apply(3, 6, lambda v: v + 1)
+        iterator = iter(self.my_treap)
+        cursor = self.my_treap.cursor_at(4)
+        self.assertEqual(next(iterator), 1)
+        self.assertEqual(self.my_treap.aggregate(2, 7), 4 + 10 + 17 + 26 + 36)
+        self.assertEqual(list(iterator), [2, 3, 4, 5, 6, 7])
+        self.assertEqual(cursor.next(), 4)
+
+    def test_aggregate_matches_a_scan(self):
+        rng = random.Random(0)
+        # Concatenation is not commutative, so the subtrees have to be combined in order
+        treap = AggregateTreap(Aggregate("", operator.add, extract=str))
+        for key in rng.sample(range(100), 60):
+            treap.insert(key)
+        for _ in range(200):
+            lo, hi = sorted(rng.sample(range(-5, 105), 2))
+            self.assertEqual(treap.aggregate(lo, hi), "".join(str(key) for key in treap if lo <= key < hi))
+
+    def test_aggregate_after_delete(self):
+        self.my_treap.delete(4)
+        self.assertEqual(self.my_treap.aggregate(2, 6), 4 + 9 + 25)
+        self.assertEqual(len(self.my_treap), 6)
+
+    def test_range_apply(self):
+        self.my_treap.range_apply(2, 5, lambda v: v + 10)
+        self.assertEqual(self.my_treap.aggregate(), 170)
+        self.assertEqual(self.my_treap.aggregate(3, 6), 19 + 26 + 25)
+        self.assertEqual(self.my_treap.value(4), 26)
+        self.assertEqual(self.my_treap.value(5), 25)
+
+        self.my_treap.range_apply(None, None, lambda v: v + 1)
+        self.my_treap.insert(8)
+        self.assertEqual(self.my_treap.value(2), 15)
+        self.assertEqual(self.my_treap.aggregate(), 170 + 7 + 64)
+
+    def test_range_apply_needs_apply(self):
+        treap = AggregateTreap(Aggregate(0, operator.add))
+        with self.assertRaises(ValueError):
+            treap.range_apply(0, 1, abs)
+
+    def test_split_and_merge(self):
+        self.my_treap.range_apply(1, 8, lambda v: v + 1)
+        left_treap, right_treap = self.my_treap.split(4)
+        self.assertEqual(left_treap.aggregate(), 1 + 4 + 9 + 16 + 4)
+        self.assertEqual(right_treap.aggregate(), 25 + 36 + 49 + 3)
+        merged_treap = AggregateTreap.merge(left_treap, right_treap)
+        self.assertEqual(merged_treap.aggregate(), 147)
+
+    def test_from_iterable(self):
+        treap = AggregateTreap.from_iterable([3, 1, 2], total_of_squares())
+        self.assertEqual(treap.aggregate(), 14)
+        self.assertEqual(treap.aggregate(2), 13)
+
+
+if __name__ == '__main__':
+    unittest.main()
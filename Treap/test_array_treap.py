@@ -0,0 +1,75 @@
+import unittest
+
+from Treap.array_treap import ArrayTreap
+
+
+class TestArrayTreapMethods(unittest.TestCase):
+    def setUp(self) -> None:
+        self.my_treap = ArrayTreap()
+        for key in [40, 10, 70, 20, 60, 30, 50]:
+            self.my_treap.insert(key)
+
+    def test_len_and_iterator(self):
+        self.assertEqual(len(self.my_treap), 7)
+        self.assertEqual(list(self.my_treap), [10, 20, 30, 40, 50, 60, 70])
+
+    def test_duplicate_insert(self):
+        with self.assertRaises(ArrayTreap.DuplicateKeyException):
+            self.my_treap.insert(30)
+        self.assertEqual(len(self.my_treap), 7)
+
+    def test_key_that_does_not_fit(self):
+        self.my_treap.delete(40)
+        for key in (2 ** 70, 50.5):
+            with self.assertRaises((TypeError, OverflowError)):
+                self.my_treap.insert(key)
+        self.assertEqual(self.my_treap._pool.size[self.my_treap.root], 6)
+        left, right = self.my_treap.split(30)
+        self.assertEqual((len(left), len(right)), (3, 3))
+        self.my_treap = ArrayTreap.merge(left, right)
+        # The slot freed by the deletion is still reused
+        self.my_treap.insert(45)
+        self.assertEqual(list(self.my_treap), [10, 20, 30, 45, 50, 60, 70])
+
+    def test_search_min_max(self):
+        self.assertEqual(self.my_treap.search(30), 30)
+        self.assertIsNone(self.my_treap.search(35))
+        self.assertEqual(self.my_treap.min(), 10)
+        self.assertEqual(self.my_treap.max(), 70)
+
+    def test_delete_reuses_slots(self):
+        self.my_treap.delete(40)
+        self.my_treap.delete(45)  # Not in the treap
+        self.assertEqual(list(self.my_treap), [10, 20, 30, 50, 60, 70])
+
+        slots = len(self.my_treap._pool.priorities)
+        self.my_treap.insert(45)
+        self.assertEqual(len(self.my_treap._pool.priorities), slots)
+        self.assertIn(45, self.my_treap)
+
+    def test_split_and_merge(self):
+        left_treap, right_treap = self.my_treap.split(40)
+        self.assertEqual(list(left_treap), [10, 20, 30, 40])
+        self.assertEqual(list(right_treap), [50, 60, 70])
+
+        merged_treap = ArrayTreap.merge(left_treap, right_treap)
+        self.assertEqual(len(merged_treap), 7)
+        self.assertEqual(list(merged_treap), [10, 20, 30, 40, 50, 60, 70])
+
+    def test_merge_across_pools(self):
+        other = ArrayTreap()
+        for key in [90, 80]:
+            other.insert(key)
+        merged_treap = ArrayTreap.merge(self.my_treap, other)
+        self.assertEqual(list(merged_treap), [10, 20, 30, 40, 50, 60, 70, 80, 90])
+
+    def test_object_keys(self):
+        treap = ArrayTreap(key_typecode=None)
+        for key in ["b", "c", "a"]:
+            treap.insert(key)
+        self.assertEqual(list(treap), ["a", "b", "c"])
+        self.assertEqual(sorted(treap.preorder()), ["a", "b", "c"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import threading
+import unittest
+
+from Treap.concurrent_treap import ConcurrentTreap
+from Treap.treap import Treap
+
+
+class TestConcurrentTreapMethods(unittest.TestCase):
+    def test_fail_fast_iterator(self):
+        treap = Treap.from_sorted([10, 20, 30])
+        iterator = iter(treap)
+        self.assertEqual(next(iterator), 10)
+        treap.insert(25)
+        with self.assertRaises(Treap.ConcurrentModificationException):
+            next(iterator)
+
+    def test_concurrent_inserts(self):
+        treap = ConcurrentTreap()
+
+        def insert_range(start: int):
+            for key in range(start, start + 500):
+                treap.insert(key)
+
+        threads = [threading.Thread(target=insert_range, args=(i * 500,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(treap), 4000)
+        self.assertEqual(treap.to_list(), list(range(4000)))
+
+    def test_apply_batch(self):
+        treap = ConcurrentTreap(Treap.from_sorted([1, 2, 3]))
+        results = treap.apply_batch([("insert", 4), ("delete", 1), ("insert", 2)])
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[2], ConcurrentTreap.DuplicateKeyException)
+        self.assertEqual(list(treap), [2, 3, 4])
+
+        with self.assertRaises(ValueError):
+            treap.apply_batch([("insert", 5), ("upsert", 6)])
+        self.assertNotIn(5, treap)
+
+    def test_iterator_fails_fast_on_write(self):
+        treap = ConcurrentTreap(Treap.from_sorted([1, 2, 3]))
+        iterator = iter(treap)
+        self.assertEqual(next(iterator), 1)
+        treap.delete(3)
+        with self.assertRaises(ConcurrentTreap.ConcurrentModificationException):
+            next(iterator)
+
+    def test_deleting_a_missing_key_keeps_iterators(self):
+        treap = ConcurrentTreap(Treap.from_sorted([1, 2, 3]))
+        iterator = iter(treap)
+        self.assertEqual(next(iterator), 1)
+        treap.delete(4)
+        treap.apply_batch([("delete", 0)])
+        self.assertEqual(list(iterator), [2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,16 @@
+import csv
+import io
+import json
+import os
+import random
+import tempfile
 import unittest
+from collections import Counter
+from unittest import mock
 
-from Treap.student_group_maker import StudentGroupMaker, GroupMode
+from Treap import student_group_maker
+from Treap.group_sinks import ColumnarSink, GroupSink, JsonLinesSink
+from Treap.student_group_maker import GroupMode, RosterChange, StudentGroupMaker
 
 
 class TestConstructor(unittest.TestCase):
@@ -29,6 +39,95 @@ class TestConstructor(unittest.TestCase):
             StudentGroupMaker("./invalid_shape.csv")
 
 
+class TestPopulateFrom(unittest.TestCase):
+    def test_quoted_names(self):
+        group_maker = StudentGroupMaker("./file.csv")
+        size = len(group_maker)
+        group_maker.populate_from(io.StringIO('NAME,REG NO\n"Doe, Jane",ZZ/0001\n\n"Roe, Richard",ZZ/0002\n'))
+
+        self.assertEqual(size + 2, len(group_maker))
+        self.assertEqual(["Doe, Jane", "Roe, Richard"], [student.name for student in group_maker
+                                                         if student.reg_no.startswith("ZZ/")])
+
+    def test_binary_and_mapped_sources(self):
+        with open("./file.csv") as file:
+            expected = len(file.readlines()) - 1
+
+        group_maker = StudentGroupMaker("./file.csv")
+        students = list(group_maker)
+        for use_mmap in (False, True):
+            with self.subTest(use_mmap=use_mmap):
+                group_maker.delete_range(students[0], students[-1])
+                group_maker.delete(students[-1])
+                if use_mmap:
+                    group_maker.populate_from_file(use_mmap=True)
+                else:
+                    with open("./file.csv", "rb") as file:
+                        group_maker.populate_from(file)
+                self.assertEqual(expected, len(group_maker))
+                self.assertEqual([student.reg_no for student in students],
+                                 [student.reg_no for student in group_maker])
+
+    def test_errors(self):
+        group_maker = StudentGroupMaker("./file.csv")
+        student = group_maker.min().key
+        with self.subTest(error="shape"):
+            with self.assertRaises(StudentGroupMaker.InvalidShapeException):
+                group_maker.populate_from(io.StringIO("NAME,REG NO\nJane,ZZ/0001,extra\n"))
+        with self.subTest(error="duplicate in source"):
+            with self.assertRaises(StudentGroupMaker.DuplicateKeyException):
+                group_maker.populate_from(io.StringIO("NAME,REG NO\nJane,ZZ/0001\nJohn,ZZ/0001\n"))
+        with self.subTest(error="duplicate in group maker"):
+            size = len(group_maker)
+            with self.assertRaises(StudentGroupMaker.DuplicateKeyException):
+                group_maker.populate_from(io.StringIO(f"NAME,REG NO\nJane,{student.reg_no}\n"))
+            self.assertEqual(size, len(group_maker))
+
+
+@mock.patch.object(student_group_maker, "PARALLEL_THRESHOLD", 0)
+class TestParallelPopulate(unittest.TestCase):
+    def test_parallel_populate(self):
+        group_maker = StudentGroupMaker("./file.csv")
+        students = list(group_maker)
+        group_maker.delete_range(students[0], students[-1])
+        group_maker.delete(students[-1])
+
+        group_maker.populate_from_file(workers=3)
+        self.assertEqual([(student.name, student.reg_no) for student in students],
+                         [(student.name, student.reg_no) for student in group_maker])
+
+    def test_parallel_populate_with_duplicates(self):
+        with open("./file.csv") as file:
+            lines = file.readlines()
+        with tempfile.TemporaryDirectory() as directory:
+            # The first student is repeated on the last line, so the duplicates are parsed by different workers
+            file_name = os.path.join(directory, "students.csv")
+            with open(file_name, "w") as file:
+                file.writelines(lines[:-1] + [lines[-1].rstrip("\n") + "\n", lines[1]])
+
+            group_maker = StudentGroupMaker("./file.csv")
+            group_maker.file_name = file_name
+            group_maker.delete_range(group_maker.min().key, group_maker.max().key)
+            group_maker.delete(group_maker.max().key)
+            with self.assertRaises(StudentGroupMaker.DuplicateKeyException):
+                group_maker.populate_from_file(workers=2)
+
+    def test_parallel_populate_with_line_separators_in_names(self):
+        # str.splitlines would also break rows at these characters, which csv keeps in the names
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "students.csv")
+            with open(file_name, "w", newline="") as file:
+                file.write("NAME,REG NO\nAnn Lee,1\nBob\x0bKay,2\nCy\x1cDee,3\n")
+
+            group_maker = StudentGroupMaker("./file.csv")
+            group_maker.file_name = file_name
+            group_maker.delete_range(group_maker.min().key, group_maker.max().key)
+            group_maker.delete(group_maker.max().key)
+            group_maker.populate_from_file(workers=2)
+            self.assertEqual([("Ann Lee", "1"), ("Bob\x0bKay", "2"), ("Cy\x1cDee", "3")],
+                             [(student.name, student.reg_no) for student in group_maker])
+
+
 class TestMakeGroupsMethod(unittest.TestCase):
     def test_output_file_created(self):
         group_maker = StudentGroupMaker("file.csv")
@@ -81,6 +180,68 @@ class TestMakeGroupsMethod(unittest.TestCase):
                         (_, next_reg, _) = self._split_output_line(lines[i + 1])
                         self.assertTrue(current_reg > next_reg)
 
+    def test_group_sizes(self):
+        group_maker = StudentGroupMaker("file.csv")
+        # 46 students make 4 complete groups of 11, over which the last 2 are spread, 9 complete groups of 5
+        # and a student added to one of them, or a single group of 46, which is short of more than one member
+        for students_per_group, sizes in ((11, [12, 12, 11, 11]), (5, [6] + [5] * 8), (50, [46])):
+            with self.subTest(students_per_group=students_per_group):
+                output = io.StringIO()
+                group_maker.make_groups(students_per_group, GroupMode.RANDOM, output)
+                groups = [int(line.rsplit(",", 1)[1]) for line in output.getvalue().splitlines()[1:]]
+                # Every group is written in one piece
+                self.assertEqual(sorted(groups), groups)
+                self.assertEqual(sizes, sorted((groups.count(group) for group in set(groups)), reverse=True))
+
+    def test_sinks(self):
+        group_maker = StudentGroupMaker("file.csv")
+        output = io.StringIO()
+        group_maker.make_groups(2, GroupMode.ASCENDING, JsonLinesSink(output))
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([student.reg_no for student in group_maker], [row["reg_no"] for row in rows])
+        self.assertEqual([1, 1, 2, 2, 3, 3], [row["group"] for row in rows[:6]])
+
+        batches = []
+        with mock.patch.object(student_group_maker, "BATCH_SIZE", 10):
+            group_maker.make_groups(2, GroupMode.ASCENDING, ColumnarSink(batches.append))
+        self.assertEqual([10, 10, 10, 10, 6], [len(batch["name"]) for batch in batches])
+        self.assertEqual([row["name"] for row in rows], [name for batch in batches for name in batch["name"]])
+
+        group_maker.populate_from(io.StringIO('NAME,REG NO\n"Doe, Jane",ZZ/0001\n'))
+        output = io.StringIO()
+        group_maker.make_groups(2, GroupMode.DESCENDING, output)
+        self.assertEqual(["Doe, Jane", "ZZ/0001", "1"], list(csv.reader(output.getvalue().splitlines()))[1])
+
+        class IncompleteSink(GroupSink):
+            pass
+
+        # A sink without write_rows fails when it is made, not once the groups are being written
+        with self.assertRaises(TypeError):
+            IncompleteSink()
+
+    def test_shuffled_group_mode(self):
+        group_maker = StudentGroupMaker("file.csv")
+        outputs = {}
+        for seed in (1, 1, 2):
+            output = io.StringIO()
+            group_maker.make_groups(4, GroupMode.SHUFFLED, output, seed=seed)
+            rows = list(csv.reader(output.getvalue().splitlines()))[1:]
+            self.assertEqual(sorted(student.reg_no for student in group_maker), sorted(row[1] for row in rows))
+            sizes = Counter(row[2] for row in rows)
+            self.assertEqual([5, 5] + [4] * 9, sorted(sizes.values(), reverse=True))
+            self.assertEqual(outputs.setdefault(seed, rows), rows)
+        self.assertNotEqual(outputs[1], outputs[2])
+
+        # The sets of groups made in parallel are the same, and the groups of the students are left alone
+        groups = {student.reg_no: student.group for student in group_maker}
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, f"groups{seed}.csv") for seed in (1, 2)]
+            group_maker.make_group_sets(4, [1, 2], paths, workers=2)
+            for seed, path in zip((1, 2), paths):
+                with open(path) as file:
+                    self.assertEqual(outputs[seed], list(csv.reader(file))[1:])
+        self.assertEqual(groups, {student.reg_no: student.group for student in group_maker})
+
     @staticmethod
     def _split_output_line(line: str) -> (str, str, str):
         (name, reg_no, group) = line.replace("\n", "").split(",")
@@ -88,5 +249,79 @@ class TestMakeGroupsMethod(unittest.TestCase):
         return name, reg_no, group
 
 
+class TestIncrementalGroups(unittest.TestCase):
+    def assertBalanced(self, group_maker: StudentGroupMaker, group_count: int):
+        sizes = [0] * group_count
+        for student in group_maker:
+            sizes[student.group - 1] += 1
+        self.assertLessEqual(max(sizes) - min(sizes), 1, sizes)
+
+    def test_add_and_remove_students(self):
+        group_maker = StudentGroupMaker("file.csv")
+        group_maker.make_groups(4, GroupMode.ASCENDING, io.StringIO())
+        groups = {student.reg_no: student.group for student in group_maker}
+
+        rng = random.Random(0)
+        for i in range(100):
+            if rng.random() < 0.5:
+                changed = group_maker.add_student(f"Student {i}", f"ZZ/{i:04d}").reg_no
+            else:
+                removed = group_maker.kth(rng.randrange(len(group_maker)))
+                self.assertIs(removed, group_maker.remove_student(removed.reg_no))
+                changed = removed.reg_no
+            self.assertBalanced(group_maker, 11)
+
+            # At most one other student moves with every change
+            moved = [student.reg_no for student in group_maker
+                     if student.reg_no != changed and groups.get(student.reg_no) != student.group]
+            self.assertLessEqual(len(moved), 1, moved)
+            groups = {student.reg_no: student.group for student in group_maker}
+        self.assertIsNone(group_maker.remove_student("ZZ/9999"))
+
+        output = io.StringIO()
+        group_maker.write_groups(output)
+        rows = list(csv.reader(output.getvalue().splitlines()))[1:]
+        self.assertEqual(sorted((student.reg_no, str(student.group)) for student in group_maker),
+                         sorted((reg_no, group) for _, reg_no, group in rows))
+
+    def test_state_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            state_file = os.path.join(directory, "groups.jsonl")
+            group_maker = StudentGroupMaker("file.csv", state_file)
+            with self.assertRaises(ValueError):
+                group_maker.write_groups(io.StringIO())
+            group_maker.make_groups(5, GroupMode.RANDOM, io.StringIO())
+            first, last = group_maker.min().key, group_maker.max().key
+            group_maker.apply_changes([RosterChange(first.reg_no), RosterChange("ZZ/0001", "Jane Doe"),
+                                       RosterChange("ZZ/0002", "John Doe"), RosterChange(last.reg_no)])
+            group_maker.remove_student("ZZ/0002")
+            groups = {student.reg_no: student.group for student in group_maker}
+            # Only the students of the roster file are kept track of once removed
+            self.assertEqual(group_maker._removed_reg_nos, {first.reg_no, last.reg_no})
+
+            # The roster file still holds the students removed, but the groups are restored as they were
+            restored = StudentGroupMaker("file.csv", state_file)
+            self.assertEqual(groups, {student.reg_no: student.group for student in restored})
+            self.assertEqual(restored._removed_reg_nos, {first.reg_no, last.reg_no})
+            restored.add_student("Richard Roe", "ZZ/0003")
+            self.assertBalanced(restored, 9)
+            restored.add_student(first.name, first.reg_no)
+            self.assertEqual(restored._removed_reg_nos, {last.reg_no})
+
+    def test_state_file_with_students_without_records(self):
+        with tempfile.TemporaryDirectory() as directory:
+            roster = os.path.join(directory, "students.csv")
+            with open(roster, "w") as file:
+                file.write("NAME,REG NO\nJane Doe,ZZ/0001\nJohn Doe,ZZ/0002\n")
+            state_file = os.path.join(directory, "groups.jsonl")
+            StudentGroupMaker(roster, state_file).make_groups(1, GroupMode.ASCENDING, io.StringIO())
+
+            # The students added to the roster since have no record, and no record has been overridden
+            with open(roster, "a") as file:
+                file.writelines(f"Student {i},ZZ/{i:04d}\n" for i in range(3, 100))
+            restored = StudentGroupMaker(roster, state_file)
+            self.assertEqual(restored._state_records, 0)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from Treap.implicit_treap import ImplicitTreap
+
+
+class TestImplicitTreapMethods(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sequence = ImplicitTreap("abcdefg")
+
+    def test_len_and_iterator(self):
+        self.assertEqual(len(self.sequence), 7)
+        self.assertEqual(list(self.sequence), list("abcdefg"))
+        self.assertTrue(ImplicitTreap().is_empty())
+
+    def test_getitem(self):
+        self.assertEqual(self.sequence[0], "a")
+        self.assertEqual(self.sequence[-1], "g")
+        with self.assertRaises(IndexError):
+            self.sequence[7]
+
+    def test_slices(self):
+        self.assertEqual(list(self.sequence[2:5]), list("cde"))
+        self.assertEqual(list(self.sequence[::2]), list("aceg"))
+        self.assertEqual(list(self.sequence[5:2]), [])
+        # Slicing copies, leaving the sequence as it was
+        self.assertEqual(list(self.sequence), list("abcdefg"))
+
+    def test_insert_at_and_pop_at(self):
+        self.sequence.insert_at(3, "x")
+        self.sequence.insert_at(100, "z")
+        self.sequence.insert_at(-100, "y")
+        self.assertEqual(list(self.sequence), list("yabcxdefgz"))
+
+        self.assertEqual(self.sequence.pop_at(4), "x")
+        self.assertEqual(self.sequence.pop_at(), "z")
+        self.assertEqual(list(self.sequence), list("yabcdefg"))
+        with self.assertRaises(IndexError):
+            ImplicitTreap().pop_at()
+
+    def test_concat(self):
+        other = ImplicitTreap("hij")
+        self.sequence.concat(other)
+        self.assertEqual(list(self.sequence), list("abcdefghij"))
+        self.assertTrue(other.is_empty())
+
+    def test_reverse(self):
+        self.sequence.reverse(1, 5)
+        self.assertEqual(list(self.sequence), list("aedcbfg"))
+        self.sequence.reverse(2, 4)
+        self.assertEqual(list(self.sequence), list("aecdbfg"))
+        self.sequence.reverse()
+        self.assertEqual(list(self.sequence), list("gfbdcea"))
+        self.assertEqual(self.sequence[2], "b")
+
+
+if __name__ == '__main__':
+    unittest.main()
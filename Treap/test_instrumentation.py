@@ -0,0 +1,87 @@
+import unittest
+
+from Treap.instrumentation import InstrumentedTreap
+from Treap.treap import Treap
+
+
+class TestInstrumentedTreap(unittest.TestCase):
+    def setUp(self) -> None:
+        self.my_treap = InstrumentedTreap.from_sorted([10, 20, 30, 40, 50, 60, 70])
+
+    def test_behaves_like_a_treap(self):
+        self.my_treap.insert(35)
+        self.my_treap.delete(10)
+        self.assertEqual(list(self.my_treap), [20, 30, 35, 40, 50, 60, 70])
+        self.assertEqual(self.my_treap.search(35).key, 35)
+        self.assertIsNone(self.my_treap.search(36))
+        self.assertEqual(self.my_treap.delete_range(30, 50), 3)
+        left, right = self.my_treap.split(50)
+        self.assertEqual(list(InstrumentedTreap.merge(left, right)), [20, 50, 60, 70])
+        with self.assertRaises(Treap.DuplicateKeyException):
+            self.my_treap.insert(20)
+
+    def test_search_counts_the_path(self):
+        depth = 0
+        node = self.my_treap.root
+        while node.key != 70:
+            node = node.right if node.key < 70 else node.left
+            depth += 1
+
+        self.my_treap.search(70)
+        stats = self.my_treap.stats()["operations"]["search"]
+        self.assertEqual(stats["calls"], 1)
+        self.assertEqual(stats["node_visits"], depth + 1)
+        self.assertEqual(stats["visit_histogram"], {depth + 1: 1})
+        self.assertGreaterEqual(stats["comparisons"], depth + 1)
+
+    def test_split_and_merge_depths(self):
+        left, right = self.my_treap.split(35)
+        merged = InstrumentedTreap.merge(left, right)
+        stats = merged.stats()
+        self.assertEqual(stats["operations"]["split"]["calls"], 1)
+        self.assertEqual(stats["operations"]["merge"]["calls"], 1)
+        self.assertEqual(sum(stats["split_depths"].values()), 1)
+        self.assertEqual(sum(stats["merge_depths"].values()), 1)
+
+        self.my_treap.reset_stats()
+        self.assertEqual(self.my_treap.stats(), {"operations": {}, "split_depths": {}, "merge_depths": {}})
+
+    def test_set_operations_and_fingers(self):
+        other = InstrumentedTreap.from_sorted([5, 40, 45])
+        splits = sum(self.my_treap.stats()["split_depths"].values())
+        union = self.my_treap | other
+        self.assertIsInstance(union, InstrumentedTreap)
+        # The union splits through the same hook as the other operations
+        self.assertGreater(sum(union.stats()["split_depths"].values()), splits)
+        self.assertEqual(list(union), [5, 10, 20, 30, 40, 45, 50, 60, 70])
+        union.finger().insert(46)
+        union.search(46)
+        self.assertEqual(union.stats()["operations"]["search"]["calls"], 1)
+
+    def test_instruments_an_existing_treap(self):
+        treap = InstrumentedTreap(Treap.from_sorted(range(100)).root)
+        treap.insert(100)
+        treap.delete(50)
+        self.assertEqual(list(treap), [key for key in range(101) if key != 50])
+        operations = treap.stats()["operations"]
+        self.assertGreater(operations["insert"]["comparisons"], 0)
+        self.assertGreater(operations["delete"]["node_visits"], 0)
+
+    def test_hooks(self):
+        calls = []
+
+        def hook(operation, elapsed, comparisons, visits):
+            calls.append((operation, comparisons > 0, visits > 0))
+            self.assertGreaterEqual(elapsed, 0)
+
+        self.my_treap.add_hook(hook)
+        self.my_treap.insert(45)
+        with self.assertRaises(Treap.DuplicateKeyException):
+            self.my_treap.insert(45)
+        self.my_treap.remove_hook(hook)
+        self.my_treap.search(45)
+        self.assertEqual(calls, [("insert", True, True), ("insert", True, True)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import operator
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from Treap import parallel
+from Treap.merkle_treap import MerkleTreap
+from Treap.treap import Treap
+
+
+def shape(node):
+    if node is None:
+        return None
+    return shape(node.left), node.key, shape(node.right)
+
+
+class TestMerkleTreapMethods(unittest.TestCase):
+    def setUp(self) -> None:
+        self.keys = list(range(0, 200, 2))
+        self.my_treap = MerkleTreap.from_sorted(self.keys)
+
+    def test_same_keys_give_same_treap(self):
+        shuffled = self.keys[:]
+        random.Random(1).shuffle(shuffled)
+        other = MerkleTreap()
+        for key in shuffled:
+            other.insert(key)
+        other.insert(51)
+        other.delete(51)
+
+        self.assertEqual(shape(self.my_treap.root), shape(other.root))
+        self.assertEqual(self.my_treap.digest(), other.digest())
+        self.assertEqual(self.my_treap, other)
+        self.assertEqual(MerkleTreap(), MerkleTreap())
+
+    def test_different_keys_are_not_equal(self):
+        other = MerkleTreap.from_sorted(self.keys)
+        other.insert(51)
+        self.assertNotEqual(self.my_treap, other)
+        other.delete(50)
+        self.assertNotEqual(self.my_treap, other)
+        self.assertNotEqual(self.my_treap, MerkleTreap())
+
+    def test_diff(self):
+        other = MerkleTreap.from_iterable(self.keys)
+        for key in (1, 77, 199):
+            other.insert(key)
+        for key in (0, 100):
+            other.delete(key)
+
+        self.assertEqual(self.my_treap.diff(other), ([0, 100], [1, 77, 199]))
+        self.assertEqual(other.diff(self.my_treap), ([1, 77, 199], [0, 100]))
+        self.assertEqual(self.my_treap.diff(MerkleTreap.from_sorted(self.keys)), ([], []))
+        self.assertEqual(MerkleTreap().diff(MerkleTreap.from_sorted([1, 2])), ([], [1, 2]))
+        # Neither treap is modified
+        self.assertEqual(list(self.my_treap), self.keys)
+        self.assertEqual(len(other), len(self.keys) + 1)
+
+    def test_split_merge_and_set_operations_stay_canonical(self):
+        left, right = self.my_treap.split(99)
+        self.assertEqual(left, MerkleTreap.from_sorted(range(0, 100, 2)))
+        merged = MerkleTreap.merge(left, right)
+        self.assertEqual(merged, MerkleTreap.from_sorted(self.keys))
+
+        evens = MerkleTreap.from_sorted(range(0, 60, 2))
+        threes = MerkleTreap.from_sorted(range(0, 60, 3))
+        self.assertEqual(evens | threes, MerkleTreap.from_iterable(set(range(0, 60, 2)) | set(range(0, 60, 3))))
+
+    def test_finger_keeps_digests(self):
+        finger = self.my_treap.finger()
+        for key in range(1, 40, 2):
+            finger.insert(key)
+        self.assertEqual(self.my_treap, MerkleTreap.from_iterable(self.keys + list(range(1, 40, 2))))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "merkle.snapshot")
+            self.my_treap.save(path)
+            for mmap in (True, False):
+                loaded = MerkleTreap.load(path, mmap)
+                self.assertIsInstance(loaded, MerkleTreap)
+                self.assertEqual(loaded, self.my_treap)
+
+    @mock.patch.object(parallel, "PARALLEL_THRESHOLD", 0)
+    def test_parallel_operations(self):
+        built = MerkleTreap.parallel_from_iterable(reversed(self.keys), workers=2)
+        self.assertEqual(built, self.my_treap)
+        union = built.parallel_union(MerkleTreap.from_sorted(range(0, 200, 3)), workers=2)
+        self.assertEqual(union, MerkleTreap.from_iterable(set(self.keys) | set(range(0, 200, 3))))
+        self.assertTrue(built.is_empty())
+
+    def test_set_operations_with_plain_treaps(self):
+        plain = Treap.from_iterable(range(5, 15))
+        for operation in (operator.or_, operator.and_, operator.sub, operator.xor):
+            with self.subTest(operation=operation.__name__):
+                with self.assertRaises(TypeError):
+                    operation(self.my_treap, plain)
+                with self.assertRaises(TypeError):
+                    operation(plain, self.my_treap)
+        with self.assertRaises(TypeError):
+            self.my_treap.union(plain)
+        # Neither operand was touched
+        self.assertEqual(list(plain), list(range(5, 15)))
+        self.assertEqual(len(plain), 10)
+        self.assertEqual(list(self.my_treap), sorted(self.keys))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from Treap.multiset_treap import MultisetTreap
+
+
+class TestMultisetTreapMethods(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiset = MultisetTreap()
+        for key in [30, 10, 30, 20, 30, 10]:
+            self.multiset.insert(key)
+
+    def test_repeated_inserts_share_a_node(self):
+        self.assertEqual(len(self.multiset), 6)
+        self.assertEqual(self.multiset.root.size, 6)
+        self.assertEqual(list(self.multiset), [10, 10, 20, 30, 30, 30])
+        self.assertEqual(list(self.multiset.items()), [(10, 2), (20, 1), (30, 3)])
+        self.assertEqual((self.multiset.count(30), self.multiset.count(40)), (3, 0))
+
+        nodes = []
+        stack = [self.multiset.root]
+        while stack:
+            node = stack.pop()
+            if node is not None:
+                nodes.append(node)
+                stack.extend((node.left, node.right))
+        self.assertEqual(len(nodes), 3)
+
+    def test_remove_one_and_remove_all(self):
+        self.assertEqual(self.multiset.remove_one(30), 2)
+        self.assertEqual(self.multiset.remove_one(20), 0)
+        self.assertEqual(self.multiset.remove_one(40), 0)
+        self.assertEqual(list(self.multiset), [10, 10, 30, 30])
+        self.assertEqual(self.multiset.remove_all(10), 2)
+        self.assertEqual(self.multiset.remove_all(10), 0)
+        self.assertEqual(list(self.multiset), [30, 30])
+        self.assertEqual(len(self.multiset), 2)
+        self.assertEqual(self.multiset.min().key, 30)
+        self.multiset.delete(30)
+        self.assertTrue(self.multiset.is_empty())
+
+    def test_order_statistics_weight_counts(self):
+        self.assertEqual([self.multiset.kth(i) for i in range(6)], [10, 10, 20, 30, 30, 30])
+        self.assertEqual(self.multiset.rank(20), 2)
+        self.assertEqual(self.multiset.rank(31), 6)
+        self.assertEqual(self.multiset.count_range(10, 30), 3)
+        self.assertEqual(self.multiset.median(), 20)
+        self.assertEqual(list(self.multiset.iter_range(15, 40, reverse=True)), [30, 30, 30, 20])
+        with self.assertRaises(IndexError):
+            self.multiset.kth(6)
+
+    def test_from_iterable_split_and_merge(self):
+        multiset = MultisetTreap.from_iterable([5, 1, 5, 3, 1, 5])
+        self.assertEqual(list(multiset.items()), [(1, 2), (3, 1), (5, 3)])
+        self.assertEqual(len(multiset), 6)
+        left, right = multiset.split(3)
+        self.assertEqual((len(left), len(right)), (3, 3))
+        self.assertEqual(list(MultisetTreap.merge(left, right)), [1, 1, 3, 5, 5, 5])
+
+    def test_iteration_fails_fast(self):
+        iterator = iter(self.multiset)
+        next(iterator)
+        self.multiset.remove_one(30)
+        with self.assertRaises(MultisetTreap.ConcurrentModificationException):
+            next(iterator)
+
+    def test_queries_and_delete_range(self):
+        self.assertEqual((self.multiset.floor(25), self.multiset.successor(20)), (20, 30))
+        self.assertEqual(self.multiset.delete_range(15, 40), 4)
+        self.assertEqual(list(self.multiset), [10, 10])
+        # Operations of Treap that see every key once are not offered
+        for name in ("cursor_at", "traverse", "preorder", "union", "finger", "save"):
+            self.assertFalse(hasattr(self.multiset, name))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import random
+import unittest
+from unittest import mock
+
+from Treap import parallel
+from Treap.treap import Treap
+
+
+@mock.patch.object(parallel, "PARALLEL_THRESHOLD", 0)
+class TestParallelMethods(unittest.TestCase):
+    def test_parallel_from_iterable(self):
+        keys = random.Random(0).sample(range(100_000), 5_000)
+        treap = Treap.parallel_from_iterable(keys, workers=3)
+        self.assertEqual(len(treap), len(keys))
+        self.assertEqual(list(treap), sorted(keys))
+        self.assertEqual(treap.kth(2_500), sorted(keys)[2_500])
+
+    def test_parallel_from_iterable_with_duplicates(self):
+        keys = list(range(1_000)) + [500]
+        with self.assertRaises(Treap.DuplicateKeyException):
+            Treap.parallel_from_iterable(keys, workers=2)
+
+    def test_parallel_union(self):
+        rng = random.Random(1)
+        keys = set(rng.sample(range(10_000), 2_000))
+        other_keys = set(rng.sample(range(10_000), 2_000))
+        treap = Treap.from_iterable(keys)
+        other = Treap.from_iterable(other_keys)
+
+        union = treap.parallel_union(other, workers=4)
+        self.assertEqual(list(union), sorted(keys | other_keys))
+        self.assertEqual(len(union), len(keys | other_keys))
+        self.assertTrue(treap.is_empty())
+        self.assertTrue(other.is_empty())
+
+    def test_parallel_union_failure_keeps_operands(self):
+        treap = Treap.from_iterable(range(0, 2_000, 2))
+        other = Treap.from_iterable(range(0, 2_000, 3))
+        with mock.patch.object(parallel, "materialize", side_effect=RuntimeError("worker failed")):
+            with self.assertRaises(RuntimeError):
+                treap.parallel_union(other, workers=2)
+        self.assertEqual(list(treap), list(range(0, 2_000, 2)))
+        self.assertEqual(list(other), list(range(0, 2_000, 3)))
+        self.assertEqual(len(other), len(range(0, 2_000, 3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from Treap.persistent_treap import PersistentTreap
+
+
+class TestPersistentTreapMethods(unittest.TestCase):
+    def setUp(self) -> None:
+        self.version = PersistentTreap.from_sorted([10, 20, 30, 40, 50, 60, 70])
+
+    def test_insert_keeps_old_version(self):
+        newer = self.version.insert(35)
+        self.assertEqual(list(newer), [10, 20, 30, 35, 40, 50, 60, 70])
+        self.assertEqual(len(newer), 8)
+        self.assertEqual(list(self.version), [10, 20, 30, 40, 50, 60, 70])
+        self.assertEqual(len(self.version), 7)
+
+        with self.assertRaises(PersistentTreap.DuplicateKeyException):
+            newer.insert(35)
+        self.assertEqual(len(newer), 8)
+
+    def test_delete_keeps_old_version(self):
+        newer = self.version.delete(40)
+        self.assertEqual(list(newer), [10, 20, 30, 50, 60, 70])
+        self.assertIsNotNone(self.version.search(40))
+        self.assertIs(self.version.delete(45), self.version)
+
+    def test_split_and_merge_keep_old_versions(self):
+        left, right = self.version.split(40)
+        self.assertEqual(list(left), [10, 20, 30, 40])
+        self.assertEqual(list(right), [50, 60, 70])
+
+        merged = PersistentTreap.merge(left, right.insert(80))
+        self.assertEqual(list(merged), [10, 20, 30, 40, 50, 60, 70, 80])
+        self.assertEqual(list(left), [10, 20, 30, 40])
+        self.assertEqual(list(right), [50, 60, 70])
+        self.assertEqual(list(self.version), [10, 20, 30, 40, 50, 60, 70])
+
+    def test_delete_range(self):
+        newer = self.version.delete_range(20, 50)
+        self.assertEqual(list(newer), [10, 50, 60, 70])
+        self.assertEqual(len(self.version), 7)
+
+    def test_snapshot_while_writing(self):
+        snapshot = self.version.snapshot()
+        reader = iter(snapshot)
+        self.assertEqual(next(reader), 10)
+
+        version = self.version
+        for key in range(11, 20):
+            version = version.insert(key)
+        version = version.delete(20)
+
+        self.assertEqual(list(reader), [20, 30, 40, 50, 60, 70])
+        self.assertEqual(len(version), 15)
+
+    def test_queries(self):
+        newer = self.version.insert(35)
+        self.assertEqual(newer.kth(3), 35)
+        self.assertEqual(self.version.rank(35), 3)
+        self.assertEqual(self.version.floor(35), 30)
+        self.assertEqual(list(newer.iter_range(30, 50)), [30, 35, 40])
+        self.assertEqual(newer.cursor_at(36).next(), 40)
+        self.assertEqual(self.version.min().key, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from Treap.snapshot import MappedTreap, SnapshotFormatException
+from Treap.treap import Treap
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self) -> None:
+        self.my_treap = Treap.from_iterable([50, 10, 70, 30, 20, 60, 40])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "treap.snapshot")
+
+    def shape(self, node):
+        if node is None:
+            return None
+        return self.shape(node.left), node.key, node.priority, self.shape(node.right)
+
+    def test_reads_from_mapped_snapshot(self):
+        self.my_treap.save(self.path)
+        for mmap in (True, False):
+            with self.subTest(mmap=mmap):
+                loaded = Treap.load(self.path, mmap=mmap)
+                self.assertIsInstance(loaded, MappedTreap)
+                self.assertEqual(len(loaded), 7)
+                self.assertEqual(list(loaded), [10, 20, 30, 40, 50, 60, 70])
+                self.assertEqual(loaded.search(40).key, 40)
+                self.assertIsNone(loaded.search(45))
+                self.assertEqual((loaded.min().key, loaded.max().key), (10, 70))
+                self.assertEqual(loaded.kth(2), 30)
+                self.assertEqual(loaded.rank(45), 4)
+                self.assertTrue(loaded._mapped)
+
+    def test_load_rebuilds_the_same_treap(self):
+        self.my_treap.save(self.path)
+        loaded = Treap.load(self.path)
+        self.assertEqual(self.shape(loaded.root), self.shape(self.my_treap.root))
+        self.assertFalse(loaded._mapped)
+
+    def test_modification_materializes(self):
+        self.my_treap.save(self.path)
+        loaded = Treap.load(self.path)
+        iterator = iter(loaded)
+        self.assertEqual(next(iterator), 10)
+        loaded.insert(35)
+        loaded.delete(10)
+        self.assertEqual(list(loaded), [20, 30, 35, 40, 50, 60, 70])
+        self.assertEqual(len(loaded), 7)
+        with self.assertRaises(Treap.ConcurrentModificationException):
+            next(iterator)
+
+    def test_string_and_bytes_keys(self):
+        for keys in (["pear", "apple", "fig", "żubr"], [b"\x00", b"ab", b""]):
+            with self.subTest(keys=keys):
+                Treap.from_iterable(keys).save(self.path)
+                loaded = Treap.load(self.path)
+                self.assertEqual(list(loaded), sorted(keys))
+                self.assertEqual(loaded.search(keys[1]).key, keys[1])
+                self.assertEqual(loaded.rank(keys[0]), sorted(keys).index(keys[0]))
+
+    def test_empty_treap(self):
+        Treap().save(self.path)
+        loaded = Treap.load(self.path)
+        self.assertEqual(list(loaded), [])
+        self.assertIsNone(loaded.min())
+        loaded.insert(1)
+        self.assertEqual(list(loaded), [1])
+
+    def test_invalid_files(self):
+        with self.assertRaises(TypeError):
+            Treap.from_iterable([1, 2.5]).save(self.path)
+        with open(self.path, "wb") as file:
+            file.write(b"not a snapshot, but long enough")
+        with self.assertRaises(SnapshotFormatException):
+            Treap.load(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
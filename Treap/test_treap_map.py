@@ -0,0 +1,53 @@
+import unittest
+
+from Treap.treap_map import TreapMap
+
+
+class TestTreapMapMethods(unittest.TestCase):
+    def setUp(self) -> None:
+        self.maps = [TreapMap([(30, "c"), (10, "a"), (20, "b")]),
+                     TreapMap([(30, "c"), (10, "a"), (20, "b")], index=False)]
+
+    def test_lookups(self):
+        for treap_map in self.maps:
+            with self.subTest(indexed=treap_map._index is not None):
+                self.assertEqual(len(treap_map), 3)
+                self.assertEqual(treap_map[20], "b")
+                self.assertEqual(treap_map.get(25, "none"), "none")
+                self.assertIn(10, treap_map)
+                self.assertNotIn(15, treap_map)
+                with self.assertRaises(KeyError):
+                    treap_map[15]
+
+    def test_setitem_and_setdefault(self):
+        for treap_map in self.maps:
+            with self.subTest(indexed=treap_map._index is not None):
+                treap_map[20] = "B"
+                treap_map[15] = "x"
+                self.assertEqual(treap_map.setdefault(15, "y"), "x")
+                self.assertEqual(treap_map.setdefault(5, "y"), "y")
+                self.assertEqual(list(treap_map.items()),
+                                 [(5, "y"), (10, "a"), (15, "x"), (20, "B"), (30, "c")])
+                self.assertEqual(len(treap_map), 5)
+
+    def test_pop(self):
+        for treap_map in self.maps:
+            with self.subTest(indexed=treap_map._index is not None):
+                self.assertEqual(treap_map.pop(20), "b")
+                self.assertEqual(treap_map.pop(20, None), None)
+                with self.assertRaises(KeyError):
+                    treap_map.pop(20)
+                del treap_map[10]
+                self.assertEqual(list(treap_map), [30])
+                self.assertNotIn(20, treap_map)
+
+    def test_ordered_operations(self):
+        treap_map = self.maps[0]
+        self.assertEqual(list(treap_map.iter_range(15, 40)), [20, 30])
+        self.assertEqual(list(treap_map.values()), ["a", "b", "c"])
+        self.assertEqual(treap_map.min(), 10)
+        self.assertEqual(treap_map.max(), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
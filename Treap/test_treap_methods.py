@@ -1,6 +1,7 @@
+import sys
 import unittest
 
-from Treap.treap import Treap
+from Treap.treap import TraversalOrder, Treap, TreapNode
 
 
 class TestTreapMethods(unittest.TestCase):
@@ -43,6 +44,254 @@ class TestTreapMethods(unittest.TestCase):
         merged_treap = Treap.merge(left_treap, right_treap)
         self.assertEqual(len(merged_treap), len(left_treap) + len(right_treap))
 
+    def test_len_after_delete(self):
+        self.my_treap.delete(40)
+        self.my_treap.delete(45)  # Not in the treap
+        self.assertEqual(len(self.my_treap), 6)
+        self.assertEqual(list(self.my_treap), [10, 20, 30, 50, 60, 70])
+
+    def test_split_sizes(self):
+        left_treap, right_treap = self.my_treap.split(40)
+        self.assertEqual(len(left_treap), 4)
+        self.assertEqual(len(right_treap), 3)
+        self.assertEqual(len(Treap.merge(left_treap, right_treap)), 7)
+
+    def test_kth(self):
+        for i, key in enumerate([10, 20, 30, 40, 50, 60, 70]):
+            with self.subTest(i=i):
+                self.assertEqual(self.my_treap.kth(i), key)
+
+        with self.assertRaises(IndexError):
+            self.my_treap.kth(7)
+
+    def test_rank_and_count_range(self):
+        self.assertEqual(self.my_treap.rank(10), 0)
+        self.assertEqual(self.my_treap.rank(45), 4)
+        self.assertEqual(self.my_treap.rank(100), 7)
+        self.assertEqual(self.my_treap.count_range(20, 60), 4)
+        self.assertEqual(self.my_treap.count_range(60, 20), 0)
+
+    def test_median(self):
+        self.assertEqual(self.my_treap.median(), 40)
+        self.my_treap.delete(70)
+        self.assertEqual(self.my_treap.median(), 30)
+        self.assertIsNone(Treap().median())
+
+    def test_operations_deeper_than_recursion_limit(self):
+        # Priorities that decrease with the keys give a single right spine
+        depth = sys.getrecursionlimit() * 2
+        nodes = [TreapNode(key) for key in range(depth)]
+        for i, node in enumerate(nodes):
+            node.priority = 1 - i / depth
+            node.size = depth - i
+            if i > 0:
+                nodes[i - 1].right = node
+        treap = Treap(nodes[0])
+
+        self.assertIsNotNone(treap.search(depth - 1))
+        treap.insert(depth)
+        treap.delete(depth - 2)
+        self.assertEqual(len(treap), depth)
+
+        left_treap, right_treap = treap.split(depth // 2)
+        self.assertEqual(len(left_treap) + len(right_treap), depth)
+        merged_treap = Treap.merge(left_treap, right_treap)
+        self.assertEqual(len(merged_treap), depth)
+        self.assertEqual(merged_treap.max().key, depth)
+
+    def test_from_sorted(self):
+        treap = Treap.from_sorted(range(100))
+        self.assertEqual(len(treap), 100)
+        self.assertEqual(list(treap), list(range(100)))
+        self.assertEqual(treap.kth(42), 42)
+        self.assertEqual(len(Treap.from_sorted([])), 0)
+
+        with self.assertRaises(Treap.DuplicateKeyException):
+            Treap.from_sorted([1, 2, 2, 3])
+        with self.assertRaises(ValueError):
+            Treap.from_sorted([1, 3, 2])
+
+    def test_from_iterable(self):
+        treap = Treap.from_iterable([50, 10, 40, 20, 30])
+        self.assertEqual(list(treap), [10, 20, 30, 40, 50])
+        treap.insert(25)
+        self.assertEqual(treap.rank(30), 3)
+
+        with self.assertRaises(Treap.DuplicateKeyException):
+            Treap.from_iterable([3, 1, 3])
+
+    def test_failed_inserts_leave_the_treap_unchanged(self):
+        treap = Treap.from_iterable(range(0, 200, 2))
+
+        def check(node):
+            if node is None:
+                return 0
+            for child in (node.left, node.right):
+                if child is not None:
+                    self.assertGreaterEqual(node.priority, child.priority)
+            self.assertEqual(node.size, 1 + check(node.left) + check(node.right))
+            return node.size
+
+        for key in range(0, 200, 2):
+            with self.assertRaises(Treap.DuplicateKeyException):
+                treap.insert(key)
+            check(treap.root)
+        for key in range(1, 200, 2):
+            treap.insert(key)
+        self.assertEqual(check(treap.root), 200)
+        self.assertEqual(list(treap), list(range(200)))
+
+    def test_set_operations(self):
+        cases = [
+            (Treap.union, [10, 20, 25, 30, 40, 50, 60, 70, 80]),
+            (Treap.intersection, [20, 40, 60]),
+            (Treap.difference, [10, 30, 50, 70]),
+            (Treap.symmetric_difference, [10, 25, 30, 50, 70, 80]),
+        ]
+        for operation, expected in cases:
+            with self.subTest(operation=operation.__name__):
+                treap = Treap.from_sorted([10, 20, 30, 40, 50, 60, 70])
+                other = Treap.from_sorted([20, 25, 40, 60, 80])
+                result = operation(treap, other)
+                self.assertEqual(list(result), expected)
+                self.assertEqual(len(result), len(expected))
+                self.assertTrue(treap.is_empty())
+                self.assertTrue(other.is_empty())
+
+    def test_set_operators(self):
+        self.assertEqual(list(Treap.from_sorted([1, 2]) | Treap.from_sorted([2, 3])), [1, 2, 3])
+        self.assertEqual(list(Treap.from_sorted([1, 2]) & Treap.from_sorted([2, 3])), [2])
+        self.assertEqual(list(Treap.from_sorted([1, 2]) - Treap.from_sorted([2, 3])), [1])
+        self.assertEqual(list(Treap.from_sorted([1, 2]) ^ Treap.from_sorted([2, 3])), [1, 3])
+
+    def test_subclasses_are_kept(self):
+        class Subclass(Treap):
+            pass
+
+        treap = Subclass.from_iterable([3, 1, 2])
+        self.assertIs(type(treap), Subclass)
+        self.assertIs(type(Subclass.from_sorted([1, 2])), Subclass)
+        left, right = treap.split(1)
+        self.assertEqual((type(left), type(right)), (Subclass, Subclass))
+        self.assertIs(type(Subclass.merge(left, right)), Subclass)
+        self.assertIs(type(Subclass.from_sorted([1]) | Subclass.from_sorted([2])), Subclass)
+
+    def test_floor_ceiling_predecessor_successor(self):
+        self.assertEqual(self.my_treap.floor(45), 40)
+        self.assertEqual(self.my_treap.floor(40), 40)
+        self.assertIsNone(self.my_treap.floor(5))
+        self.assertEqual(self.my_treap.ceiling(45), 50)
+        self.assertEqual(self.my_treap.ceiling(40), 40)
+        self.assertIsNone(self.my_treap.ceiling(75))
+        self.assertEqual(self.my_treap.predecessor(40), 30)
+        self.assertIsNone(self.my_treap.predecessor(10))
+        self.assertEqual(self.my_treap.successor(40), 50)
+        self.assertIsNone(self.my_treap.successor(70))
+
+    def test_iter_range(self):
+        self.assertEqual(list(self.my_treap.iter_range(20, 50)), [20, 30, 40])
+        self.assertEqual(list(self.my_treap.iter_range(15, 55, reverse=True)), [50, 40, 30, 20])
+        self.assertEqual(list(self.my_treap.iter_range(hi=30)), [10, 20])
+        self.assertEqual(list(self.my_treap.iter_range(60)), [60, 70])
+        self.assertEqual(list(self.my_treap.iter_range(41, 49)), [])
+
+    def test_delete_range(self):
+        self.assertEqual(self.my_treap.delete_range(20, 50), 3)
+        self.assertEqual(list(self.my_treap), [10, 50, 60, 70])
+        self.assertEqual(len(self.my_treap), 4)
+        self.assertEqual(self.my_treap.delete_range(50, 50), 0)
+
+    def test_cached_min_max(self):
+        self.assertEqual(self.my_treap.min().key, 10)
+        self.assertEqual(self.my_treap.max().key, 70)
+        self.my_treap.insert(5)
+        self.my_treap.insert(80)
+        self.assertEqual((self.my_treap.min().key, self.my_treap.max().key), (5, 80))
+        self.my_treap.delete(5)
+        self.my_treap.delete(80)
+        self.assertEqual((self.my_treap.min().key, self.my_treap.max().key), (10, 70))
+        self.my_treap.delete_range(0, 30)
+        self.my_treap.delete_range(70, 100)
+        self.assertEqual((self.my_treap.min().key, self.my_treap.max().key), (30, 60))
+        self.my_treap.delete_range(0, 100)
+        self.assertIsNone(self.my_treap.min())
+        self.assertIsNone(self.my_treap.max())
+
+    def test_finger(self):
+        finger = self.my_treap.finger()
+        self.assertEqual(finger.search(40).key, 40)
+        self.assertIsNone(finger.search(45))
+        for key in range(11, 80, 2):
+            finger.insert(key)
+        self.assertEqual(list(self.my_treap), sorted([10, 20, 30, 40, 50, 60, 70, *range(11, 80, 2)]))
+        self.assertEqual(len(self.my_treap), 42)
+        self.assertEqual(self.my_treap.max().key, 79)
+        self.assertEqual(self.my_treap.rank(41), 19)
+
+        def check_sizes(node):
+            if node is None:
+                return 0
+            self.assertEqual(node.size, 1 + check_sizes(node.left) + check_sizes(node.right))
+            return node.size
+
+        check_sizes(self.my_treap.root)
+
+        with self.assertRaises(Treap.DuplicateKeyException):
+            finger.insert(50)
+        self.assertEqual(len(self.my_treap), 42)
+
+    def test_stale_finger(self):
+        finger = self.my_treap.finger()
+        self.assertEqual(finger.search(30).key, 30)
+        self.my_treap.delete(30)
+        self.my_treap.delete_range(40, 60)
+        self.assertIsNone(finger.search(30))
+        finger.insert(45)
+        self.assertEqual(list(self.my_treap), [10, 20, 45, 60, 70])
+
+    def test_cursor(self):
+        cursor = self.my_treap.cursor_at(35)
+        self.assertEqual(cursor.peek(), 40)
+        self.assertEqual([cursor.next(), cursor.next()], [40, 50])
+        self.assertEqual([cursor.prev(), cursor.prev(), cursor.prev()], [50, 40, 30])
+        self.assertEqual(list(cursor), [30, 40, 50, 60, 70])
+        self.assertIsNone(cursor.peek())
+        self.assertFalse(cursor.has_next())
+        self.assertEqual(cursor.prev(), 70)
+
+        cursor.seek()
+        self.assertFalse(cursor.has_prev())
+        with self.assertRaises(StopIteration):
+            cursor.prev()
+        self.assertEqual(self.my_treap.cursor_at(80).prev(), 70)
+
+    def test_stale_cursor(self):
+        cursor = self.my_treap.cursor_at(20)
+        self.my_treap.insert(25)
+        with self.assertRaises(Treap.ConcurrentModificationException):
+            cursor.next()
+        cursor.seek(20)
+        self.assertEqual([cursor.next(), cursor.next()], [20, 25])
+
+    def test_traversal_orders(self):
+        treap = Treap()
+        for key, priority in [(40, 0.9), (20, 0.8), (60, 0.7), (10, 0.6), (30, 0.5), (50, 0.4)]:
+            node = TreapNode(key)
+            node.priority = priority
+            treap.root = treap._insert_node(treap.root, node)
+
+        self.assertEqual(list(treap.traverse(TraversalOrder.PREORDER)), [40, 20, 10, 30, 60, 50])
+        self.assertEqual(list(treap.traverse()), [10, 20, 30, 40, 50, 60])
+        self.assertEqual(list(treap.traverse(TraversalOrder.REVERSE_INORDER)), [60, 50, 40, 30, 20, 10])
+        self.assertEqual(list(treap.traverse(TraversalOrder.POSTORDER)), [10, 30, 20, 50, 60, 40])
+        self.assertEqual(list(treap.traverse(TraversalOrder.LEVEL_ORDER)), [40, 20, 60, 10, 30, 50])
+        self.assertEqual(list(treap.traverse(TraversalOrder.REVERSE_PREORDER)), [50, 60, 30, 10, 20, 40])
+        self.assertEqual(list(treap.traverse(TraversalOrder.REVERSE_POSTORDER)), [40, 60, 50, 20, 30, 10])
+        self.assertEqual(list(treap.traverse(chunk_size=4)), [[10, 20, 30, 40], [50, 60]])
+        self.assertEqual(list(Treap().traverse(TraversalOrder.POSTORDER, chunk_size=4)), [])
+        with self.assertRaises(ValueError):
+            treap.traverse(chunk_size=0)
+
     def test_preorder_generator(self):
         count = 0
         for value in self.my_treap.preorder():
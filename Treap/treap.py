@@ -1,29 +1,57 @@
+import os
 import random
+from collections import deque
+from enum import Enum, auto
+from itertools import islice
 
-from typing import Self
+from typing import Callable, Iterable, Self
 
 from Treap.stack import Stack
 
 
+class TraversalOrder(Enum):
+    PREORDER = auto()
+    INORDER = auto()
+    REVERSE_INORDER = auto()
+    POSTORDER = auto()
+    LEVEL_ORDER = auto()
+    # The opposite orders of PREORDER and POSTORDER, which visit the right subtree before the left one
+    REVERSE_PREORDER = auto()
+    REVERSE_POSTORDER = auto()
+
+
 class TreapNode:
+    # Nodes have fixed fields, so slots save the memory of a dict and make their attributes faster to access
+    __slots__ = ("key", "priority", "left", "right", "size")
+
     def __init__(self, key):
         self.key = key
         self.priority = random.random()
         self.left = None
         self.right = None
+        # Number of nodes in the subtree rooted at this node (itself included)
+        self.size = 1
 
 
 class Treap:
     class _TreapIterator:
-        """This iterator follows an inorder traversal over the keys of a treap"""
-        def __init__(self, root: TreapNode | None):
+        """
+        This iterator follows an inorder traversal over the keys of a treap.
+        When given the treap itself, it fails fast with a ConcurrentModificationException
+        if the treap is modified after the iterator was created
+        """
+        def __init__(self, root: TreapNode | None, treap: "Treap | None" = None):
             self._stack = Stack[TreapNode]()
+            self._treap = treap
+            self._expected_version = treap._version if treap is not None else 0
             self._traverse_to_min_node(root)
 
         def __iter__(self):
             return self
 
         def __next__(self):
+            if self._treap is not None and self._treap._version != self._expected_version:
+                raise Treap.ConcurrentModificationException("Treap modified during iteration")
             if self._stack.is_empty():
                 raise StopIteration
             else:
@@ -34,13 +62,226 @@ class Treap:
                 return key
 
         def _traverse_to_min_node(self, root: TreapNode | None):
-            if root is not None:
+            while root is not None:
                 self._stack.push(root)
-                self._traverse_to_min_node(root.left)
+                root = root.left
+
+    class Finger:
+        """
+        Remembers the path to the last key it searched for or inserted, and starts the next
+        search or insertion from there instead of from the root.
+        It climbs up the path only as far as the first subtree that can hold the new key,
+        so keys close to the previous one take O(log d) comparisons, d being their distance
+        in rank. Nearly sorted sequences of keys benefit the most.
+
+        The subtree sizes of all the ancestors still have to be updated on insertion, but
+        that is done on the remembered path without any comparisons of keys.
+        If the treap is modified other than through this finger, the path is dropped and
+        the next operation starts from the root again.
+        """
+
+        def __init__(self, treap: "Treap"):
+            self._treap = treap
+            # Entries are (node, lo, hi), where lo and hi are the exclusive bounds on the keys
+            # in the subtree rooted at node. None stands for an unbounded side
+            self._path: list[tuple[TreapNode, object, object]] = []
+            self._version = treap._version
+
+        def _climb(self, key, priority: float | None = None) -> int:
+            """
+            Drops entries from the end of the path until the last one is the root of a subtree
+            that can hold key (and, if priority is given, that a node with that priority goes below)
+            :return: The index of the last entry, or -1 if the search has to start from the root
+            """
+            if self._version != self._treap._version:
+                self._path.clear()
+                self._version = self._treap._version
+
+            path = self._path
+            i = len(path) - 1
+            while i >= 0:
+                node, lo, hi = path[i]
+                if (lo is None or lo < key) and (hi is None or key < hi) \
+                        and (priority is None or node.priority >= priority):
+                    break
+                i -= 1
+            del path[i + 1:]
+            return i
+
+        def _descend(self, key) -> TreapNode | None:
+            """Follows the search path to key from the end of the path, extending the path"""
+            path = self._path
+            if path:
+                node, lo, hi = path.pop()
+            else:
+                node, lo, hi = self._treap.root, None, None
+
+            while node is not None:
+                path.append((node, lo, hi))
+                if key < node.key:
+                    node, hi = node.left, node.key
+                elif key > node.key:
+                    node, lo = node.right, node.key
+                else:
+                    return node if node.key == key else None
+            return None
+
+        def search(self, key) -> TreapNode | None:
+            """Same as Treap.search, starting from the last position of this finger"""
+            self._climb(key)
+            return self._descend(key)
+
+        def insert(self, key):
+            """
+            Same as Treap.insert, starting from the last position of this finger
+            :raise: DuplicateKeyException if key is already present
+            """
+            treap = self._treap
+            new_node = treap._node_class(key)
+            i = self._climb(key, new_node.priority)
+
+            if i < 0:
+                treap.root = treap._insert_node(treap.root, new_node)
+            else:
+                node = self._path[i][0]
+                if key < node.key:
+                    node.left = treap._insert_node(node.left, new_node)
+                elif key > node.key:
+                    node.right = treap._insert_node(node.right, new_node)
+                else:
+                    raise treap.DuplicateKeyException('No duplicates allowed', key, node.key)
+                for ancestor, _, _ in self._path:
+                    ancestor.size += 1
+
+            treap._inserted(key, new_node)
+            self._version = treap._version
+            self._descend(key)
+
+    class Cursor:
+        """
+        A position between two consecutive keys of a treap, which can move in both directions.
+        next() returns the key after the position and moves past it, and prev() returns the key
+        before the position and moves back before it, so a next() followed by a prev() returns
+        the same key twice. peek() returns the key next() would return without moving.
+
+        The cursor keeps the path from the root to the node after its position in a single list,
+        so each step takes amortised O(1) time, and seek takes O(log n).
+        If the treap is modified in any way, the cursor raises a ConcurrentModificationException
+        until it is moved with seek.
+        """
+
+        def __init__(self, treap: "Treap", key=None):
+            self._treap = treap
+            # Path from the root to the node after the position, which is empty at the end
+            self._path: list[TreapNode] = []
+            self.seek(key)
+
+        def seek(self, key=None):
+            """Moves the cursor before the least key greater than or equal to key, or before all the keys"""
+            path = self._path
+            path.clear()
+            self._version = self._treap._version
+            # Length of the path up to the last node whose key is not less than key
+            length = 0
+            node = self._treap.root
+            while node is not None:
+                path.append(node)
+                if key is not None and node.key < key:
+                    node = node.right
+                else:
+                    length = len(path)
+                    node = node.left
+            del path[length:]
+
+        def _check(self):
+            if self._version != self._treap._version:
+                raise Treap.ConcurrentModificationException("Treap modified since the cursor was moved")
+
+        def peek(self):
+            """Returns the key after the position, or None at the end"""
+            self._check()
+            return self._path[-1].key if self._path else None
+
+        def has_next(self) -> bool:
+            self._check()
+            return bool(self._path)
+
+        def has_prev(self) -> bool:
+            self._check()
+            path = self._path
+            if not path:
+                return self._treap.root is not None
+            if path[-1].left is not None:
+                return True
+            # There is a key before the position if it is in the right subtree of an ancestor
+            return any(parent.right is child for parent, child in zip(path, path[1:]))
+
+        def next(self):
+            """
+            Returns the key after the position and moves past it
+            :raise: StopIteration at the end
+            """
+            self._check()
+            path = self._path
+            if not path:
+                raise StopIteration
+            node = path[-1]
+            key = node.key
+            if node.right is not None:
+                node = node.right
+                while node is not None:
+                    path.append(node)
+                    node = node.left
+            else:
+                # Climb until coming up from a left child, whose parent is the successor
+                child = path.pop()
+                while path and path[-1].right is child:
+                    child = path.pop()
+            return key
+
+        def prev(self):
+            """
+            Returns the key before the position and moves before it
+            :raise: StopIteration at the start
+            """
+            self._check()
+            path = self._path
+            if not path:
+                node = self._treap.root
+            elif path[-1].left is not None:
+                node = path[-1].left
+            else:
+                # Climb until coming up from a right child, whose parent is the predecessor
+                depth = len(path) - 1
+                while depth > 0 and path[depth - 1].left is path[depth]:
+                    depth -= 1
+                if depth == 0:
+                    raise StopIteration
+                del path[depth:]
+                return path[-1].key
+
+            if node is None:
+                raise StopIteration
+            while node is not None:
+                path.append(node)
+                node = node.right
+            return path[-1].key
+
+        def __iter__(self):
+            return self
+
+        def __next__(self):
+            return self.next()
 
     class DuplicateKeyException(Exception):
         pass
 
+    # Type of the nodes made for inserted keys
+    _node_class = TreapNode
+
+    class ConcurrentModificationException(RuntimeError):
+        pass
+
     def __init__(self, root: TreapNode | None = None):
         """
         Creates a new Treap.
@@ -51,21 +292,14 @@ class Treap:
         This parameter is not to be filled in by client code
         """
         self.root = root
-        if self.root is not None:
-            # Calculating the length of a Treap given a root node is as
-            # simple as going through traversing through the treap and increasing the
-            # count from 0 whenever we find an element
-            count = 0
-            treap_iterator = self._TreapIterator(root)
-            try:
-                while True:
-                    treap_iterator.__next__()
-                    count += 1
-            except StopIteration:
-                pass
-            self._size = count
-        else:
-            self._size = 0
+        # Every node keeps the size of its subtree, so the length of a
+        # treap is simply the size stored at its root
+        self._size = self._node_size(root)
+        # Incremented by every modification, so that iterators can detect them
+        self._version = 0
+        # Cached results of min() and max(), or None when they have to be looked up again
+        self._min_node: TreapNode | None = None
+        self._max_node: TreapNode | None = None
 
     def __len__(self):
         return self._size
@@ -73,84 +307,330 @@ class Treap:
     def size(self):
         return self._size
 
-    @classmethod
-    def _left_rotation(cls, x):
-        y = x.right
-        t2 = y.left
+    @staticmethod
+    def _node_size(node: TreapNode | None) -> int:
+        return node.size if node is not None else 0
 
-        y.left = x
-        x.right = t2
+    @classmethod
+    def _update(cls, node: TreapNode):
+        """
+        Recomputes the augmented fields of node from its children.
+        Has to be called whenever the children of node change
+        """
+        left, right = node.left, node.right
+        node.size = 1 + (left.size if left is not None else 0) + (right.size if right is not None else 0)
 
-        return y
+    def _insert(self, root, key):
+        return self._insert_node(root, self._node_class(key))
 
-    @classmethod
-    def _right_rotation(cls, y):
-        x = y.left
-        t2 = x.right
+    def _insert_node(self, root, new_node: TreapNode):
+        """
+        Inserts new_node into the treap rooted at root without recursion.
+        The search path is followed top-down by key only, and kept in a buffer.
+        The new node then goes below the deepest node of the path with a priority at least
+        as high as its own, so only the priorities near the bottom of the path are read.
+        The subtree found there is split around its key and hung below the new node,
+        so no rotations are needed.
+        :return: The root of the resulting treap
+        """
+        key = new_node.key
+        priority = new_node.priority
 
-        x.right = y
-        y.left = t2
+        path: list[TreapNode] = []
+        append = path.append
+        node = root
+        while node is not None:
+            if key < node.key:
+                child = node.left
+            elif key > node.key:
+                child = node.right
+            else:
+                for ancestor in path:
+                    ancestor.size -= 1
+                raise self.DuplicateKeyException('No duplicates allowed', key, node.key)
+            # Sizes are incremented on the way down and rolled back if a duplicate is found.
+            # The ones below the new node are recomputed by the split anyway
+            node.size += 1
+            append(node)
+            node = child
 
-        return x
+        depth = len(path)
+        while depth and path[depth - 1].priority < priority:
+            depth -= 1
 
-    def _insert(self, root, key):
-        if root is None:
-            root = TreapNode(key)
-            self._size += 1
-            return root
+        # A new leaf has nothing to split. Otherwise, the rest of the path is the split path
+        if depth < len(path):
+            new_node.left, new_node.right = self._split(path[depth], key)
+            self._update(new_node)
 
-        if key < root.key:
-            root.left = self._insert(root.left, key)
-            if root.left.priority > root.priority:
-                root = self._right_rotation(root)
-        elif key > root.key:
-            root.right = self._insert(root.right, key)
-            if root.right.priority > root.priority:
-                root = self._left_rotation(root)
+        if not depth:
+            return new_node
+        parent = path[depth - 1]
+        if key < parent.key:
+            parent.left = new_node
         else:
-            raise self.DuplicateKeyException('No duplicates allowed', key, root.key)
-
+            parent.right = new_node
         return root
 
+    @staticmethod
+    def _decrement_sizes(root: TreapNode, stop: TreapNode | None, key):
+        """Decrements the sizes on the path from root to stop, e.g. when _delete removes the node stop"""
+        node = root
+        while node is not stop:
+            node.size -= 1
+            node = node.left if key < node.key else node.right
+
     def _delete(self, root, key):
-        if root is None:
+        """
+        Deletes key from the treap rooted at root without recursion.
+        The node is replaced by the merge of its two subtrees, and the sizes
+        on its path are decremented. Missing keys are ignored.
+        :return: The root of the resulting treap
+        """
+        # Only the parent is kept on the way down, and the sizes are only fixed once the key has been found
+        parent = None
+        node = root
+        while node is not None:
+            if key < node.key:
+                parent = node
+                node = node.left
+            elif key > node.key:
+                parent = node
+                node = node.right
+            else:
+                break
+
+        if node is None:
             return root
 
-        if key < root.key:
-            root.left = self._delete(root.left, key)
-        elif key > root.key:
-            root.right = self._delete(root.right, key)
+        if node.left is None or node.right is None:
+            replacement = node.left if node.right is None else node.right
         else:
-            if root.left is None:
-                return root.left
-            elif root.right is None:
-                return root.right
-
-            if root.left.priority > root.right.priority:
-                root = self._right_rotation(root)
-                root.right = self._delete(root.right, key)
-            else:
-                root = self._left_rotation(root)
-                root.left = self._delete(root.left, key)
-        self._size -= 1
+            replacement = self._merge(node.left, node.right)
+        if parent is None:
+            return replacement
+
+        self._decrement_sizes(root, node, key)
+        if parent.left is node:
+            parent.left = replacement
+        else:
+            parent.right = replacement
         return root
 
     def split(self, key) -> tuple[Self, Self]:
         left, right = self._split(self.root, key)
-        return Treap(left), Treap(right)
+        return self._derive(left), self._derive(right)
 
-    def _split(self, root, key):
-        if root is None:
-            return None, None
+    def _derive(self, root: TreapNode | None) -> Self:
+        """
+        Returns a new treap of the same class as this one rooted at root, for the treaps made by
+        split, merge and the set operations. Subclasses whose constructor takes other arguments
+        override it
+        """
+        return type(self)(root)
+
+    def _split(self, root, key, inclusive: bool = True):
+        """
+        Splits the treap rooted at root top-down into the keys less than or equal
+        to key and the keys greater than key.
+        :param inclusive: When False, a key equal to key goes to the right treap instead,
+                so the split is into the keys less than key and the rest
+        :return: A tuple with the roots of the two treaps
+        """
+        if inclusive:
+            return self._split_by(root, lambda node: key < node.key)
+        return self._split_by(root, lambda node: not node.key < key)
+
+    def _split_at(self, root, index: int):
+        """
+        Splits the treap rooted at root top-down into its first index nodes in order and the rest
+        :return: A tuple with the roots of the two treaps
+        """
+        def goes_right(node: TreapNode) -> bool:
+            nonlocal index
+            left_size = self._node_size(node.left)
+            if index <= left_size:
+                return True
+            index -= left_size + 1
+            return False
+
+        return self._split_by(root, goes_right)
 
-        if key < root.key:
-            left, right = self._split(root.left, key)
-            root.left = right
-            return left, root
+    def _split_by(self, root, goes_right: Callable[[TreapNode], bool | None]):
+        """
+        Splits the treap rooted at root top-down, walking a single path from the root.
+        goes_right is called once on every node of the path, in order, after _visit, and tells
+        whether the node and its right subtree go to the right treap. Otherwise, the node and
+        its left subtree go to the left treap.
+        When goes_right returns None, the node is the split point: it is detached from both treaps,
+        its left subtree goes to the left treap, its right subtree to the right one, and the walk stops.
+        Nodes are appended to the right spine of the left treap and the left spine
+        of the right treap as the path is walked.
+        :return: A tuple with the roots of the two treaps
+        """
+        left_root = right_root = None
+        left_tail = right_tail = None
+        # The subtrees of the split point, if any, which end the two spines
+        lower = upper = None
+        path: list[TreapNode] = []
+        # Bound once, as they are called on every node of the path
+        visit, update, append = self._visit, self._update, path.append
+        node = root
+        while node is not None:
+            node = visit(node)
+            side = goes_right(node)
+            if side is None:
+                lower, upper = node.left, node.right
+                node.left = node.right = None
+                update(node)
+                break
+            append(node)
+            if side:
+                if right_tail is None:
+                    right_root = node
+                else:
+                    right_tail.left = node
+                right_tail = node
+                node = node.left
+            else:
+                if left_tail is None:
+                    left_root = node
+                else:
+                    left_tail.right = node
+                left_tail = node
+                node = node.right
+
+        if left_tail is None:
+            left_root = lower
+        else:
+            left_tail.right = lower
+        if right_tail is None:
+            right_root = upper
         else:
-            left, right = self._split(root.right, key)
-            root.right = left
-            return root, right
+            right_tail.left = upper
+
+        # Children are always visited after their parents, so this
+        # recomputes every subtree before the subtrees containing it
+        for node in reversed(path):
+            update(node)
+
+        return left_root, right_root
+
+    def _visit(self, node: TreapNode) -> TreapNode:
+        """
+        Called by _split_by and _merge on every node they walk through, before its children are
+        read or relinked. Returns the node to use in its place, which is node itself here.
+        Subclasses can push pending updates down to the children of node, or return a copy
+        of node so that the treap it came from is left untouched
+        """
+        return node
+
+    def _split_exact(self, root, key):
+        """
+        Splits the treap rooted at root top-down into the keys less than key and the
+        keys greater than key, detaching the node whose key is equal to key, if any.
+        :return: A tuple with the root of the lesser keys, the detached node
+                (or None if key is not present) and the root of the greater keys
+        """
+        equal = None
+
+        def goes_right(node: TreapNode) -> bool | None:
+            nonlocal equal
+            if key < node.key:
+                return True
+            if node.key < key:
+                return False
+            equal = node
+            return None
+
+        left, right = self._split_by(root, goes_right)
+        return left, equal, right
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable) -> Self:
+        """
+        Builds a Treap in O(n) from keys given in ascending order
+        :raise: DuplicateKeyException if a key is repeated
+        :raise: ValueError if the keys are not in ascending order
+        """
+        return cls(cls._build_sorted(keys, cls._node_class))
+
+    @classmethod
+    def from_iterable(cls, keys: Iterable) -> Self:
+        """
+        Builds a Treap from keys in any order.
+        The keys are sorted once and then built in linear time
+        :raise: DuplicateKeyException if a key is repeated
+        """
+        return cls(cls._build_sorted(sorted(keys), cls._node_class))
+
+    @classmethod
+    def parallel_from_iterable(cls, keys: Iterable, workers: int | None = None) -> Self:
+        """
+        Builds a Treap from keys in any order, sorting and laying out each key
+        range in a separate process. See the Treap.parallel module for the details
+        :param workers: The number of processes to use, by default one per CPU
+        :raise: DuplicateKeyException if a key is repeated
+        """
+        from Treap import parallel
+        return parallel.parallel_from_iterable(keys, workers, cls)
+
+    def save(self, path: str | os.PathLike):
+        """
+        Writes the treap to a binary snapshot at path. See the Treap.snapshot module for the format
+        :raise: TypeError if the keys are not all ints, all floats, all strs or all bytes
+        """
+        from Treap import snapshot
+        snapshot.save(self, path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike, mmap: bool = True) -> Self:
+        """
+        Loads a treap saved with save.
+        With mmap, the file is memory-mapped and searches and iteration read it directly,
+        so loading is O(1). The nodes are only built once they are needed
+        :raise: SnapshotFormatException if the file is not a snapshot
+        """
+        from Treap import snapshot
+        return snapshot.load(path, mmap)
+
+    @classmethod
+    def _build_sorted(cls, keys: Iterable, make_node: Callable = TreapNode) -> TreapNode | None:
+        """
+        Builds a treap from ascending keys as a Cartesian tree.
+        The right spine of the treap built so far is kept on a stack. Each new key
+        has the largest key so far, so it goes at the end of the right spine, after
+        popping the nodes with a lower priority and adopting them as its left subtree.
+        Every node is pushed and popped once, giving O(n) overall.
+        :param make_node: Creates the node for a key, for treaps with their own kind of node
+        :return: The root of the treap
+        """
+        spine: list[TreapNode] = []
+        for key in keys:
+            node = make_node(key)
+            if spine:
+                previous = spine[-1].key
+                if not previous < key:
+                    if key < previous:
+                        raise ValueError("Keys are not in ascending order", key, previous)
+                    raise cls.DuplicateKeyException('No duplicates allowed', key, previous)
+
+            last_popped = None
+            while spine and spine[-1].priority < node.priority:
+                last_popped = spine.pop()
+                # Nothing more can be attached below a node taken off the spine
+                cls._update(last_popped)
+            node.left = last_popped
+            if spine:
+                spine[-1].right = node
+            spine.append(node)
+
+        while len(spine) > 1:
+            cls._update(spine.pop())
+        if not spine:
+            return None
+        cls._update(spine[0])
+        return spine[0]
 
     @classmethod
     def merge(cls, left_treap: Self, right_treap: Self) -> Self:
@@ -158,40 +638,227 @@ class Treap:
         Takes in two Treaps and merges them into one
         :return: A new Treap containing all the elements of left_treap and right_treap
         """
-        merged_root = cls._merge(left_treap.root, right_treap.root)
-        return Treap(merged_root)
+        merged_root = left_treap._merge(left_treap.root, right_treap.root)
+        return left_treap._derive(merged_root)
 
-    @classmethod
-    def _merge(cls, left_root: TreapNode | None, right_root: TreapNode | None) -> TreapNode | None:
+    def _merge(self, left_root: TreapNode | None, right_root: TreapNode | None) -> TreapNode | None:
         """
         Utility method for merging two Treaps given their roots.
+        Every key under left_root has to be less than every key under right_root.
+        The merge walks the right spine of the left treap and the left spine of
+        the right treap top-down, always attaching the node with the higher priority,
+        after passing it to _visit.
         :return: A TreapNode representing the root of the merged Treap.
         """
-        if not left_root:
-            return right_root
-        if not right_root:
-            return left_root
+        root = None
+        parent = None
+        # Whether parent came from the left treap, in which case its right child
+        # is the open slot. Otherwise, the open slot is its left child
+        parent_from_left = False
+        path: list[TreapNode] = []
+        visit = self._visit
 
-        if left_root.priority > right_root.priority:
-            if right_root.key < left_root.key:
-                left_root.left = cls._merge(left_root.left, right_root)
+        while left_root is not None and right_root is not None:
+            if left_root.priority > right_root.priority:
+                node = visit(left_root)
+                left_root = node.right
+                from_left = True
             else:
-                left_root.right = cls._merge(left_root.right, right_root)
-            return left_root
-        else:
-            if right_root.key < left_root.key:
-                right_root.right = cls._merge(left_root, right_root.right)
+                node = visit(right_root)
+                right_root = node.left
+                from_left = False
+
+            if parent is None:
+                root = node
+            elif parent_from_left:
+                parent.right = node
             else:
-                right_root.left = cls._merge(left_root, right_root.left)
-            return right_root
+                parent.left = node
+            path.append(node)
+            parent = node
+            parent_from_left = from_left
+
+        remaining = left_root if left_root is not None else right_root
+        if parent is None:
+            return remaining
+        if parent_from_left:
+            parent.right = remaining
+        else:
+            parent.left = remaining
+
+        update = self._update
+        for node in reversed(path):
+            update(node)
+
+        return root
 
     def _search(self, root, key):
-        if root is None or root.key == key:
+        node = root
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                return node if node.key == key else None
+        return None
+
+    def union(self, other: Self) -> Self:
+        """
+        Returns a Treap with the keys that are in either treap. Where both treaps
+        hold an equal key, only the one whose node has the higher priority is kept.
+        Runs in O(m log(n/m + 1)) expected time, m being the size of the smaller treap.
+        Like split and merge, this reuses the nodes of both treaps, which are left empty
+        :raise: TypeError if the treaps have different kinds of nodes, such as a Treap and a MerkleTreap
+        """
+        self._check_combinable(other)
+        if other is self:
+            return self._consume(self.root)
+        return self._consume(self._union(self.root, other.root), other)
+
+    def intersection(self, other: Self) -> Self:
+        """
+        Returns a Treap with the keys that are in both treaps, in O(m log(n/m + 1)) expected time.
+        Both treaps are left empty
+        """
+        self._check_combinable(other)
+        if other is self:
+            return self._consume(self.root)
+        return self._consume(self._intersection(self.root, other.root), other)
+
+    def difference(self, other: Self) -> Self:
+        """
+        Returns a Treap with the keys of this treap that are not in other,
+        in O(m log(n/m + 1)) expected time. Both treaps are left empty
+        """
+        self._check_combinable(other)
+        if other is self:
+            return self._consume(None)
+        return self._consume(self._difference(self.root, other.root), other)
+
+    def symmetric_difference(self, other: Self) -> Self:
+        """
+        Returns a Treap with the keys that are in exactly one of the two treaps,
+        in O(m log(n/m + 1)) expected time. Both treaps are left empty
+        """
+        self._check_combinable(other)
+        if other is self:
+            return self._consume(None)
+        return self._consume(self._symmetric_difference(self.root, other.root), other)
+
+    def parallel_union(self, other: Self, workers: int | None = None) -> Self:
+        """
+        Same as union, but builds each key range of the result in a separate process,
+        which pays off when both treaps are large. Both treaps are left empty
+        :param workers: The number of processes to use, by default one per CPU
+        """
+        self._check_combinable(other)
+        from Treap import parallel
+        return parallel.parallel_union(self, other, workers)
+
+    def __or__(self, other: Self) -> Self:
+        if not self._combinable(other):
+            return NotImplemented
+        return self.union(other)
+
+    def __and__(self, other: Self) -> Self:
+        if not self._combinable(other):
+            return NotImplemented
+        return self.intersection(other)
+
+    def __sub__(self, other: Self) -> Self:
+        if not self._combinable(other):
+            return NotImplemented
+        return self.difference(other)
+
+    def __xor__(self, other: Self) -> Self:
+        if not self._combinable(other):
+            return NotImplemented
+        return self.symmetric_difference(other)
+
+    def _combinable(self, other) -> bool:
+        """Whether the set operations can mix the nodes of other with those of this treap"""
+        return isinstance(other, Treap) and other._node_class is self._node_class
+
+    def _check_combinable(self, other):
+        """:raise: TypeError if the nodes of other are of another class than the nodes of this treap"""
+        if not self._combinable(other):
+            raise TypeError(f"Cannot combine a {type(self).__name__} with a {type(other).__name__}")
+
+    def _consume(self, root: TreapNode | None, other: Self | None = None) -> Self:
+        """
+        Empties this treap and other, whose nodes have been reused by a set operation
+        :return: A new treap rooted at root, made by _derive
+        """
+        self.root = None
+        self._modified()
+        if other is not None:
+            other.root = None
+            other._modified()
+        return self._derive(root)
+
+    # The set operations below recurse on both treaps at once, so their depth is
+    # bounded by the height of the treaps, which is O(log n) expected.
+    # The operand with the higher priority root keeps its root, and the other is split around it
+
+    def _union(self, root: TreapNode | None, other: TreapNode | None) -> TreapNode | None:
+        if root is None:
+            return other
+        if other is None:
+            return root
+        if root.priority < other.priority:
+            root, other = other, root
+
+        lesser, _, greater = self._split_exact(other, root.key)
+        root.left = self._union(root.left, lesser)
+        root.right = self._union(root.right, greater)
+        self._update(root)
+        return root
+
+    def _intersection(self, root: TreapNode | None, other: TreapNode | None) -> TreapNode | None:
+        if root is None or other is None:
+            return None
+        if root.priority < other.priority:
+            root, other = other, root
+
+        lesser, equal, greater = self._split_exact(other, root.key)
+        left = self._intersection(root.left, lesser)
+        right = self._intersection(root.right, greater)
+        if equal is None:
+            return self._merge(left, right)
+        root.left = left
+        root.right = right
+        self._update(root)
+        return root
+
+    def _difference(self, root: TreapNode | None, other: TreapNode | None) -> TreapNode | None:
+        if root is None or other is None:
+            return root
+
+        # Unlike the other operations, the roles are not symmetric, so
+        # root is always split around the key at the root of other
+        lesser, _, greater = self._split_exact(root, other.key)
+        left = self._difference(lesser, other.left)
+        right = self._difference(greater, other.right)
+        return self._merge(left, right)
+
+    def _symmetric_difference(self, root: TreapNode | None, other: TreapNode | None) -> TreapNode | None:
+        if root is None:
+            return other
+        if other is None:
             return root
-        if key < root.key:
-            return self._search(root.left, key)
-        elif key > root.key:
-            return self._search(root.right, key)
+        if root.priority < other.priority:
+            root, other = other, root
+
+        lesser, equal, greater = self._split_exact(other, root.key)
+        left = self._symmetric_difference(root.left, lesser)
+        right = self._symmetric_difference(root.right, greater)
+        if equal is not None:
+            return self._merge(left, right)
+        root.left = left
+        root.right = right
+        self._update(root)
+        return root
 
     @classmethod
     def _min(cls, root):
@@ -205,31 +872,316 @@ class Treap:
             root = root.right
         return root
 
+    def _modified(self):
+        """Bookkeeping after the root or the keys of the treap have changed"""
+        self._size = self._node_size(self.root)
+        self._version += 1
+        self._min_node = self._max_node = None
+
+    def _inserted(self, key, node: TreapNode | None = None):
+        """
+        Bookkeeping after key has been inserted.
+        The cached min and max only change if key is beyond them, in which case
+        they are set to node if it is known, or looked up again otherwise
+        """
+        self._size = self._node_size(self.root)
+        self._version += 1
+        if self._min_node is not None and key < self._min_node.key:
+            self._min_node = node
+        if self._max_node is not None and key > self._max_node.key:
+            self._max_node = node
+
+    def _deleted(self, key):
+        """Bookkeeping after key has been deleted, if it was present"""
+        self._size = self._node_size(self.root)
+        self._version += 1
+        if self._min_node is not None and not self._min_node.key < key:
+            self._min_node = None
+        if self._max_node is not None and not key < self._max_node.key:
+            self._max_node = None
+
     def insert(self, key):
         self.root = self._insert(self.root, key)
+        self._inserted(key)
 
     def delete(self, key):
         self.root = self._delete(self.root, key)
+        # Deleting a missing key changes nothing, so iterators and cursors stay valid
+        if self._node_size(self.root) != self._size:
+            self._deleted(key)
 
     def search(self, key):
         return self._search(self.root, key)
 
+    def finger(self) -> Finger:
+        """Returns a new Finger for searches and insertions near the previous one"""
+        return self.Finger(self)
+
+    def cursor_at(self, key=None) -> Cursor:
+        """
+        Returns a Cursor positioned before the least key greater than or equal to key,
+        or before all the keys, in O(log n)
+        """
+        return self.Cursor(self, key)
+
     def min(self):
-        return self._min(self.root)
+        """Returns the node with the smallest key, in O(1) unless a modification has made it unknown"""
+        if self._min_node is None:
+            self._min_node = self._min(self.root)
+        return self._min_node
 
     def max(self):
-        return self._max(self.root)
+        """Returns the node with the largest key, in O(1) unless a modification has made it unknown"""
+        if self._max_node is None:
+            self._max_node = self._max(self.root)
+        return self._max_node
+
+    def floor(self, key):
+        """Returns the greatest key less than or equal to key, or None if there is none"""
+        result = None
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            else:
+                result = node.key
+                node = node.right
+        return result
+
+    def ceiling(self, key):
+        """Returns the least key greater than or equal to key, or None if there is none"""
+        result = None
+        node = self.root
+        while node is not None:
+            if node.key < key:
+                node = node.right
+            else:
+                result = node.key
+                node = node.left
+        return result
+
+    def predecessor(self, key):
+        """Returns the greatest key strictly less than key, or None if there is none"""
+        result = None
+        node = self.root
+        while node is not None:
+            if node.key < key:
+                result = node.key
+                node = node.right
+            else:
+                node = node.left
+        return result
+
+    def successor(self, key):
+        """Returns the least key strictly greater than key, or None if there is none"""
+        result = None
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                result = node.key
+                node = node.left
+            else:
+                node = node.right
+        return result
+
+    def iter_range(self, lo=None, hi=None, reverse: bool = False):
+        """
+        Lazily yields the keys k such that lo <= k < hi, in ascending order, or
+        descending order if reverse is True. A bound of None leaves that side open.
+        Only the O(log n) nodes on the paths to the bounds are visited besides the
+        k keys yielded, and nothing is computed until the generator is advanced
+        """
+        return (node.key for node in self._iter_range_nodes(lo, hi, reverse))
+
+    def _iter_range_nodes(self, lo, hi, reverse: bool):
+        """Lazily yields the nodes whose keys are in [lo, hi), as described in iter_range"""
+        stack: list[TreapNode] = []
+        node = self.root
+        if not reverse:
+            # Push the nodes on the path to lo that are not below it
+            while node is not None:
+                if lo is not None and node.key < lo:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            while stack:
+                node = stack.pop()
+                if hi is not None and not node.key < hi:
+                    return
+                yield node
+                node = node.right
+                while node is not None:
+                    stack.append(node)
+                    node = node.left
+        else:
+            while node is not None:
+                if hi is not None and not node.key < hi:
+                    node = node.left
+                else:
+                    stack.append(node)
+                    node = node.right
+            while stack:
+                node = stack.pop()
+                if lo is not None and node.key < lo:
+                    return
+                yield node
+                node = node.left
+                while node is not None:
+                    stack.append(node)
+                    node = node.right
+
+    def delete_range(self, lo, hi) -> int:
+        """
+        Deletes every key k such that lo <= k < hi in O(log n), by cutting the range
+        out with two splits and joining what is left with a merge
+        :return: The number of keys deleted
+        """
+        if not lo < hi:
+            return 0
+        lower, rest = self._split(self.root, lo, inclusive=False)
+        middle, upper = self._split(rest, hi, inclusive=False)
+        self.root = self._merge(lower, upper)
+        self._modified()
+        return self._node_size(middle)
+
+    def kth(self, index: int):
+        """
+        Returns the key at position index (0-based) in the sorted order of the keys.
+        Runs in O(log n) using the subtree sizes
+        :raise: IndexError if index is out of range
+        """
+        if not 0 <= index < len(self):
+            raise IndexError("Treap index out of range")
+
+        node = self.root
+        while True:
+            left_size = self._node_size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index > left_size:
+                index -= left_size + 1
+                node = node.right
+            else:
+                return node.key
+
+    def rank(self, key) -> int:
+        """
+        Returns the number of keys in the treap that are strictly less than key.
+        The key itself does not have to be in the treap
+        """
+        rank = 0
+        node = self.root
+        while node is not None:
+            if node.key < key:
+                rank += self._node_size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return rank
+
+    def count_range(self, lo, hi) -> int:
+        """Returns the number of keys k such that lo <= k < hi"""
+        if not lo < hi:
+            return 0
+        return self.rank(hi) - self.rank(lo)
+
+    def median(self):
+        """
+        Returns the median key of the treap, or None if the treap is empty.
+        For an even number of keys, the lower of the two middle keys is returned
+        """
+        if self.is_empty():
+            return None
+        return self.kth((len(self) - 1) // 2)
 
     def inorder(self, root):
-        if root:
-            self.inorder(root.left)
-            print("key:", root.key, "| priority:", root.priority, end="")
-            if root.left:
-                print(" | left child:", root.left.key, end="")
-            if root.right:
-                print(" | right child:", root.right.key, end="")
+        for node in self._traverse_nodes(root, TraversalOrder.INORDER):
+            print("key:", node.key, "| priority:", node.priority, end="")
+            if node.left:
+                print(" | left child:", node.left.key, end="")
+            if node.right:
+                print(" | right child:", node.right.key, end="")
             print()
-            self.inorder(root.right)
+
+    @staticmethod
+    def _traverse_nodes(root: TreapNode | None, order: TraversalOrder):
+        """
+        Yields the nodes of the treap rooted at root in the given order.
+        Every order uses a single explicit stack (a queue for level order) instead of
+        nested generators, so the whole traversal takes O(n) time whatever the depth
+        """
+        if root is None:
+            return
+
+        if order is TraversalOrder.PREORDER or order is TraversalOrder.REVERSE_POSTORDER:
+            forward = order is TraversalOrder.PREORDER
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                yield node
+                first, second = (node.left, node.right) if forward else (node.right, node.left)
+                if second is not None:
+                    stack.append(second)
+                if first is not None:
+                    stack.append(first)
+
+        elif order is TraversalOrder.INORDER or order is TraversalOrder.REVERSE_INORDER:
+            forward = order is TraversalOrder.INORDER
+            stack = []
+            node = root
+            while stack or node is not None:
+                while node is not None:
+                    stack.append(node)
+                    node = node.left if forward else node.right
+                node = stack.pop()
+                yield node
+                node = node.right if forward else node.left
+
+        elif order is TraversalOrder.POSTORDER or order is TraversalOrder.REVERSE_PREORDER:
+            forward = order is TraversalOrder.POSTORDER
+            stack = []
+            node = root
+            last_yielded = None
+            while stack or node is not None:
+                if node is not None:
+                    stack.append(node)
+                    node = node.left if forward else node.right
+                else:
+                    top = stack[-1]
+                    second = top.right if forward else top.left
+                    # The second subtree is only entered once, before its parent is yielded
+                    if second is not None and second is not last_yielded:
+                        node = second
+                    else:
+                        yield top
+                        last_yielded = stack.pop()
+
+        elif order is TraversalOrder.LEVEL_ORDER:
+            queue = deque([root])
+            while queue:
+                node = queue.popleft()
+                yield node
+                if node.left is not None:
+                    queue.append(node.left)
+                if node.right is not None:
+                    queue.append(node.right)
+
+        else:
+            raise ValueError(f"Unknown traversal order {order!r}")
+
+    def traverse(self, order: TraversalOrder = TraversalOrder.INORDER, chunk_size: int | None = None):
+        """
+        Lazily yields the keys of the treap in the given order, in-order by default, in O(n) overall.
+        :param chunk_size: If given, the keys are yielded in lists of chunk_size keys
+                (the last one possibly shorter) rather than one at a time
+        """
+        keys = (node.key for node in self._traverse_nodes(self.root, order))
+        if chunk_size is None:
+            return keys
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be a positive integer")
+        return iter(lambda: list(islice(keys, chunk_size)), [])
 
     @classmethod
     def _preorder(cls, root: TreapNode | None):
@@ -239,10 +1191,7 @@ class Treap:
         :returns: A generator that can be used to for a
                 preorder traversal through the treap rooted at root
         """
-        if root is not None:
-            yield root.key
-            yield from cls._preorder(root.left)
-            yield from cls._preorder(root.right)
+        return (node.key for node in cls._traverse_nodes(root, TraversalOrder.PREORDER))
 
     def preorder(self):
         """
@@ -256,4 +1205,4 @@ class Treap:
         return self.size() == 0
 
     def __iter__(self):
-        return self._TreapIterator(self.root)
\ No newline at end of file
+        return self._TreapIterator(self.root, self)
\ No newline at end of file
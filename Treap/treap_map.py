@@ -0,0 +1,131 @@
+from typing import Iterable
+
+from Treap.treap import Treap, TreapNode
+
+# Tells pop() that no default was given, since None is a valid default
+_MISSING = object()
+
+
+class TreapMapNode(TreapNode):
+    __slots__ = ("value",)
+
+    def __init__(self, key, value):
+        super().__init__(key)
+        self.value = value
+
+
+class TreapMap:
+    """
+    A mapping whose keys are kept in order in a Treap.
+
+    By default, a dict from every key to its node is kept next to the treap, so that
+    point lookups (get, [], in) are O(1) while ordered operations still use the treap.
+    Keys then have to be hashable as well as comparable. Passing index=False drops the dict,
+    and point lookups become O(log n) searches of the treap.
+    """
+
+    def __init__(self, items: Iterable[tuple] = (), index: bool = True):
+        self._tree = Treap()
+        self._index: dict | None = {} if index else None
+        for key, value in items:
+            self[key] = value
+
+    def __len__(self):
+        return len(self._tree)
+
+    def _node(self, key) -> TreapMapNode | None:
+        if self._index is not None:
+            return self._index.get(key)
+        return self._tree.search(key)
+
+    def __contains__(self, key):
+        return self._node(key) is not None
+
+    def __getitem__(self, key):
+        node = self._node(key)
+        if node is None:
+            raise KeyError(key)
+        return node.value
+
+    def get(self, key, default=None):
+        node = self._node(key)
+        return node.value if node is not None else default
+
+    def __setitem__(self, key, value):
+        node = self._node(key)
+        if node is not None:
+            node.value = value
+            return
+
+        node = TreapMapNode(key, value)
+        tree = self._tree
+        tree.root = tree._insert_node(tree.root, node)
+        tree._inserted(key, node)
+        if self._index is not None:
+            self._index[key] = node
+
+    def setdefault(self, key, default=None):
+        node = self._node(key)
+        if node is not None:
+            return node.value
+        self[key] = default
+        return default
+
+    def pop(self, key, default=_MISSING):
+        """
+        Removes key and returns its value, or default if key is not present
+        :raise: KeyError if key is not present and no default is given
+        """
+        node = self._node(key)
+        if node is None:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+
+        self._tree.delete(key)
+        if self._index is not None:
+            del self._index[key]
+        return node.value
+
+    def __delitem__(self, key):
+        self.pop(key)
+
+    def __iter__(self):
+        """Iterates over the keys in ascending order"""
+        return iter(self._tree)
+
+    def keys(self):
+        return iter(self._tree)
+
+    def items(self):
+        """Yields the (key, value) pairs in ascending order of the keys"""
+        stack: list[TreapMapNode] = []
+        node = self._tree.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key, node.value
+            node = node.right
+
+    def values(self):
+        """Yields the values in ascending order of their keys"""
+        return (value for _, value in self.items())
+
+    def iter_range(self, lo=None, hi=None, reverse: bool = False):
+        """Lazily yields the keys k such that lo <= k < hi, as Treap.iter_range does"""
+        return self._tree.iter_range(lo, hi, reverse)
+
+    def min(self):
+        """Returns the smallest key, or None if the map is empty"""
+        node = self._tree.min()
+        return node.key if node is not None else None
+
+    def max(self):
+        """Returns the largest key, or None if the map is empty"""
+        node = self._tree.max()
+        return node.key if node is not None else None
+
+    def __repr__(self):
+        return f"TreapMap({list(self.items())!r})"